@@ -13,9 +13,12 @@ The difference is configuration only, not code path.
 import json
 import logging
 import re
+from dataclasses import dataclass
+from datetime import datetime
 from enum import Enum
+from itertools import islice
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 from dotenv import load_dotenv
 
@@ -30,6 +33,23 @@ class AgentMode(Enum):
     PRODUCTION = "production"  # Real WhatsApp API calls
 
 
+@dataclass(slots=True)
+class HistoryEntry:
+    """A single message in a customer's conversation history."""
+
+    role: str
+    content: str
+    ts_ns: int
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": datetime.utcfromtimestamp(self.ts_ns / 1e9).isoformat(),
+        }
+
+
 class ConversationalAgent:
     """
     The single LLM-based agent for invoice management.
@@ -52,6 +72,11 @@ class ConversationalAgent:
         "close_invoice": "close",
     }
 
+    # Opening marker of a tool call in the LLM response
+    TOOL_MARKER = "[TOOL:"
+
+    LLM_FAILURE_MESSAGE = "Sorry, I'm having trouble processing your request. Please try again."
+
     def __init__(
         self,
         orchestrator: Any,
@@ -103,27 +128,127 @@ class ConversationalAgent:
         Returns:
             Natural language response.
         """
-        context = context or {}
-
-        # Build context string for the prompt
-        context_str = self._build_context(customer_id, context)
-
-        # Build prompt from template
-        prompt = self.prompt_template.replace("{{user_message}}", message)
-        prompt = prompt.replace("{{context}}", context_str)
+        prompt, llm_kwargs = self._build_request(message, customer_id, context or {})
 
         # Call LLM
         try:
-            response = self.llm_provider.complete(prompt)
+            response = self.llm_provider.complete(prompt, **llm_kwargs)
         except Exception as e:
             logger.error(f"LLM call failed: {e}")
-            return "Sorry, I'm having trouble processing your request. Please try again."
+            return self.LLM_FAILURE_MESSAGE
 
         # Parse and execute any tool calls
         final_response = self._process_response(response, customer_id)
 
         return final_response
 
+    def process_message_stream(
+        self,
+        message: str,
+        customer_id: str,
+        context: Optional[dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        """
+        Process a user message and yield the response in chunks as it is decoded.
+
+        Plain text is passed through as soon as the provider emits it. Once a
+        tool call marker appears, the remainder is buffered and run through
+        the normal tool execution path, then yielded as a final chunk.
+
+        Providers without a `complete_stream` method yield the whole
+        response as a single chunk.
+
+        Args:
+            message: User's message.
+            customer_id: Customer identifier (phone number).
+            context: Additional context (conversation history, etc).
+
+        Yields:
+            Response text chunks.
+        """
+        prompt, llm_kwargs = self._build_request(message, customer_id, context or {})
+
+        complete_stream = getattr(self.llm_provider, "complete_stream", None)
+        if complete_stream is None:
+            try:
+                response = self.llm_provider.complete(prompt, **llm_kwargs)
+            except Exception as e:
+                logger.error(f"LLM call failed: {e}")
+                yield self.LLM_FAILURE_MESSAGE
+                return
+            yield self._process_response(response, customer_id)
+            return
+
+        pending = ""
+        emitted = False
+        tool_mode = False
+
+        try:
+            for chunk in complete_stream(prompt, **llm_kwargs):
+                pending += chunk
+                if tool_mode:
+                    continue
+
+                marker_at = pending.find(self.TOOL_MARKER)
+                if marker_at != -1:
+                    tool_mode = True
+                    head, pending = pending[:marker_at], pending[marker_at:]
+                else:
+                    # Hold back a tail that could be the start of a marker
+                    split_at = self._marker_safe_split(pending)
+                    head, pending = pending[:split_at], pending[split_at:]
+
+                if not emitted:
+                    head = head.lstrip()
+                if head:
+                    emitted = True
+                    yield head
+        except Exception as e:
+            logger.error(f"LLM call failed: {e}")
+            if not emitted:
+                yield self.LLM_FAILURE_MESSAGE
+            return
+
+        tail = self._process_response(pending, customer_id) if tool_mode else pending.rstrip()
+        if tail:
+            yield tail
+
+    def _marker_safe_split(self, text: str) -> int:
+        """Return the index up to which text can be emitted without splitting a tool marker."""
+        for size in range(min(len(self.TOOL_MARKER) - 1, len(text)), 0, -1):
+            if self.TOOL_MARKER.startswith(text[-size:]):
+                return len(text) - size
+        return len(text)
+
+    def _build_request(
+        self, message: str, customer_id: str, context: dict[str, Any]
+    ) -> tuple[str, dict[str, Any]]:
+        """
+        Build the prompt and extra provider arguments for one turn.
+
+        Providers that support prompt caching receive the static head of the
+        template (everything before the first placeholder) as a separate
+        `system` argument, so it is identical on every turn and can be served
+        from the provider's cache.
+        """
+        prompt = self._build_prompt(message, customer_id, context)
+        if not getattr(self.llm_provider, "supports_prompt_caching", False):
+            return prompt, {}
+
+        split_at = self.prompt_template.find("{{")
+        if split_at <= 0:
+            return prompt, {}
+        return prompt[split_at:], {"system": prompt[:split_at].rstrip()}
+
+    def _build_prompt(self, message: str, customer_id: str, context: dict[str, Any]) -> str:
+        """Build the full prompt from the template, message and context."""
+        # Build context string for the prompt
+        context_str = self._build_context(customer_id, context)
+
+        # Build prompt from template
+        prompt = self.prompt_template.replace("{{user_message}}", message)
+        return prompt.replace("{{context}}", context_str)
+
     def _build_context(self, customer_id: str, context: dict[str, Any]) -> str:
         """Build context string for the prompt."""
         lines = [f"Customer ID: {customer_id}"]
@@ -148,12 +273,17 @@ class ConversationalAgent:
             lines.append("No invoices found")
 
         # Add conversation history if available
-        if context.get("conversation_history"):
+        # (HistoryEntry objects or plain role/content dicts)
+        history = context.get("conversation_history")
+        if history:
             lines.append("\nRecent conversation:")
-            for msg in context["conversation_history"][-3:]:
-                role = "User" if msg.get("role") == "user" else "Agent"
-                content = msg.get("content", "")[:100]
-                lines.append(f"  {role}: {content}")
+            for msg in islice(history, max(len(history) - 3, 0), None):
+                if isinstance(msg, HistoryEntry):
+                    role, content = msg.role, msg.content
+                else:
+                    role, content = msg.get("role"), msg.get("content", "")
+                role = "User" if role == "user" else "Agent"
+                lines.append(f"  {role}: {content[:100]}")
 
         return "\n".join(lines)
 
@@ -258,6 +388,7 @@ class ConversationalAgent:
                         "invoice_id": result.invoice_id,
                         "previous_state": result.previous_state,
                         "current_state": result.current_state,
+                        "available_actions": result.available_triggers or [],
                     },
                 }
 
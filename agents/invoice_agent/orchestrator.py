@@ -162,6 +162,7 @@ class ToolExecutionResult:
     data: Optional[dict[str, Any]] = None
     error: Optional[str] = None
     events_fired: list[str] = field(default_factory=list)
+    available_triggers: Optional[list[str]] = None
 
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary."""
@@ -174,6 +175,7 @@ class ToolExecutionResult:
             "data": self.data,
             "error": self.error,
             "events_fired": self.events_fired,
+            "available_triggers": self.available_triggers,
         }
 
 
@@ -333,6 +335,7 @@ class InvoiceOrchestrator:
                 invoice_id=invoice_id,
                 current_state=previous_state,
                 error=f"Invalid transition: {trigger} from {previous_state}. Available: {available}",
+                available_triggers=available,
             )
 
         # Execute transition
@@ -382,6 +385,7 @@ class InvoiceOrchestrator:
             previous_state=previous_state,
             current_state=current_state,
             events_fired=events_fired,
+            available_triggers=fsm.get_available_triggers(),
         )
 
     # ========== Event Handling ==========
@@ -10,12 +10,15 @@ Note: The production server (server/app.py) uses ConversationalAgent directly.
 This adapter is primarily for testing and simulator use.
 """
 
+import io
 import logging
+import time
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
-from agents.conversational_agent import ConversationalAgent, AgentMode
+from agents.conversational_agent import AgentMode, ConversationalAgent, HistoryEntry
 from agents.invoice_agent import InvoiceOrchestrator
 from llm_router import get_default_provider
 from tools.base import InMemoryInvoiceStore
@@ -53,6 +56,8 @@ class WhatsAppAdapter:
     - Response generation via ConversationalAgent
     """
 
+    ERROR_MESSAGE = "Sorry, an error occurred while processing your message. Please try again."
+
     def __init__(
         self,
         agent: Optional[ConversationalAgent] = None,
@@ -82,7 +87,7 @@ class WhatsAppAdapter:
         self.max_history = max_history
 
         # Track conversation history per phone number
-        self._conversations: dict[str, list[dict[str, Any]]] = {}
+        self._conversations: dict[str, deque[HistoryEntry]] = {}
 
     def handle_incoming(
         self,
@@ -101,18 +106,7 @@ class WhatsAppAdapter:
         Returns:
             Response text for WhatsApp.
         """
-        logger.info(f"WhatsApp message from {phone}: {text[:50]}...")
-
-        # Add to conversation history
-        self._add_to_history(phone, "user", text)
-
-        # Build context with conversation history
-        context = {
-            "channel": "whatsapp",
-            "phone": phone,
-            "message_id": message_id,
-            "conversation_history": self._get_history(phone),
-        }
+        context = self._begin_turn(phone, text, message_id)
 
         # Process through ConversationalAgent
         try:
@@ -122,14 +116,54 @@ class WhatsAppAdapter:
                 context=context,
             )
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            response = "Sorry, an error occurred while processing your message. Please try again."
+            logger.error("Error processing message: %s", e)
+            response = self.ERROR_MESSAGE
 
         # Add response to history
         self._add_to_history(phone, "assistant", response)
 
         return response
 
+    def handle_incoming_stream(
+        self,
+        phone: str,
+        text: str,
+        message_id: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Handle an incoming WhatsApp message, yielding the response as it is decoded.
+
+        The full response is added to conversation history once the stream
+        is exhausted.
+
+        Args:
+            phone: Sender's phone number.
+            text: Message text.
+            message_id: Optional WhatsApp message ID for correlation.
+
+        Yields:
+            Response text chunks for WhatsApp.
+        """
+        context = self._begin_turn(phone, text, message_id)
+        buf = io.StringIO()
+
+        try:
+            for chunk in self.agent.process_message_stream(
+                message=text,
+                customer_id=phone,
+                context=context,
+            ):
+                buf.write(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error("Error processing message: %s", e)
+            if not buf.tell():
+                buf.write(self.ERROR_MESSAGE)
+                yield self.ERROR_MESSAGE
+
+        # Add response to history
+        self._add_to_history(phone, "assistant", buf.getvalue())
+
     def handle_message(
         self,
         channel: str,
@@ -155,6 +189,26 @@ class WhatsAppAdapter:
             message_id=kwargs.get("message_id"),
         )
 
+    def _begin_turn(
+        self,
+        phone: str,
+        text: str,
+        message_id: Optional[str],
+    ) -> dict[str, Any]:
+        """Record the user message and build the agent context for this turn."""
+        logger.info("WhatsApp message from %s: %.50s...", phone, text)
+
+        # Add to conversation history
+        self._add_to_history(phone, "user", text)
+
+        # Build context with conversation history
+        return {
+            "channel": "whatsapp",
+            "phone": phone,
+            "message_id": message_id,
+            "conversation_history": self._conversations[phone],
+        }
+
     def clear_context(self, phone: str) -> None:
         """Clear all context for a phone number."""
         self._conversations.pop(phone, None)
@@ -169,19 +223,14 @@ class WhatsAppAdapter:
 
     def _add_to_history(self, phone: str, role: str, content: str) -> None:
         """Add a message to conversation history."""
-        if phone not in self._conversations:
-            self._conversations[phone] = []
-
-        self._conversations[phone].append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.utcnow().isoformat(),
-        })
+        history = self._conversations.get(phone)
+        if history is None or history.maxlen != self.max_history:
+            # Bounded deque trims old messages on append
+            history = deque(history or (), maxlen=self.max_history)
+            self._conversations[phone] = history
 
-        # Trim history if too long
-        if len(self._conversations[phone]) > self.max_history:
-            self._conversations[phone] = self._conversations[phone][-self.max_history:]
+        history.append(HistoryEntry(role, content, time.time_ns()))
 
     def _get_history(self, phone: str) -> list[dict[str, Any]]:
         """Get conversation history for a phone number."""
-        return self._conversations.get(phone, [])
+        return [entry.to_dict() for entry in self._conversations.get(phone, ())]
@@ -6,7 +6,16 @@ This simulator uses the SAME ConversationalAgent as production.
 The only difference is configuration (AgentMode.SIMULATOR).
 
 Usage:
-    python channels/whatsapp/simulator.py
+    whatsapp-simulator [--max-concurrent N] [--cache-ttl {5m,1h}]
+    python -m channels.whatsapp.simulator [--max-concurrent N] [--cache-ttl {5m,1h}]
+
+    Piped input (e.g. `whatsapp-simulator < script.txt`) is replayed in batch mode.
+    With --max-concurrent N, up to N consecutive messages are sent to the
+    agent concurrently; commands act as barriers and replies print in order.
+    With --cache-ttl, the Claude prompt cache for the static agent prompt is
+    kept for the given lifetime (the API default is 5m).
+    Replies to repeated messages are served from a local cache while no
+    invoice state has changed; --response-cache-size 0 disables it.
 
 Commands:
     /create INV-XXX  - Create a new invoice
@@ -17,21 +26,20 @@ Commands:
     exit             - Exit simulator
 """
 
+import argparse
+import asyncio
 import sys
+from collections import OrderedDict
 from datetime import datetime
-from pathlib import Path
-
-# Add project root to path
-project_root = Path(__file__).parent.parent.parent
-sys.path.insert(0, str(project_root))
+from typing import Callable, Optional
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
-load_dotenv(project_root / ".env")
+load_dotenv()
 
 from agents.conversational_agent import ConversationalAgent, AgentMode
 from agents.invoice_agent import InvoiceOrchestrator
-from llm_router import get_default_provider
+from llm_router import ClaudeLLMProvider, get_default_provider
 from tools.base import InMemoryInvoiceStore
 
 
@@ -60,14 +68,20 @@ Example flow:
     print("=" * 60 + "\n")
 
 
-def print_state_table(orchestrator: InvoiceOrchestrator, invoice_id: str) -> None:
-    """Print state table for an invoice."""
+def print_state_table(
+    orchestrator: InvoiceOrchestrator,
+    invoice_id: str,
+    available_triggers: Optional[list[str]] = None,
+) -> None:
+    """Print state table for an invoice, reusing known triggers if given."""
     fsm = orchestrator.get_invoice(invoice_id)
     if not fsm:
         print(f"Invoice {invoice_id} not found")
         return
 
-    triggers = ", ".join(fsm.get_available_triggers()) or "none"
+    if available_triggers is None:
+        available_triggers = fsm.get_available_triggers()
+    triggers = ", ".join(available_triggers) or "none"
     print(f"\n+{'-' * 50}+")
     print(f"| Invoice: {fsm.invoice_id:<40}|")
     print(f"+{'-' * 50}+")
@@ -77,6 +91,140 @@ def print_state_table(orchestrator: InvoiceOrchestrator, invoice_id: str) -> Non
     print(f"+{'-' * 50}+\n")
 
 
+class ResponseCache:
+    """
+    Exact-match LRU cache of agent replies.
+
+    Keys combine the phone, the normalized message text and the store's
+    version (bumped by every save), so any state change (from a command or
+    a tool call) naturally misses the cache. Stores without a version fall
+    back to every invoice's current state.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple, str] = OrderedDict()
+
+    @staticmethod
+    def make_key(orchestrator: InvoiceOrchestrator, phone: str, text: str) -> tuple:
+        """Build the cache key for a message against the current invoice states."""
+        version = getattr(orchestrator.store, "version", None)
+        if version is None:
+            version = tuple(
+                (inv["invoice_id"], inv["state"]) for inv in orchestrator.list_invoices()
+            )
+        return (phone, " ".join(text.lower().split()), version)
+
+    def get(self, key: tuple) -> Optional[str]:
+        """Return the cached reply for key, if any."""
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: tuple, response: str) -> None:
+        """Store a reply, evicting the least recently used entry when full."""
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+def _cmd_exit(parts: list[str], orchestrator: InvoiceOrchestrator, phone: str) -> bool:
+    """Exit the simulator."""
+    print("\nSimulator closed. Goodbye!")
+    return False
+
+
+def _cmd_help(parts: list[str], orchestrator: InvoiceOrchestrator, phone: str) -> bool:
+    """Show help."""
+    print_header()
+    return True
+
+
+def _cmd_create(parts: list[str], orchestrator: InvoiceOrchestrator, phone: str) -> bool:
+    """Create a new invoice."""
+    if len(parts) < 2:
+        print("Usage: /create INV-XXX")
+    else:
+        invoice_id = parts[1].upper()
+        orchestrator.create_invoice(invoice_id)
+        print(f"Created invoice: {invoice_id}")
+        print_state_table(orchestrator, invoice_id)
+    return True
+
+
+def _cmd_state(parts: list[str], orchestrator: InvoiceOrchestrator, phone: str) -> bool:
+    """Show an invoice's state table."""
+    if len(parts) < 2:
+        print("Usage: /state INV-XXX")
+    else:
+        invoice_id = parts[1].upper()
+        print_state_table(orchestrator, invoice_id)
+    return True
+
+
+def _cmd_advance(parts: list[str], orchestrator: InvoiceOrchestrator, phone: str) -> bool:
+    """Advance an invoice with a trigger."""
+    if len(parts) < 3:
+        print("Usage: /advance INV-XXX <trigger>")
+        print("   Triggers: send_invoice, request_approval, approve, reject,")
+        print("             request_payment, confirm_payment, close, dispute")
+    else:
+        invoice_id = parts[1].upper()
+        trigger = parts[2].lower()
+        result = orchestrator.execute_transition(
+            invoice_id=invoice_id,
+            trigger=trigger,
+            customer_id=phone,
+        )
+        if result.success:
+            print(f"Transition: {result.previous_state} -> {result.current_state}")
+            print_state_table(orchestrator, invoice_id, result.available_triggers)
+        else:
+            print(f"Error: {result.error}")
+    return True
+
+
+def _cmd_list(parts: list[str], orchestrator: InvoiceOrchestrator, phone: str) -> bool:
+    """List all invoices."""
+    invoices = orchestrator.list_invoices()
+    if not invoices:
+        print("No invoices found. Use /create INV-XXX to create one.")
+    else:
+        print("\nInvoices:")
+        for inv in invoices:
+            print(f"   - {inv['invoice_id']}: {inv['state']}")
+        print()
+    return True
+
+
+def _cmd_context(parts: list[str], orchestrator: InvoiceOrchestrator, phone: str) -> bool:
+    """Show the simulated customer's context."""
+    print(f"\nPhone: {phone}")
+    invoices = orchestrator.list_invoices()
+    if invoices:
+        print(f"Total invoices: {len(invoices)}")
+        active = [i for i in invoices if i["state"] != "closed"]
+        print(f"Active invoices: {len(active)}")
+    else:
+        print("No invoices")
+    print()
+    return True
+
+
+# Command name -> handler(parts, orchestrator, phone), returning False to exit
+COMMANDS: dict[str, Callable[[list[str], InvoiceOrchestrator, str], bool]] = {
+    "exit": _cmd_exit,
+    "/help": _cmd_help,
+    "/create": _cmd_create,
+    "/state": _cmd_state,
+    "/advance": _cmd_advance,
+    "/list": _cmd_list,
+    "/context": _cmd_context,
+}
+
+
 def handle_command(
     cmd: str,
     orchestrator: InvoiceOrchestrator,
@@ -96,82 +244,41 @@ def handle_command(
     parts = cmd.strip().split()
     command = parts[0].lower()
 
-    if command == "exit":
-        print("\nSimulator closed. Goodbye!")
-        return False
-
-    elif command == "/help":
-        print_header()
-
-    elif command == "/create":
-        if len(parts) < 2:
-            print("Usage: /create INV-XXX")
-        else:
-            invoice_id = parts[1].upper()
-            orchestrator.create_invoice(invoice_id)
-            print(f"Created invoice: {invoice_id}")
-            print_state_table(orchestrator, invoice_id)
-
-    elif command == "/state":
-        if len(parts) < 2:
-            print("Usage: /state INV-XXX")
-        else:
-            invoice_id = parts[1].upper()
-            print_state_table(orchestrator, invoice_id)
-
-    elif command == "/advance":
-        if len(parts) < 3:
-            print("Usage: /advance INV-XXX <trigger>")
-            print("   Triggers: send_invoice, request_approval, approve, reject,")
-            print("             request_payment, confirm_payment, close, dispute")
-        else:
-            invoice_id = parts[1].upper()
-            trigger = parts[2].lower()
-            result = orchestrator.execute_transition(
-                invoice_id=invoice_id,
-                trigger=trigger,
-                customer_id=phone,
-            )
-            if result.success:
-                print(f"Transition: {result.previous_state} -> {result.current_state}")
-                print_state_table(orchestrator, invoice_id)
-            else:
-                print(f"Error: {result.error}")
-
-    elif command == "/list":
-        invoices = orchestrator.list_invoices()
-        if not invoices:
-            print("No invoices found. Use /create INV-XXX to create one.")
-        else:
-            print("\nInvoices:")
-            for inv in invoices:
-                print(f"   - {inv['invoice_id']}: {inv['state']}")
-            print()
-
-    elif command == "/context":
-        print(f"\nPhone: {phone}")
-        invoices = orchestrator.list_invoices()
-        if invoices:
-            print(f"Total invoices: {len(invoices)}")
-            active = [i for i in invoices if i["state"] != "closed"]
-            print(f"Active invoices: {len(active)}")
-        else:
-            print("No invoices")
-        print()
+    handler = COMMANDS.get(command)
+    if handler is not None:
+        return handler(parts, orchestrator, phone)
 
-    elif command.startswith("/"):
+    if command.startswith("/"):
         print(f"Unknown command: {command}")
         print("   Type /help for available commands")
 
-    else:
-        # Not a command - treat as message
-        return True  # Signal to process as message
-
+    # Not a command - caller treats it as a message
     return True
 
 
-def main() -> None:
+def main(argv: Optional[list[str]] = None) -> None:
     """Run the WhatsApp simulator."""
+    parser = argparse.ArgumentParser(description="WhatsApp Invoice Agent Simulator")
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=1,
+        help="Messages processed concurrently when replaying piped input (default: 1)",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        choices=["5m", "1h"],
+        default=None,
+        help="Prompt cache lifetime for the Claude provider (default: API default, 5m)",
+    )
+    parser.add_argument(
+        "--response-cache-size",
+        type=int,
+        default=1024,
+        help="Replies kept for repeated messages, 0 to disable (default: 1024)",
+    )
+    args = parser.parse_args(argv)
+
     print_header()
 
     # Initialize components
@@ -185,6 +292,9 @@ def main() -> None:
 
     # Get LLM provider
     provider = get_default_provider()
+    if isinstance(provider, ClaudeLLMProvider) and args.cache_ttl:
+        # Own instance, so the TTL does not leak into the shared default provider
+        provider = ClaudeLLMProvider(api_key=provider.api_key, cache_ttl=args.cache_ttl)
     provider_name = type(provider).__name__
     print(f"LLM Provider: {provider_name}")
 
@@ -201,43 +311,155 @@ def main() -> None:
     )
 
     phone = "+972500000000"
+    cache = ResponseCache(args.response_cache_size) if args.response_cache_size > 0 else None
 
     print("Ready!\n")
     print(f"Simulating as: {phone}")
     print("Tip: Start with /create INV-001 to create an invoice\n")
 
-    while True:
+    if sys.stdin.isatty():
+        while True:
+            try:
+                user_input = input("You (WhatsApp): ")
+            except (KeyboardInterrupt, EOFError):
+                print("\n\nInterrupted. Goodbye!")
+                break
+            if not _process_line(user_input, agent, orchestrator, phone, cache):
+                break
+    else:
+        # Scripted replay: read all input at once instead of per-line input() calls,
+        # and block-buffer output so each turn is written with a single flush
+        lines = sys.stdin.read().splitlines()
+        # stdout may be replaced by a plain stream (pytest capture, StringIO)
+        reconfigure = getattr(sys.stdout, "reconfigure", None)
+        if reconfigure is not None:
+            reconfigure(line_buffering=False)
         try:
-            # Get input
-            user_input = input("You (WhatsApp): ").strip()
+            if args.max_concurrent > 1:
+                asyncio.run(
+                    _replay_async(lines, agent, orchestrator, phone, args.max_concurrent, cache)
+                )
+            else:
+                for user_input in lines:
+                    if not _process_line(
+                        user_input, agent, orchestrator, phone, cache, interactive=False
+                    ):
+                        break
+        finally:
+            sys.stdout.flush()
+
+
+async def _replay_async(
+    lines: list[str],
+    agent: ConversationalAgent,
+    orchestrator: InvoiceOrchestrator,
+    phone: str,
+    max_concurrent: int,
+    cache: Optional[ResponseCache] = None,
+) -> None:
+    """
+    Replay scripted input, sending runs of consecutive messages concurrently.
 
-            if not user_input:
+    Commands run one at a time between runs, since later messages may depend
+    on the state they set up. Replies are printed in input order.
+    """
+    sem = asyncio.Semaphore(max_concurrent)
+
+    async def run_one(text: str) -> str:
+        key = ResponseCache.make_key(orchestrator, phone, text) if cache else None
+        if key is not None and (cached := cache.get(key)) is not None:
+            return cached
+        async with sem:
+            response = await asyncio.to_thread(agent.process_message, text, phone)
+        if key is not None and response != agent.LLM_FAILURE_MESSAGE:
+            cache.put(key, response)
+        return response
+
+    async def flush(batch: list[str]) -> None:
+        responses = await asyncio.gather(*(run_one(t) for t in batch), return_exceptions=True)
+        out = []
+        for response in responses:
+            timestamp = datetime.now().strftime("%H:%M")
+            if isinstance(response, BaseException):
+                out.append(f"\nError: {response}\n\n")
                 continue
+            body = response.replace("\n", "\n   ")
+            out.append(f"[{timestamp}] Sending...\n\nBot [{timestamp}]:\n   {body}\n\n")
+        sys.stdout.write("".join(out))
+        sys.stdout.flush()
+
+    batch: list[str] = []
+    for user_input in lines:
+        user_input = user_input.strip()
+        if not user_input:
+            continue
+
+        if user_input.startswith("/") or user_input.lower() == "exit":
+            await flush(batch)
+            batch = []
+            if not handle_command(user_input, orchestrator, phone):
+                return
+        else:
+            batch.append(user_input)
 
-            # Check if it's a command
-            if user_input.startswith("/") or user_input.lower() == "exit":
-                should_continue = handle_command(user_input, orchestrator, phone)
-                if not should_continue:
-                    break
-                continue
+    await flush(batch)
 
-            # Process as WhatsApp message through the agent
-            timestamp = datetime.now().strftime("%H:%M")
-            print(f"[{timestamp}] Sending...")
 
-            response = agent.process_message(user_input, phone)
+def _process_line(
+    user_input: str,
+    agent: ConversationalAgent,
+    orchestrator: InvoiceOrchestrator,
+    phone: str,
+    cache: Optional[ResponseCache] = None,
+    interactive: bool = True,
+) -> bool:
+    """
+    Process one line of simulator input (command or WhatsApp message).
+
+    Interactive sessions flush each streamed chunk as it arrives; scripted
+    replay flushes once per line.
 
-            # Print response with formatting
-            print(f"\nBot [{timestamp}]:")
-            for line in response.split("\n"):
-                print(f"   {line}")
-            print()
+    Returns:
+        True if should continue, False if should exit.
+    """
+    user_input = user_input.strip()
+    if not user_input:
+        return True
+
+    try:
+        # Check if it's a command
+        if user_input.startswith("/") or user_input.lower() == "exit":
+            return handle_command(user_input, orchestrator, phone)
+
+        # Process as WhatsApp message through the agent
+        timestamp = datetime.now().strftime("%H:%M")
+
+        # Stream the response as it is decoded
+        sys.stdout.write(f"[{timestamp}] Sending...\n\nBot [{timestamp}]:\n   ")
+        key = ResponseCache.make_key(orchestrator, phone, user_input) if cache else None
+        cached = cache.get(key) if key is not None else None
+        if cached is not None:
+            sys.stdout.write(cached.replace("\n", "\n   "))
+        else:
+            chunks = []
+            for chunk in agent.process_message_stream(user_input, phone):
+                chunks.append(chunk)
+                sys.stdout.write(chunk.replace("\n", "\n   "))
+                if interactive:
+                    sys.stdout.flush()
+            response = "".join(chunks)
+            if key is not None and response != agent.LLM_FAILURE_MESSAGE:
+                cache.put(key, response)
+        sys.stdout.write("\n\n")
+
+    except KeyboardInterrupt:
+        print("\n\nInterrupted. Goodbye!")
+        return False
+    except Exception as e:
+        print(f"\nError: {e}\n")
 
-        except KeyboardInterrupt:
-            print("\n\nInterrupted. Goodbye!")
-            break
-        except Exception as e:
-            print(f"\nError: {e}\n")
+    sys.stdout.flush()
+    return True
 
 
 if __name__ == "__main__":
@@ -9,7 +9,15 @@ from database.models import (
     ConversationModel,
 )
 from database.store import DatabaseInvoiceStore
-from database.session import get_engine, get_session, init_db, session_scope, reset_engine
+from database.audit import AuditLogBuffer, flush_audit_rows
+from database.session import (
+    db_session,
+    get_engine,
+    get_session,
+    init_db,
+    session_scope,
+    reset_engine,
+)
 
 __all__ = [
     "Base",
@@ -19,9 +27,12 @@ __all__ = [
     "AuditLogModel",
     "ConversationModel",
     "DatabaseInvoiceStore",
+    "AuditLogBuffer",
+    "flush_audit_rows",
     "get_engine",
     "get_session",
     "session_scope",
+    "db_session",
     "init_db",
     "reset_engine",
 ]
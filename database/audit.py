@@ -0,0 +1,183 @@
+"""
+Buffered audit log ingestion.
+
+Audit entries are append-only and never updated, so they are collected
+in memory and written in batches: PostgreSQL uses COPY FROM STDIN, other
+databases a single executemany INSERT per flush.
+"""
+
+import csv
+import io
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from database.ids import gen_uuids
+from database.models import AuditLogModel
+from database.session import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Column order used for both COPY and executemany
+AUDIT_COLUMNS = (
+    "entry_id",
+    "session_id",
+    "action",
+    "invoice_id",
+    "customer_id",
+    "details",
+    "created_at",
+)
+
+
+def _copy_values(row: dict[str, Any]) -> list[Any]:
+    """Row values in AUDIT_COLUMNS order, with details serialized to JSON."""
+    values = [row.get(column) for column in AUDIT_COLUMNS]
+    details = AUDIT_COLUMNS.index("details")
+    if values[details] is not None:
+        values[details] = json.dumps(values[details])
+    return values
+
+
+def _csv_buffer(rows: list[dict[str, Any]]) -> io.StringIO:
+    """Render rows as CSV for psycopg2's copy_expert (NULL written as \\N)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([
+            "\\N" if value is None
+            else value.isoformat() if isinstance(value, datetime)
+            else value
+            for value in _copy_values(row)
+        ])
+    buf.seek(0)
+    return buf
+
+
+def _copy_audit_rows(engine: Engine, rows: list[dict[str, Any]]) -> None:
+    """
+    Stream rows into audit_log with PostgreSQL COPY FROM STDIN.
+
+    psycopg (3) adapts each row itself through Copy.write_row; psycopg2
+    only offers copy_expert, so rows are rendered to CSV first.
+    """
+    copy_sql = f"COPY {AuditLogModel.__tablename__} ({', '.join(AUDIT_COLUMNS)}) FROM STDIN"
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            if engine.dialect.driver == "psycopg":
+                with cur.copy(copy_sql) as copy:
+                    for row in rows:
+                        copy.write_row(_copy_values(row))
+            else:
+                cur.copy_expert(f"{copy_sql} WITH (FORMAT csv, NULL '\\N')", _csv_buffer(rows))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def flush_audit_rows(rows: list[dict[str, Any]], engine: Optional[Engine] = None) -> None:
+    """
+    Write audit rows in one batch.
+
+    Args:
+        rows: Dicts keyed by AuditLogModel column name (action, and
+            optionally invoice_id, customer_id, session_id, details).
+            entry_id and created_at are filled in when missing.
+        engine: Engine to write through (default: the global engine).
+    """
+    if not rows:
+        return
+
+    engine = engine or get_engine()
+    now = datetime.utcnow()
+    entry_ids = gen_uuids(len(rows))
+    rows = [
+        {column: None for column in AUDIT_COLUMNS}
+        | {"entry_id": entry_id, "created_at": now}
+        | row
+        for entry_id, row in zip(entry_ids, rows)
+    ]
+
+    if engine.dialect.name == "postgresql":
+        _copy_audit_rows(engine, rows)
+    else:
+        # executemany in a single transaction
+        with engine.begin() as conn:
+            conn.execute(insert(AuditLogModel), rows)
+
+    logger.debug(f"Flushed {len(rows)} audit rows")
+
+
+class AuditLogBuffer:
+    """
+    Thread-safe in-memory buffer for audit entries.
+
+    Entries are flushed with flush_audit_rows once max_rows are queued or
+    flush_interval seconds have passed since the last flush (checked on
+    each add). Call flush() on shutdown to write any remainder.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        max_rows: int = 5000,
+        flush_interval: float = 0.5,
+    ):
+        self.engine = engine
+        self.max_rows = max_rows
+        self.flush_interval = flush_interval
+        self._rows: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(
+        self,
+        action: str,
+        invoice_id: Optional[str] = None,
+        customer_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        details: Optional[dict[str, Any]] = None,
+    ) -> None:
+        """Queue an audit entry, flushing if the buffer is full or stale."""
+        with self._lock:
+            self._rows.append({
+                "action": action,
+                "invoice_id": invoice_id,
+                "customer_id": customer_id,
+                "session_id": session_id,
+                "details": details,
+                "created_at": datetime.utcnow(),
+            })
+            due = (
+                len(self._rows) >= self.max_rows
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write all queued entries. Returns the number written."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._last_flush = time.monotonic()
+        try:
+            flush_audit_rows(rows, self.engine)
+        except Exception:
+            # Keep the entries for the next flush attempt
+            with self._lock:
+                self._rows[:0] = rows
+            raise
+        return len(rows)
@@ -0,0 +1,20 @@
+"""Identifier generation helpers shared by the database writers."""
+
+import os
+from collections.abc import Iterator
+from uuid import UUID
+
+
+def gen_uuids(n: int) -> Iterator[str]:
+    """
+    Yield n random (version 4) UUID strings from a single urandom read.
+
+    Args:
+        n: Number of UUIDs to generate
+
+    Returns:
+        Iterator over the UUID strings
+    """
+    buf = os.urandom(16 * n)
+    for i in range(0, 16 * n, 16):
+        yield str(UUID(bytes=buf[i : i + 16], version=4))
@@ -2,40 +2,136 @@
 
 import io
 import logging
+import time
+from array import array
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from decimal import Decimal
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal
+from functools import cached_property
+from itertools import chain, count
+from operator import attrgetter
+from secrets import token_urlsafe
+from types import SimpleNamespace
 from typing import Any, Optional
-from uuid import uuid4
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, field_validator, model_validator
 
 logger = logging.getLogger(__name__)
 
+# Line item inputs are held as integer micro-units (1e-6) and amounts as
+# integer cents, so totals are summed with int arithmetic instead of Decimal.
+MICROS = 1_000_000
+
+SECONDS_PER_DAY = 86_400
+
+
+def _to_micros(value: Decimal) -> int:
+    """Convert a Decimal to integer micro-units, rounding half up."""
+    return int(value.scaleb(6).to_integral_value(ROUND_HALF_UP))
+
+
+def _round_div(numerator: int, denominator: int) -> int:
+    """Integer division rounding half away from zero."""
+    quotient = (abs(numerator) * 2 + denominator) // (denominator * 2)
+    return -quotient if numerator < 0 else quotient
+
+
+def _cents_to_decimal(cents: int) -> Decimal:
+    """Convert integer cents to a two-place Decimal."""
+    return Decimal(cents).scaleb(-2)
+
+
+def _utcnow() -> datetime:
+    """Current UTC time as a naive datetime (replaces deprecated datetime.utcnow)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _utc_timestamp(value: datetime) -> float:
+    """POSIX timestamp of a datetime, treating naive values as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+# Line item ids are a per-process random prefix plus a counter, so only one
+# os.urandom call is made per process instead of one uuid4() per item.
+_LINE_ITEM_ID_PREFIX = f"li-{token_urlsafe(6)}"
+_line_item_ids = count(1)
+
+
+def _new_line_item_id() -> str:
+    """Return a new line item id, unique within and (practically) across processes."""
+    return f"{_LINE_ITEM_ID_PREFIX}-{next(_line_item_ids)}"
+
 
 class LineItem(BaseModel):
-    """Individual line item in an invoice."""
+    """Individual line item in an invoice (immutable; derived amounts are cached)."""
+
+    model_config = ConfigDict(frozen=True)
 
-    id: str = Field(default_factory=lambda: str(uuid4()))
+    id: str = Field(default_factory=_new_line_item_id)
     description: str
     quantity: Decimal = Field(default=Decimal("1"))
     unit_price: Decimal
     tax_rate: Decimal = Field(default=Decimal("0"))  # Percentage
 
+    _subtotal_cents: int = PrivateAttr(default=0)
+    _tax_cents: int = PrivateAttr(default=0)
+
+    @model_validator(mode="after")
+    def _compute_cents(self) -> "LineItem":
+        """Compute integer cent amounts (each rounded half up to the cent) on validation."""
+        quantity_micros = _to_micros(self.quantity)
+        unit_price_micros = _to_micros(self.unit_price)
+        tax_rate_micros = _to_micros(self.tax_rate)
+
+        self._subtotal_cents = _round_div(quantity_micros * unit_price_micros, MICROS * MICROS // 100)
+        # tax_rate is a percentage: cents * (micros / 1e6) / 100
+        self._tax_cents = _round_div(self._subtotal_cents * tax_rate_micros, MICROS * 100)
+        return self
+
+    @property
+    def subtotal_cents(self) -> int:
+        """Line item subtotal in integer cents."""
+        return self._subtotal_cents
+
     @property
+    def tax_cents(self) -> int:
+        """Tax amount in integer cents."""
+        return self._tax_cents
+
+    @cached_property
     def subtotal(self) -> Decimal:
         """Calculate line item subtotal (quantity * unit_price)."""
-        return self.quantity * self.unit_price
+        return _cents_to_decimal(self._subtotal_cents)
 
-    @property
+    @cached_property
     def tax_amount(self) -> Decimal:
         """Calculate tax amount."""
-        return self.subtotal * (self.tax_rate / Decimal("100"))
+        return _cents_to_decimal(self._tax_cents)
 
-    @property
+    @cached_property
     def total(self) -> Decimal:
         """Calculate total with tax."""
-        return self.subtotal + self.tax_amount
+        return _cents_to_decimal(self._subtotal_cents + self._tax_cents)
+
+    def model_copy(
+        self,
+        *,
+        update: Optional[dict[str, Any]] = None,
+        deep: bool = False,
+    ) -> "LineItem":
+        """
+        Copy the item.
+
+        With `update`, the copy is built through validation so its cent
+        amounts are recomputed; pydantic's model_copy would carry over the
+        original's private cents and cached amounts.
+        """
+        if not update:
+            return super().model_copy(deep=deep)
+        fields = {name: getattr(self, name) for name in type(self).model_fields}
+        return type(self).model_validate(fields | update)
 
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary."""
@@ -51,6 +147,50 @@ class LineItem(BaseModel):
         }
 
 
+_get_subtotal_cents = attrgetter("subtotal_cents")
+_get_tax_cents = attrgetter("tax_cents")
+
+
+@dataclass(slots=True)
+class _LineItemColumns:
+    """Struct-of-arrays copy of line item amounts as int64 cents, with running totals."""
+
+    subtotal_cents: array = field(default_factory=lambda: array("q"))
+    tax_cents: array = field(default_factory=lambda: array("q"))
+    subtotal_sum: int = 0
+    tax_sum: int = 0
+
+    @classmethod
+    def from_items(cls, items: list[LineItem]) -> "_LineItemColumns":
+        """Build columns from a list of line items and sum them once."""
+        columns = cls(
+            array("q", map(_get_subtotal_cents, items)),
+            array("q", map(_get_tax_cents, items)),
+        )
+        columns.subtotal_sum = sum(columns.subtotal_cents)
+        columns.tax_sum = sum(columns.tax_cents)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.subtotal_cents)
+
+    def append(self, item: LineItem) -> None:
+        """Append one line item's amounts and add them to the running totals."""
+        self.subtotal_cents.append(item.subtotal_cents)
+        self.tax_cents.append(item.tax_cents)
+        self.subtotal_sum += item.subtotal_cents
+        self.tax_sum += item.tax_cents
+
+    def remove(self, index: int) -> None:
+        """Remove the amounts of the line item at index from the columns and totals."""
+        self.subtotal_sum -= self.subtotal_cents.pop(index)
+        self.tax_sum -= self.tax_cents.pop(index)
+
+    def totals(self) -> tuple[int, int]:
+        """Return (subtotal_cents, tax_cents) summed over all items."""
+        return self.subtotal_sum, self.tax_sum
+
+
 class InvoiceAddress(BaseModel):
     """Address information for invoice."""
 
@@ -80,7 +220,9 @@ class InvoiceAddress(BaseModel):
 
 
 class PaymentTerms(BaseModel):
-    """Payment terms configuration."""
+    """Payment terms configuration (immutable, so one default can be shared)."""
+
+    model_config = ConfigDict(frozen=True)
 
     due_days: int = 30  # Days until payment is due
     late_fee_percent: Decimal = Field(default=Decimal("0"))  # Late fee percentage
@@ -95,6 +237,13 @@ class PaymentTerms(BaseModel):
             terms = f"{self.early_discount_percent}% {self.early_discount_days}, {terms}"
         return terms
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to dictionary."""
+        return self.model_dump()
+
+
+_DEFAULT_PAYMENT_TERMS = PaymentTerms()
+
 
 class InvoiceData(BaseModel):
     """Complete invoice data with all details."""
@@ -109,7 +258,7 @@ class InvoiceData(BaseModel):
     bill_to: Optional[InvoiceAddress] = None
 
     # Dates
-    issue_date: datetime = Field(default_factory=datetime.utcnow)
+    issue_date: datetime = Field(default_factory=_utcnow)
     due_date: Optional[datetime] = None
 
     # Line items
@@ -126,7 +275,7 @@ class InvoiceData(BaseModel):
     total: Optional[Decimal] = None
 
     # Payment
-    payment_terms: PaymentTerms = Field(default_factory=PaymentTerms)
+    payment_terms: PaymentTerms = _DEFAULT_PAYMENT_TERMS
     amount_paid: Decimal = Field(default=Decimal("0"))
 
     # Notes
@@ -136,18 +285,31 @@ class InvoiceData(BaseModel):
     # Metadata
     metadata: dict[str, Any] = Field(default_factory=dict)
 
+    # (due_date, its timestamp), refreshed if due_date is reassigned
+    _due_ts_cache: Optional[tuple[datetime, float]] = PrivateAttr(default=None)
+
+    # Line item amounts, kept in step with line_items by add_line_item
+    _columns: Optional[_LineItemColumns] = PrivateAttr(default=None)
+
     def model_post_init(self, __context: Any) -> None:
         """Calculate totals after initialization."""
-        self._calculate_totals()
+        # Explicit amounts are kept when there are no line items to derive them from
+        if self.line_items:
+            self._calculate_totals()
         if self.due_date is None:
             self.due_date = self.issue_date + timedelta(days=self.payment_terms.due_days)
+        self._due_ts_cache = (self.due_date, _utc_timestamp(self.due_date))
 
     def _calculate_totals(self) -> None:
         """Calculate subtotal, tax, and total from line items."""
-        if self.line_items:
-            self.subtotal = sum(item.subtotal for item in self.line_items)
-            self.tax_total = sum(item.tax_amount for item in self.line_items)
-            self.total = self.subtotal + self.tax_total - self.discount
+        self._columns = _LineItemColumns.from_items(self.line_items)
+        self._apply_totals(*self._columns.totals())
+
+    def _apply_totals(self, subtotal_cents: int, tax_cents: int) -> None:
+        """Set the Decimal amount fields from integer cent totals."""
+        self.subtotal = _cents_to_decimal(subtotal_cents)
+        self.tax_total = _cents_to_decimal(tax_cents)
+        self.total = _cents_to_decimal(subtotal_cents + tax_cents) - self.discount
 
     @property
     def balance_due(self) -> Decimal:
@@ -162,16 +324,31 @@ class InvoiceData(BaseModel):
     @property
     def is_overdue(self) -> bool:
         """Check if invoice is past due date."""
-        if self.due_date is None:
-            return False
-        return datetime.utcnow() > self.due_date and not self.is_paid
+        return self._days_overdue_at(time.time()) is not None
 
     @property
     def days_overdue(self) -> int:
         """Calculate days overdue."""
-        if not self.is_overdue or self.due_date is None:
-            return 0
-        return (datetime.utcnow() - self.due_date).days
+        return self._days_overdue_at(time.time()) or 0
+
+    def _due_timestamp(self) -> Optional[float]:
+        """Return the due date as a POSIX timestamp, cached per due_date value."""
+        due_date = self.due_date
+        if due_date is None:
+            return None
+        cached = self._due_ts_cache
+        if cached is None or cached[0] is not due_date:
+            cached = self._due_ts_cache = (due_date, _utc_timestamp(due_date))
+        return cached[1]
+
+    def _days_overdue_at(self, now_ts: float, is_paid: Optional[bool] = None) -> Optional[int]:
+        """Return days overdue as of timestamp `now_ts`, or None if not overdue."""
+        due_ts = self._due_timestamp()
+        if due_ts is None or now_ts <= due_ts:
+            return None
+        if self.is_paid if is_paid is None else is_paid:
+            return None
+        return int((now_ts - due_ts) // SECONDS_PER_DAY)
 
     def add_line_item(
         self,
@@ -188,20 +365,50 @@ class InvoiceData(BaseModel):
             tax_rate=tax_rate,
         )
         self.line_items.append(item)
-        self._calculate_totals()
+
+        columns = self._columns
+        if columns is None or len(columns) != len(self.line_items) - 1:
+            # line_items was changed directly; rebuild from scratch
+            self._calculate_totals()
+        else:
+            columns.append(item)
+            self._apply_totals(*columns.totals())
         return item
 
     def remove_line_item(self, item_id: str) -> bool:
         """Remove a line item by ID."""
-        original_count = len(self.line_items)
-        self.line_items = [item for item in self.line_items if item.id != item_id]
-        if len(self.line_items) < original_count:
+        for index, item in enumerate(self.line_items):
+            if item.id == item_id:
+                break
+        else:
+            return False
+
+        columns = self._columns
+        in_sync = columns is not None and len(columns) == len(self.line_items)
+        del self.line_items[index]
+        if in_sync:
+            columns.remove(index)
+            self._apply_totals(*columns.totals())
+        else:
             self._calculate_totals()
-            return True
-        return False
+        return True
 
-    def to_dict(self) -> dict[str, Any]:
-        """Convert to dictionary for storage/API."""
+    @classmethod
+    def serialize_batch(cls, invoices: list["InvoiceData"]) -> list[dict[str, Any]]:
+        """Convert many invoices to dictionaries against a single clock reading."""
+        now_ts = time.time()
+        return [invoice.to_dict(now_ts=now_ts) for invoice in invoices]
+
+    def to_dict(self, now_ts: Optional[float] = None) -> dict[str, Any]:
+        """
+        Convert to dictionary for storage/API.
+
+        Args:
+            now_ts: POSIX timestamp to compute overdue status against (defaults to now).
+        """
+        balance_due = self.balance_due
+        is_paid = balance_due <= Decimal("0")
+        days_overdue = self._days_overdue_at(time.time() if now_ts is None else now_ts, is_paid)
         return {
             "invoice_id": self.invoice_id,
             "invoice_number": self.invoice_number,
@@ -217,17 +424,25 @@ class InvoiceData(BaseModel):
             "discount": str(self.discount),
             "total": str(self.total) if self.total else None,
             "amount_paid": str(self.amount_paid),
-            "balance_due": str(self.balance_due),
-            "is_paid": self.is_paid,
-            "is_overdue": self.is_overdue,
-            "days_overdue": self.days_overdue,
-            "payment_terms": self.payment_terms.model_dump(),
+            "balance_due": str(balance_due),
+            "is_paid": is_paid,
+            "is_overdue": days_overdue is not None,
+            "days_overdue": days_overdue or 0,
+            "payment_terms": self.payment_terms.to_dict(),
             "notes": self.notes,
             "terms_and_conditions": self.terms_and_conditions,
             "extra_metadata": self.metadata,
         }
 
 
+# Layout for the plain-text fallback, built once instead of per invoice
+_SIMPLE_RULE = "=" * 60
+_SIMPLE_THIN_RULE = "-" * 60
+_SIMPLE_ITEMS_HEADER = "{:<30} {:>5} {:>10} {:>10}".format("Description", "Qty", "Price", "Total")
+_SIMPLE_ROW_FMT = "{:<30} {:>5} {}{:>9.2f} {}{:>9.2f}".format
+_SIMPLE_TOTAL_FMT = "{:>45} {}{:>9.2f}".format
+
+
 class InvoicePDFGenerator:
     """Generate PDF invoices."""
 
@@ -239,6 +454,75 @@ class InvoicePDFGenerator:
             company_logo_path: Optional path to company logo image.
         """
         self.company_logo_path = company_logo_path
+        self._rl = self._load_reportlab()
+        if self._rl is not None:
+            self._build_styles(self._rl)
+
+    @staticmethod
+    def _load_reportlab() -> Optional[SimpleNamespace]:
+        """Import reportlab once, returning the needed symbols or None if unavailable."""
+        try:
+            from reportlab.lib import colors
+            from reportlab.lib.pagesizes import letter
+            from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+            from reportlab.lib.units import inch
+            from reportlab.platypus import (
+                Paragraph,
+                SimpleDocTemplate,
+                Spacer,
+                Table,
+                TableStyle,
+            )
+        except ImportError:
+            logger.warning("reportlab not installed, using simple PDF format")
+            return None
+
+        return SimpleNamespace(
+            colors=colors,
+            letter=letter,
+            ParagraphStyle=ParagraphStyle,
+            getSampleStyleSheet=getSampleStyleSheet,
+            inch=inch,
+            Paragraph=Paragraph,
+            SimpleDocTemplate=SimpleDocTemplate,
+            Spacer=Spacer,
+            Table=Table,
+            TableStyle=TableStyle,
+        )
+
+    def _build_styles(self, rl: SimpleNamespace) -> None:
+        """Build the invariant paragraph and table styles shared by every generated PDF."""
+        colors = rl.colors
+        self._styles = rl.getSampleStyleSheet()
+        self._title_style = rl.ParagraphStyle(
+            "Title",
+            parent=self._styles["Title"],
+            fontSize=24,
+            spaceAfter=30,
+        )
+        self._details_table_style = rl.TableStyle([
+            ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+            ("ALIGN", (0, 0), (0, -1), "RIGHT"),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ])
+        self._address_table_style = rl.TableStyle([
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ])
+        self._items_table_style = rl.TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
+            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ])
+        self._totals_table_style = rl.TableStyle([
+            ("ALIGN", (0, 0), (0, -1), "RIGHT"),
+            ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+            ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+            ("LINEABOVE", (0, -1), (-1, -1), 1, colors.black),
+        ])
 
     def generate(self, invoice: InvoiceData) -> bytes:
         """
@@ -254,39 +538,25 @@ class InvoicePDFGenerator:
             Requires reportlab library for full PDF generation.
             Falls back to simple text-based PDF if not available.
         """
-        try:
-            return self._generate_with_reportlab(invoice)
-        except ImportError:
-            logger.warning("reportlab not installed, using simple PDF format")
+        if self._rl is None:
             return self._generate_simple(invoice)
+        return self._generate_with_reportlab(invoice)
 
     def _generate_with_reportlab(self, invoice: InvoiceData) -> bytes:
         """Generate PDF using reportlab library."""
-        from reportlab.lib import colors
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-        from reportlab.lib.units import inch
-        from reportlab.platypus import (
-            Paragraph,
-            SimpleDocTemplate,
-            Spacer,
-            Table,
-            TableStyle,
-        )
+        rl = self._rl
+        if rl is None:
+            raise ImportError("reportlab not installed. Run: pip install reportlab")
+        inch = rl.inch
+        Paragraph, Spacer, Table = rl.Paragraph, rl.Spacer, rl.Table
 
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
+        doc = rl.SimpleDocTemplate(buffer, pagesize=rl.letter)
+        styles = self._styles
         elements = []
 
         # Title
-        title_style = ParagraphStyle(
-            "Title",
-            parent=styles["Title"],
-            fontSize=24,
-            spaceAfter=30,
-        )
-        elements.append(Paragraph("INVOICE", title_style))
+        elements.append(Paragraph("INVOICE", self._title_style))
 
         # Invoice details
         details = [
@@ -298,11 +568,7 @@ class InvoicePDFGenerator:
             details.append(["PO Number:", invoice.purchase_order])
 
         details_table = Table(details, colWidths=[1.5 * inch, 3 * inch])
-        details_table.setStyle(TableStyle([
-            ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
-            ("ALIGN", (0, 0), (0, -1), "RIGHT"),
-            ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ]))
+        details_table.setStyle(self._details_table_style)
         elements.append(details_table)
         elements.append(Spacer(1, 20))
 
@@ -314,10 +580,7 @@ class InvoicePDFGenerator:
             address_data.append([from_addr, to_addr])
 
             address_table = Table(address_data, colWidths=[3 * inch, 3 * inch])
-            address_table.setStyle(TableStyle([
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-            ]))
+            address_table.setStyle(self._address_table_style)
             elements.append(address_table)
             elements.append(Spacer(1, 20))
 
@@ -336,14 +599,7 @@ class InvoicePDFGenerator:
             items_data,
             colWidths=[3 * inch, 0.75 * inch, 1 * inch, 0.75 * inch, 1 * inch],
         )
-        items_table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ("ALIGN", (1, 0), (-1, -1), "RIGHT"),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ]))
+        items_table.setStyle(self._items_table_style)
         elements.append(items_table)
         elements.append(Spacer(1, 20))
 
@@ -362,12 +618,7 @@ class InvoicePDFGenerator:
         totals_data.append(["Balance Due:", f"{invoice.currency_symbol}{invoice.balance_due:.2f}"])
 
         totals_table = Table(totals_data, colWidths=[5 * inch, 1.5 * inch])
-        totals_table.setStyle(TableStyle([
-            ("ALIGN", (0, 0), (0, -1), "RIGHT"),
-            ("ALIGN", (1, 0), (1, -1), "RIGHT"),
-            ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
-            ("LINEABOVE", (0, -1), (-1, -1), 1, colors.black),
-        ]))
+        totals_table.setStyle(self._totals_table_style)
         elements.append(totals_table)
         elements.append(Spacer(1, 30))
 
@@ -396,52 +647,45 @@ class InvoicePDFGenerator:
 
     def _generate_simple(self, invoice: InvoiceData) -> bytes:
         """Generate simple text-based representation when reportlab is not available."""
-        lines = []
-        lines.append("=" * 60)
-        lines.append("INVOICE")
-        lines.append("=" * 60)
-        lines.append("")
-        lines.append(f"Invoice Number: {invoice.invoice_number or invoice.invoice_id}")
-        lines.append(f"Issue Date: {invoice.issue_date.strftime('%B %d, %Y')}")
+        symbol = invoice.currency_symbol
+
+        header = [
+            _SIMPLE_RULE,
+            "INVOICE",
+            _SIMPLE_RULE,
+            "",
+            f"Invoice Number: {invoice.invoice_number or invoice.invoice_id}",
+            f"Issue Date: {invoice.issue_date.strftime('%B %d, %Y')}",
+        ]
         if invoice.due_date:
-            lines.append(f"Due Date: {invoice.due_date.strftime('%B %d, %Y')}")
-        lines.append("")
+            header.append(f"Due Date: {invoice.due_date.strftime('%B %d, %Y')}")
+        header.append("")
 
         if invoice.bill_to:
-            lines.append("Bill To:")
-            lines.append(invoice.bill_to.format_multiline())
-            lines.append("")
+            header += ["Bill To:", invoice.bill_to.format_multiline(), ""]
 
-        lines.append("-" * 60)
-        lines.append(f"{'Description':<30} {'Qty':>5} {'Price':>10} {'Total':>10}")
-        lines.append("-" * 60)
+        header += [_SIMPLE_THIN_RULE, _SIMPLE_ITEMS_HEADER, _SIMPLE_THIN_RULE]
 
-        for item in invoice.line_items:
-            lines.append(
-                f"{item.description:<30} {str(item.quantity):>5} "
-                f"{invoice.currency_symbol}{item.unit_price:>9.2f} "
-                f"{invoice.currency_symbol}{item.total:>9.2f}"
+        rows = [
+            _SIMPLE_ROW_FMT(
+                item.description, str(item.quantity), symbol, item.unit_price, symbol, item.total
             )
+            for item in invoice.line_items
+        ]
 
-        lines.append("-" * 60)
-
+        footer = [_SIMPLE_THIN_RULE]
         if invoice.subtotal:
-            lines.append(f"{'Subtotal:':>45} {invoice.currency_symbol}{invoice.subtotal:>9.2f}")
+            footer.append(_SIMPLE_TOTAL_FMT("Subtotal:", symbol, invoice.subtotal))
         if invoice.tax_total and invoice.tax_total > 0:
-            lines.append(f"{'Tax:':>45} {invoice.currency_symbol}{invoice.tax_total:>9.2f}")
+            footer.append(_SIMPLE_TOTAL_FMT("Tax:", symbol, invoice.tax_total))
         if invoice.total:
-            lines.append(f"{'Total:':>45} {invoice.currency_symbol}{invoice.total:>9.2f}")
-        lines.append(f"{'Balance Due:':>45} {invoice.currency_symbol}{invoice.balance_due:>9.2f}")
-
-        lines.append("")
-        lines.append("=" * 60)
+            footer.append(_SIMPLE_TOTAL_FMT("Total:", symbol, invoice.total))
+        footer += [_SIMPLE_TOTAL_FMT("Balance Due:", symbol, invoice.balance_due), "", _SIMPLE_RULE]
 
         if invoice.notes:
-            lines.append("")
-            lines.append("Notes:")
-            lines.append(invoice.notes)
+            footer += ["", "Notes:", invoice.notes]
 
-        return "\n".join(lines).encode("utf-8")
+        return "\n".join(chain(header, rows, footer)).encode("utf-8")
 
 
 def create_sample_invoice() -> InvoiceData:
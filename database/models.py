@@ -25,9 +25,16 @@ from sqlalchemy import (
     String,
     Text,
     JSON,
+    UniqueConstraint,
+    desc,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, relationship
 
+# Binary JSONB on PostgreSQL (parsed once on write), plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class Base(DeclarativeBase):
     """Base class for all models."""
@@ -59,8 +66,7 @@ class InvoiceModel(Base):
 
     __tablename__ = "invoices"
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    invoice_id = Column(String(50), unique=True, nullable=False, index=True)
+    invoice_id = Column(String(50), primary_key=True)
     customer_id = Column(String(36), ForeignKey("customers.id"), nullable=True)
 
     # Invoice details
@@ -79,20 +85,29 @@ class InvoiceModel(Base):
     closed_at = Column(DateTime, nullable=True)
 
     # Extra metadata (renamed from 'metadata' to avoid SQLAlchemy reserved name)
-    extra_metadata = Column(JSON, nullable=True)
+    extra_metadata = Column(JSONType, nullable=True)
 
-    # Relationships
-    customer = relationship("CustomerModel", back_populates="invoices")
+    # Relationships (must be eager-loaded explicitly; lazy loads raise)
+    customer = relationship("CustomerModel", back_populates="invoices", lazy="raise_on_sql")
     history = relationship(
         "InvoiceHistoryModel",
         back_populates="invoice",
         order_by="InvoiceHistoryModel.created_at",
+        lazy="raise_on_sql",
     )
 
     # Indexes
     __table_args__ = (
         Index("ix_invoices_state_created", "state", "created_at"),
         Index("ix_invoices_customer_state", "customer_id", "state"),
+        # Open invoices per customer, newest first (get_customer_invoices)
+        Index(
+            "ix_invoices_open_customer_created",
+            "customer_id",
+            desc("created_at"),
+            postgresql_where=text("is_terminal = false"),
+            sqlite_where=text("is_terminal = 0"),
+        ),
     )
 
     def __repr__(self) -> str:
@@ -122,6 +137,15 @@ class InvoiceHistoryModel(Base):
     # Relationships
     invoice = relationship("InvoiceModel", back_populates="history")
 
+    __table_args__ = (
+        # One row per transition; save_fsm inserts with ON CONFLICT DO NOTHING.
+        # created_at is part of the key so repeated transitions (approve ->
+        # dispute -> approve) are all kept.
+        UniqueConstraint(
+            "invoice_id", "trigger", "new_state", "created_at", name="uq_history_dedup"
+        ),
+    )
+
     def __repr__(self) -> str:
         return f"<History {self.invoice_id}: {self.previous_state} -> {self.new_state}>"
 
@@ -141,7 +165,7 @@ class AuditLogModel(Base):
     customer_id = Column(String(36), nullable=True, index=True)
 
     # Payload
-    details = Column(JSON, nullable=True)
+    details = Column(JSONType, nullable=True)
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -161,7 +185,7 @@ class ConversationModel(Base):
     __tablename__ = "conversations"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    customer_id = Column(String(36), ForeignKey("customers.id"), nullable=False, index=True)
+    customer_id = Column(String(36), ForeignKey("customers.id"), nullable=False)
     channel = Column(String(20), default="whatsapp", nullable=False)
 
     # Message
@@ -178,7 +202,7 @@ class ConversationModel(Base):
 
     # Indexes
     __table_args__ = (
-        Index("ix_conv_customer_created", "customer_id", "created_at"),
+        Index("ix_conv_customer_created_desc", "customer_id", desc("created_at")),
     )
 
     def __repr__(self) -> str:
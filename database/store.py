@@ -1,12 +1,22 @@
 """Database-backed invoice store implementation."""
 
 import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Optional
+from typing import Any, Generator, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, defer, joinedload, load_only
 
+from database.ids import gen_uuids
 from database.models import (
     AuditLogModel,
     ConversationModel,
@@ -14,11 +24,133 @@ from database.models import (
     InvoiceHistoryModel,
     InvoiceModel,
 )
-from database.session import get_session, session_scope
+from database.session import session_scope
 from state_machine.invoice_state import InvoiceFSM, InvoiceState
 
 logger = logging.getLogger(__name__)
 
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+_UPSERT_INSERTS = {
+    "postgresql": pg_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+
+def _conflict_insert(session: Session) -> Optional[Any]:
+    """Return the session dialect's ON CONFLICT-capable insert(), if any."""
+    return _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+
+
+# Hot lookups built once at import and executed with bound parameters, so
+# each call skips statement construction and hits the compiled cache
+_CUSTOMER_BY_PHONE = select(CustomerModel).where(CustomerModel.phone == bindparam("phone"))
+
+_CUSTOMER_INVOICES = (
+    select(
+        InvoiceModel.invoice_id,
+        InvoiceModel.amount,
+        InvoiceModel.currency,
+        InvoiceModel.state,
+        InvoiceModel.due_date,
+    )
+    .where(InvoiceModel.customer_id == bindparam("customer_id"))
+    .order_by(InvoiceModel.created_at.desc())
+)
+_CUSTOMER_OPEN_INVOICES = _CUSTOMER_INVOICES.where(InvoiceModel.is_terminal == False)
+
+_CONVERSATION_HISTORY = (
+    select(
+        ConversationModel.role,
+        ConversationModel.content,
+        ConversationModel.invoice_id,
+        ConversationModel.intent,
+        ConversationModel.created_at,
+    )
+    .where(ConversationModel.customer_id == bindparam("customer_id"))
+    .order_by(ConversationModel.created_at.desc())
+    .limit(bindparam("limit"))
+)
+
+# FSM state order used to report stats, built once
+_ALL_STATES = tuple(InvoiceState.all_states())
+
+# Rows per multi-row history INSERT (keeps SQLite under its bound-parameter limit)
+HISTORY_INSERT_BATCH_SIZE = 1000
+
+# Columns of uq_history_dedup: one row per recorded transition
+_HISTORY_DEDUP_KEY = ["invoice_id", "trigger", "new_state", "created_at"]
+
+# Per-engine result of the uq_history_dedup lookup. create_all() never adds
+# constraints to existing tables, so databases created before it was
+# introduced have no conflict target and use check-then-insert instead.
+_history_dedup_engines: "weakref.WeakKeyDictionary[Engine, bool]" = weakref.WeakKeyDictionary()
+
+
+def _has_history_dedup(session: Session) -> bool:
+    """Return whether the session's invoice_history table has uq_history_dedup."""
+    engine = session.get_bind().engine
+    found = _history_dedup_engines.get(engine)
+    if found is None:
+        constraints = inspect(session.connection()).get_unique_constraints(
+            InvoiceHistoryModel.__tablename__
+        )
+        found = any(
+            sorted(constraint["column_names"]) == sorted(_HISTORY_DEDUP_KEY)
+            for constraint in constraints
+        )
+        if not found:
+            logger.warning(
+                f"{InvoiceHistoryModel.__tablename__} has no uq_history_dedup constraint; "
+                f"falling back to check-then-insert for history (recreate the table "
+                f"or add the constraint to enable ON CONFLICT inserts)"
+            )
+        _history_dedup_engines[engine] = found
+    return found
+
+
+class _TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed TTL.
+
+    Used for short-lived read caching of hot invoice lookups; writers
+    invalidate entries explicitly with pop().
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        """Drop key from the cache if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
 
 class DatabaseInvoiceStore:
     """
@@ -27,21 +159,50 @@ class DatabaseInvoiceStore:
     Implements the InvoiceStore protocol for persistent storage.
     """
 
-    def __init__(self, session: Optional[Session] = None):
+    def __init__(
+        self,
+        session: Optional[Session] = None,
+        cache_size: int = 10000,
+        cache_ttl: float = 5.0,
+    ):
         """
         Initialize the database store.
 
         Args:
-            session: Optional SQLAlchemy session. If not provided,
-                    creates new sessions for each operation.
+            session: Optional SQLAlchemy session. If provided, every
+                    operation runs in it and the caller owns the commit
+                    (one transaction per request). If not provided,
+                    creates and commits a new session for each operation.
+            cache_size: Maximum invoices kept in the read cache (0 disables it).
+                    Caching is always off with a caller-owned session, whose
+                    writes may still be rolled back.
+            cache_ttl: Seconds a cached invoice read stays valid.
         """
         self._session = session
+        if session is not None:
+            cache_size = 0
+        self._invoice_cache = _TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._fsm_cache = _TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    def _invalidate(self, invoice_id: str) -> None:
+        """Drop cached reads for an invoice after a committed write."""
+        self._invoice_cache.pop(invoice_id)
+        self._fsm_cache.pop(invoice_id)
+
+    @contextmanager
+    def _scope(self) -> Generator[Session, None, None]:
+        """
+        Session for a single store operation.
 
-    def _get_session(self) -> Session:
-        """Get or create a session."""
-        if self._session:
-            return self._session
-        return get_session()
+        Uses the caller's session when one was given (flushing, not
+        committing), otherwise a self-committing session_scope.
+        """
+        if self._session is not None:
+            yield self._session
+            self._session.flush()
+            return
+        with session_scope() as session:
+            yield session
 
     def get_fsm(self, invoice_id: str) -> Optional[InvoiceFSM]:
         """
@@ -53,44 +214,45 @@ class DatabaseInvoiceStore:
         Returns:
             InvoiceFSM instance or None if not found.
         """
-        with session_scope() as session:
-            invoice = (
-                session.query(InvoiceModel)
-                .filter(InvoiceModel.invoice_id == invoice_id)
-                .first()
-            )
-
-            if not invoice:
-                return None
+        snapshot = self._fsm_cache.get(invoice_id)
+        if snapshot is None:
+            with self._scope() as session:
+                # Load the invoice and its history (ordered by the relationship) in one query
+                invoice = session.get(
+                    InvoiceModel,
+                    invoice_id,
+                    options=[joinedload(InvoiceModel.history)],
+                    # A shared session may already hold the row without its history
+                    populate_existing=self._session is not None,
+                )
 
-            # Restore FSM from database state
-            fsm = InvoiceFSM(
-                invoice_id=invoice.invoice_id,
-                initial_state=invoice.state,
-            )
+                if not invoice:
+                    return None
+
+                snapshot = (
+                    invoice.state,
+                    [
+                        {
+                            "timestamp": record.created_at.isoformat(),
+                            "source": record.previous_state,
+                            "dest": record.new_state,
+                            "trigger": record.trigger,
+                            "triggered_by": record.triggered_by,
+                            "reason": record.reason,
+                        }
+                        for record in invoice.history
+                    ],
+                )
+            self._fsm_cache.put(invoice_id, snapshot)
 
-            # Restore history from database
-            history_records = (
-                session.query(InvoiceHistoryModel)
-                .filter(InvoiceHistoryModel.invoice_id == invoice_id)
-                .order_by(InvoiceHistoryModel.created_at)
-                .all()
-            )
+        state, history = snapshot
 
-            # Replace FSM history with database history
-            fsm._history = [
-                {
-                    "timestamp": record.created_at.isoformat(),
-                    "source": record.previous_state,
-                    "dest": record.new_state,
-                    "trigger": record.trigger,
-                    "triggered_by": record.triggered_by,
-                    "reason": record.reason,
-                }
-                for record in history_records
-            ]
+        # Restore FSM from database state, with a private copy of the history
+        fsm = InvoiceFSM(invoice_id=invoice_id, initial_state=state)
+        fsm._history = [dict(entry) for entry in history]
+        fsm._last_persisted_history_idx = len(history) - 1
 
-            return fsm
+        return fsm
 
     def save_fsm(self, fsm: InvoiceFSM) -> None:
         """
@@ -99,12 +261,12 @@ class DatabaseInvoiceStore:
         Args:
             fsm: The InvoiceFSM instance to save.
         """
-        with session_scope() as session:
-            # Get or create invoice record
-            invoice = (
-                session.query(InvoiceModel)
-                .filter(InvoiceModel.invoice_id == fsm.invoice_id)
-                .first()
+        with self._scope() as session:
+            # Get or create invoice record (only the columns about to be overwritten)
+            invoice = session.get(
+                InvoiceModel,
+                fsm.invoice_id,
+                options=[load_only(InvoiceModel.state, InvoiceModel.is_terminal)],
             )
 
             if invoice:
@@ -123,32 +285,67 @@ class DatabaseInvoiceStore:
                 )
                 session.add(invoice)
 
-            # Save latest history entry if exists
-            if fsm._history:
-                latest = fsm._history[-1]
-                # Check if this history entry already exists
+            # Save every history entry recorded since the last save
+            history_end = len(fsm._history)
+            pending = fsm._history[fsm._last_persisted_history_idx + 1 : history_end]
+            if pending:
+                self._insert_history(
+                    session,
+                    [
+                        {
+                            "invoice_id": fsm.invoice_id,
+                            "previous_state": entry.get("source"),
+                            "new_state": entry["dest"],
+                            "trigger": entry["trigger"],
+                            "triggered_by": entry.get("triggered_by"),
+                            "reason": entry.get("reason"),
+                            "created_at": datetime.fromisoformat(entry["timestamp"]),
+                        }
+                        for entry in pending
+                    ],
+                )
+
+        # Only advance the pointer once the transaction has committed
+        fsm._last_persisted_history_idx = history_end - 1
+        self._invalidate(fsm.invoice_id)
+        logger.debug(f"Saved invoice {fsm.invoice_id} with state {fsm.current_state}")
+
+    @staticmethod
+    def _insert_history(session: Session, rows: list[dict[str, Any]]) -> None:
+        """
+        Insert history rows, skipping transitions that are already recorded.
+
+        Uses multi-row INSERT ... ON CONFLICT DO NOTHING against
+        uq_history_dedup, so a batch of transitions costs one round-trip
+        per HISTORY_INSERT_BATCH_SIZE rows and no duplicate-check SELECTs.
+        """
+        insert = _conflict_insert(session)
+
+        if insert is None or not _has_history_dedup(session):
+            # Fall back to check-then-insert on dialects without ON CONFLICT,
+            # or tables created before uq_history_dedup existed
+            for values in rows:
                 existing = (
-                    session.query(InvoiceHistoryModel)
-                    .filter(
-                        InvoiceHistoryModel.invoice_id == fsm.invoice_id,
-                        InvoiceHistoryModel.trigger == latest["trigger"],
-                        InvoiceHistoryModel.new_state == latest["dest"],
+                    session.query(InvoiceHistoryModel.id)
+                    .filter_by(
+                        invoice_id=values["invoice_id"],
+                        trigger=values["trigger"],
+                        new_state=values["new_state"],
+                        created_at=values["created_at"],
                     )
                     .first()
                 )
-
                 if not existing:
-                    history = InvoiceHistoryModel(
-                        invoice_id=fsm.invoice_id,
-                        previous_state=latest.get("source"),
-                        new_state=latest["dest"],
-                        trigger=latest["trigger"],
-                        triggered_by=latest.get("triggered_by"),
-                        reason=latest.get("reason"),
-                    )
-                    session.add(history)
-
-            logger.debug(f"Saved invoice {fsm.invoice_id} with state {fsm.current_state}")
+                    session.add(InvoiceHistoryModel(**values))
+            return
+
+        for start in range(0, len(rows), HISTORY_INSERT_BATCH_SIZE):
+            stmt = (
+                insert(InvoiceHistoryModel)
+                .values(rows[start : start + HISTORY_INSERT_BATCH_SIZE])
+                .on_conflict_do_nothing(index_elements=_HISTORY_DEDUP_KEY)
+            )
+            session.execute(stmt)
 
     def create_invoice(
         self,
@@ -175,29 +372,35 @@ class DatabaseInvoiceStore:
         Returns:
             New InvoiceFSM instance.
         """
-        with session_scope() as session:
-            # Check if invoice already exists
-            existing = (
-                session.query(InvoiceModel)
-                .filter(InvoiceModel.invoice_id == invoice_id)
-                .first()
-            )
-            if existing:
-                raise ValueError(f"Invoice {invoice_id} already exists")
-
-            # Create invoice record
-            invoice = InvoiceModel(
-                invoice_id=invoice_id,
-                customer_id=customer_id,
-                amount=amount,
-                currency=currency,
-                description=description,
-                due_date=due_date,
-                state=InvoiceState.NEW,
-                is_terminal=False,
-                metadata=metadata,
-            )
-            session.add(invoice)
+        fields = {
+            "invoice_id": invoice_id,
+            "customer_id": customer_id,
+            "amount": amount,
+            "currency": currency,
+            "description": description,
+            "due_date": due_date,
+            "state": InvoiceState.NEW,
+            "is_terminal": False,
+            "extra_metadata": metadata,
+        }
+
+        with self._scope() as session:
+            insert = _conflict_insert(session)
+
+            if insert is None:
+                # Check-then-insert on dialects without ON CONFLICT
+                if session.get(InvoiceModel, invoice_id):
+                    raise ValueError(f"Invoice {invoice_id} already exists")
+                session.add(InvoiceModel(**fields))
+            else:
+                # Atomic create: a concurrent or existing row inserts nothing
+                result = session.execute(
+                    insert(InvoiceModel)
+                    .values(**fields)
+                    .on_conflict_do_nothing(index_elements=["invoice_id"])
+                )
+                if result.rowcount == 0:
+                    raise ValueError(f"Invoice {invoice_id} already exists")
 
             # Create initial history
             history = InvoiceHistoryModel(
@@ -209,6 +412,8 @@ class DatabaseInvoiceStore:
             )
             session.add(history)
 
+        self._invalidate(invoice_id)
+
         # Return FSM
         return InvoiceFSM(invoice_id=invoice_id)
 
@@ -218,6 +423,7 @@ class DatabaseInvoiceStore:
         customer_id: Optional[str] = None,
         limit: int = 100,
         offset: int = 0,
+        due_before: Optional[datetime] = None,
     ) -> list[dict[str, Any]]:
         """
         List invoices with optional filtering.
@@ -225,39 +431,53 @@ class DatabaseInvoiceStore:
         Args:
             state: Filter by state.
             customer_id: Filter by customer.
+            due_before: Only invoices with a due date before this time.
             limit: Maximum results.
             offset: Skip first N results.
 
         Returns:
             List of invoice dictionaries.
         """
-        with session_scope() as session:
-            query = session.query(InvoiceModel)
-
-            if state:
-                query = query.filter(InvoiceModel.state == state)
-            if customer_id:
-                query = query.filter(InvoiceModel.customer_id == customer_id)
-
-            query = query.order_by(InvoiceModel.created_at.desc())
-            query = query.limit(limit).offset(offset)
-
-            invoices = query.all()
+        # Select only the listed columns; rows are streamed without ORM objects
+        stmt = select(
+            InvoiceModel.invoice_id,
+            InvoiceModel.customer_id,
+            InvoiceModel.amount,
+            InvoiceModel.currency,
+            InvoiceModel.description,
+            InvoiceModel.due_date,
+            InvoiceModel.state,
+            InvoiceModel.is_terminal,
+            InvoiceModel.created_at,
+            InvoiceModel.updated_at,
+        )
+
+        if state:
+            stmt = stmt.where(InvoiceModel.state == state)
+        if customer_id:
+            stmt = stmt.where(InvoiceModel.customer_id == customer_id)
+        if due_before is not None:
+            stmt = stmt.where(InvoiceModel.due_date < due_before)
+
+        stmt = stmt.order_by(InvoiceModel.created_at.desc()).limit(limit).offset(offset)
+
+        with self._scope() as session:
+            rows = session.execute(stmt.execution_options(yield_per=500)).mappings()
 
             return [
                 {
-                    "invoice_id": inv.invoice_id,
-                    "customer_id": inv.customer_id,
-                    "amount": str(inv.amount) if inv.amount else None,
-                    "currency": inv.currency,
-                    "description": inv.description,
-                    "due_date": inv.due_date.isoformat() if inv.due_date else None,
-                    "state": inv.state,
-                    "is_terminal": inv.is_terminal,
-                    "created_at": inv.created_at.isoformat(),
-                    "updated_at": inv.updated_at.isoformat(),
+                    "invoice_id": row["invoice_id"],
+                    "customer_id": row["customer_id"],
+                    "amount": str(row["amount"]) if row["amount"] else None,
+                    "currency": row["currency"],
+                    "description": row["description"],
+                    "due_date": row["due_date"].isoformat() if row["due_date"] else None,
+                    "state": row["state"],
+                    "is_terminal": row["is_terminal"],
+                    "created_at": row["created_at"].isoformat(),
+                    "updated_at": row["updated_at"].isoformat(),
                 }
-                for inv in invoices
+                for row in rows
             ]
 
     def get_invoice(self, invoice_id: str) -> Optional[dict[str, Any]]:
@@ -270,12 +490,23 @@ class DatabaseInvoiceStore:
         Returns:
             Invoice dictionary or None.
         """
-        with session_scope() as session:
-            invoice = (
-                session.query(InvoiceModel)
-                .filter(InvoiceModel.invoice_id == invoice_id)
-                .first()
-            )
+        cached = self._invoice_cache.get(invoice_id)
+        if cached is None:
+            cached = self._load_invoice(invoice_id)
+            if cached is None:
+                return None
+            self._invoice_cache.put(invoice_id, cached)
+
+        # Hand out copies so callers cannot mutate the cached entry
+        invoice = dict(cached)
+        if invoice["metadata"] is not None:
+            invoice["metadata"] = dict(invoice["metadata"])
+        return invoice
+
+    def _load_invoice(self, invoice_id: str) -> Optional[dict[str, Any]]:
+        """Read an invoice row from the database as a dictionary."""
+        with self._scope() as session:
+            invoice = session.get(InvoiceModel, invoice_id)
 
             if not invoice:
                 return None
@@ -316,12 +547,11 @@ class DatabaseInvoiceStore:
         Returns:
             True if updated, False if not found.
         """
-        with session_scope() as session:
-            invoice = (
-                session.query(InvoiceModel)
-                .filter(InvoiceModel.invoice_id == invoice_id)
-                .first()
-            )
+        # Skip fetching and decoding the JSON metadata unless it is being merged
+        options = [] if metadata is not None else [defer(InvoiceModel.extra_metadata)]
+
+        with self._scope() as session:
+            invoice = session.get(InvoiceModel, invoice_id, options=options)
 
             if not invoice:
                 return False
@@ -338,7 +568,8 @@ class DatabaseInvoiceStore:
                 else:
                     invoice.extra_metadata = metadata
 
-            return True
+        self._invalidate(invoice_id)
+        return True
 
     # Customer operations
 
@@ -359,21 +590,28 @@ class DatabaseInvoiceStore:
         Returns:
             Customer dictionary.
         """
-        with session_scope() as session:
-            customer = (
-                session.query(CustomerModel)
-                .filter(CustomerModel.phone == phone)
-                .first()
-            )
+        with self._scope() as session:
+            params = {"phone": phone}
+            customer = session.execute(_CUSTOMER_BY_PHONE, params).scalar_one_or_none()
 
             if not customer:
-                customer = CustomerModel(
-                    phone=phone,
-                    name=name,
-                    email=email,
-                )
-                session.add(customer)
-                session.flush()
+                insert = _conflict_insert(session)
+                if insert is None:
+                    customer = CustomerModel(
+                        phone=phone,
+                        name=name,
+                        email=email,
+                    )
+                    session.add(customer)
+                    session.flush()
+                else:
+                    # Losing a race with a concurrent insert is not an error
+                    session.execute(
+                        insert(CustomerModel)
+                        .values(phone=phone, name=name, email=email)
+                        .on_conflict_do_nothing(index_elements=["phone"])
+                    )
+                    customer = session.execute(_CUSTOMER_BY_PHONE, params).scalar_one()
 
             return {
                 "id": customer.id,
@@ -398,26 +636,22 @@ class DatabaseInvoiceStore:
         Returns:
             List of invoice dictionaries.
         """
-        with session_scope() as session:
-            query = session.query(InvoiceModel).filter(
-                InvoiceModel.customer_id == customer_id
-            )
-
-            if not include_closed:
-                query = query.filter(InvoiceModel.is_terminal == False)
-
-            query = query.order_by(InvoiceModel.created_at.desc())
-
-            return [
-                {
-                    "invoice_id": inv.invoice_id,
-                    "amount": str(inv.amount) if inv.amount else None,
-                    "currency": inv.currency,
-                    "state": inv.state,
-                    "due_date": inv.due_date.isoformat() if inv.due_date else None,
-                }
-                for inv in query.all()
-            ]
+        # Project only the returned columns; description and extra_metadata are never read
+        stmt = _CUSTOMER_INVOICES if include_closed else _CUSTOMER_OPEN_INVOICES
+
+        with self._scope() as session:
+            rows = session.execute(stmt, {"customer_id": customer_id}).all()
+
+        return [
+            {
+                "invoice_id": invoice_id,
+                "amount": str(amount) if amount else None,
+                "currency": currency,
+                "state": state,
+                "due_date": due_date.isoformat() if due_date else None,
+            }
+            for invoice_id, amount, currency, state, due_date in rows
+        ]
 
     # Conversation operations
 
@@ -443,17 +677,32 @@ class DatabaseInvoiceStore:
             intent: Detected intent.
             channel: Communication channel.
         """
-        with session_scope() as session:
-            conversation = ConversationModel(
-                customer_id=customer_id,
-                channel=channel,
-                role=role,
-                content=content,
-                message_id=message_id,
-                invoice_id=invoice_id,
-                intent=intent,
-            )
-            session.add(conversation)
+        self.save_conversations_bulk([{
+            "customer_id": customer_id,
+            "channel": channel,
+            "role": role,
+            "content": content,
+            "message_id": message_id,
+            "invoice_id": invoice_id,
+            "intent": intent,
+        }])
+
+    def save_conversations_bulk(self, records: list[dict[str, Any]]) -> None:
+        """
+        Save many conversation messages in one transaction.
+
+        Rows are inserted as plain mappings (no ORM objects), which is much
+        faster than one session and commit per message.
+
+        Args:
+            records: Dicts keyed by ConversationModel column name
+                (customer_id, role, content, and optionally channel,
+                message_id, invoice_id, intent).
+        """
+        if not records:
+            return
+        with self._scope() as session:
+            session.bulk_insert_mappings(ConversationModel, records)
 
     def get_conversation_history(
         self,
@@ -470,26 +719,23 @@ class DatabaseInvoiceStore:
         Returns:
             List of conversation messages.
         """
-        with session_scope() as session:
-            messages = (
-                session.query(ConversationModel)
-                .filter(ConversationModel.customer_id == customer_id)
-                .order_by(ConversationModel.created_at.desc())
-                .limit(limit)
-                .all()
-            )
-
-            # Return in chronological order
-            return [
-                {
-                    "role": msg.role,
-                    "content": msg.content,
-                    "invoice_id": msg.invoice_id,
-                    "intent": msg.intent,
-                    "created_at": msg.created_at.isoformat(),
-                }
-                for msg in reversed(messages)
-            ]
+        with self._scope() as session:
+            # Project only the returned columns; rows come back as plain tuples
+            rows = session.execute(
+                _CONVERSATION_HISTORY, {"customer_id": customer_id, "limit": limit}
+            ).all()
+
+        # Return in chronological order
+        return [
+            {
+                "role": role,
+                "content": content,
+                "invoice_id": invoice_id,
+                "intent": intent,
+                "created_at": created_at.isoformat(),
+            }
+            for role, content, invoice_id, intent, created_at in reversed(rows)
+        ]
 
     # Audit operations
 
@@ -511,15 +757,36 @@ class DatabaseInvoiceStore:
             session_id: Session identifier.
             details: Additional details.
         """
-        with session_scope() as session:
-            audit = AuditLogModel(
-                action=action,
-                invoice_id=invoice_id,
-                customer_id=customer_id,
-                session_id=session_id,
-                details=details,
-            )
-            session.add(audit)
+        self.log_audits_bulk([{
+            "action": action,
+            "invoice_id": invoice_id,
+            "customer_id": customer_id,
+            "session_id": session_id,
+            "details": details,
+        }])
+
+    def log_audits_bulk(self, records: list[dict[str, Any]]) -> None:
+        """
+        Log many audit entries in one transaction.
+
+        Args:
+            records: Dicts keyed by AuditLogModel column name
+                (action, and optionally invoice_id, customer_id,
+                session_id, details).
+        """
+        if not records:
+            return
+
+        # Fill defaults once per batch instead of per-row uuid4()/utcnow() calls
+        now = datetime.utcnow()
+        entry_ids = gen_uuids(len(records))
+        rows = [
+            {"entry_id": entry_id, "created_at": now, **record}
+            for entry_id, record in zip(entry_ids, records)
+        ]
+
+        with self._scope() as session:
+            session.bulk_insert_mappings(AuditLogModel, rows)
 
     def get_audit_log(
         self,
@@ -538,7 +805,7 @@ class DatabaseInvoiceStore:
         Returns:
             List of audit entries.
         """
-        with session_scope() as session:
+        with self._scope() as session:
             query = session.query(AuditLogModel)
 
             if invoice_id:
@@ -569,28 +836,28 @@ class DatabaseInvoiceStore:
         Returns:
             Statistics dictionary.
         """
-        with session_scope() as session:
-            total = session.query(InvoiceModel).count()
-            by_state = {}
-
-            for state in InvoiceState.all_states():
-                count = (
-                    session.query(InvoiceModel)
-                    .filter(InvoiceModel.state == state)
-                    .count()
-                )
-                if count > 0:
-                    by_state[state] = count
-
-            open_count = (
-                session.query(InvoiceModel)
-                .filter(InvoiceModel.is_terminal == False)
-                .count()
+        with self._scope() as session:
+            # One GROUP BY instead of a COUNT per state
+            rows = (
+                session.query(InvoiceModel.state, InvoiceModel.is_terminal, func.count())
+                .group_by(InvoiceModel.state, InvoiceModel.is_terminal)
+                .all()
             )
 
-            return {
-                "total_invoices": total,
-                "open_invoices": open_count,
-                "closed_invoices": total - open_count,
-                "by_state": by_state,
-            }
+        counts: dict[str, int] = {}
+        total = open_count = 0
+        for state, is_terminal, count in rows:
+            counts[state] = counts.get(state, 0) + count
+            total += count
+            if not is_terminal:
+                open_count += count
+
+        # Keep the FSM's state order; unknown states are not reported
+        by_state = {state: counts[state] for state in _ALL_STATES if state in counts}
+
+        return {
+            "total_invoices": total,
+            "open_invoices": open_count,
+            "closed_invoices": total - open_count,
+            "by_state": by_state,
+        }
@@ -1,6 +1,7 @@
 """LLM Router module for intent classification and tool routing."""
 
 from llm_router.router import LLMRouter, LLMProvider, StubLLMProvider
+from llm_router.semantic_cache import SemanticCache
 from llm_router.schemas import (
     RouterDecision,
     RouterIntent,
@@ -27,6 +28,7 @@ __all__ = [
     "LLMRouter",
     "LLMProvider",
     "StubLLMProvider",
+    "SemanticCache",
     # Providers
     "ClaudeLLMProvider",
     "MockLLMProvider",
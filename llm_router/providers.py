@@ -5,14 +5,31 @@ This module contains provider implementations that can be injected into LLMRoute
 All providers implement the LLMProvider protocol.
 """
 
+import asyncio
+import functools
+import hashlib
 import json
 import logging
 import os
+import random
+import threading
 import time
-from typing import Any, Optional
+from collections import OrderedDict
+from collections.abc import Iterator
+from typing import Any, Callable, Optional
 
 from dotenv import load_dotenv
 
+try:
+    from blake3 import blake3
+except ImportError:  # blake3 is optional (pip install whatsapp-agent[fast-hash])
+    blake3 = None
+
+try:
+    import anthropic
+except ImportError:  # reported when a client is first needed
+    anthropic = None
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -25,6 +42,25 @@ from llm_router.schemas import (
 
 logger = logging.getLogger(__name__)
 
+# SDK errors translated into LLMError, bound once for the request paths
+_SDK_ERRORS: tuple[type[Exception], ...] = (
+    (anthropic.APIConnectionError, anthropic.APIStatusError) if anthropic else ()
+)
+
+# Content block type of a text response; matched exactly on the hot path
+_TEXT_BLOCK: Optional[type] = anthropic.types.TextBlock if anthropic else None
+
+
+def _prompt_digest(*parts: str) -> bytes:
+    """16-byte digest of prompt parts (stable across runs, unlike hash())."""
+    # Parts are hashed incrementally (no joined copy of long prompts) and
+    # NUL-separated so different splits cannot collide
+    hasher = blake3() if blake3 is not None else hashlib.blake2b(digest_size=16)
+    for part in parts:
+        hasher.update(part.encode())
+        hasher.update(b"\0")
+    return hasher.digest()[:16]
+
 
 # ============================================================================
 # Error Types
@@ -64,6 +100,12 @@ class LLMResponseError(LLMError):
         super().__init__(message, provider, retryable=False)
 
 
+# Errors whose fields (timeout_seconds, retry_after) say all there is to say;
+# they are raised without the SDK exception chained, so a rate-limit storm
+# does not log an httpx traceback per failed call
+_SELF_DESCRIBING_ERRORS = (LLMTimeoutError, LLMRateLimitError)
+
+
 # ============================================================================
 # Claude Provider
 # ============================================================================
@@ -77,14 +119,39 @@ class ClaudeLLMProvider:
     - Loads API key from ANTHROPIC_API_KEY environment variable
     - Temperature = 0 for deterministic output
     - Timeout protection
-    - Retry with exponential backoff (max 2 retries)
+    - Retry with jittered exponential backoff (max 2 retries), honouring retry-after
+    - Shared rate-limit cooldown so no request is sent while a 429 is in effect
+    - Backoff and cooldown waits interrupted by shutdown()
+    - Bounded in-flight requests per provider (max_concurrency)
+    - Amazon Bedrock backend, with latency-optimized inference
     - Structured JSON output enforcement
+    - Prompt caching of the static system prompt
+    - Exact-match LRU cache of responses (output is deterministic at temperature 0)
     """
 
+    # Callers may pass a stable `system` prompt to be cached across calls
+    supports_prompt_caching = True
+
     DEFAULT_MODEL = "claude-sonnet-4-20250514"
+    # Sonnet 4 is only invocable on demand through a cross-region inference profile
+    DEFAULT_BEDROCK_MODEL = "us.anthropic.claude-sonnet-4-20250514-v1:0"
     DEFAULT_TIMEOUT = 30.0  # seconds
     DEFAULT_MAX_RETRIES = 2
     DEFAULT_MAX_TOKENS = 1024
+    DEFAULT_RESPONSE_CACHE_SIZE = 1024
+    DEFAULT_MAX_CONCURRENCY = 8
+    BATCH_MAX_POLL_INTERVAL = 60.0  # seconds
+    MAX_BACKOFF = 30.0  # seconds
+    DEFAULT_RATE_LIMIT_COOLDOWN = 1.0  # seconds, when a 429 has no retry-after
+
+    # Bedrock InvokeModel takes the performance config as a request header
+    BEDROCK_LATENCY_HEADER = "X-Amzn-Bedrock-PerformanceConfig-Latency"
+
+    # Process-wide rate-limit gate shared by all instances: after a 429,
+    # requests wait out the cooldown instead of paying a round-trip to be rejected.
+    # Waiters block on the condition, so shutdown() can wake them all at once.
+    _cooldown_until: float = 0.0
+    _cooldown_cond = threading.Condition()
 
     def __init__(
         self,
@@ -93,56 +160,178 @@ class ClaudeLLMProvider:
         timeout: float = DEFAULT_TIMEOUT,
         max_retries: int = DEFAULT_MAX_RETRIES,
         max_tokens: int = DEFAULT_MAX_TOKENS,
+        cache_ttl: Optional[str] = None,
+        response_cache_size: int = DEFAULT_RESPONSE_CACHE_SIZE,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        bedrock: Optional[bool] = None,
+        latency_optimized: bool = False,
     ):
         """
         Initialize the Claude provider.
 
         Args:
             api_key: Anthropic API key. If not provided, reads from ANTHROPIC_API_KEY env var.
-            model: Model to use. Defaults to claude-sonnet-4-20250514.
+            model: Model to use. Defaults to claude-sonnet-4-20250514, or its
+                Bedrock inference profile (us.anthropic.claude-sonnet-4-20250514-v1:0)
+                when calling through Bedrock.
             timeout: Request timeout in seconds.
             max_retries: Maximum number of retries on transient failures.
             max_tokens: Maximum tokens in response.
+            cache_ttl: Prompt cache lifetime ("5m" or "1h"). Defaults to the API default (5m).
+            response_cache_size: Identical prompts answered from memory (0 disables).
+            max_concurrency: Maximum requests in flight at once (sync and async
+                counted separately). Size it to roughly requests-per-minute
+                budget / 60 * average latency in seconds: too low queues
+                callers, too high trips 429s and their backoff waits.
+            bedrock: Call Claude through Amazon Bedrock (AWS credentials, Bedrock
+                model IDs). Defaults to on when ANTHROPIC_BEDROCK_BASE_URL is set.
+            latency_optimized: Request Bedrock latency-optimized inference (only
+                offered for some models and regions). Ignored for the Anthropic API.
 
         Raises:
-            ValueError: If no API key is available.
+            ValueError: If no API key is available (Anthropic API only).
         """
+        if bedrock is None:
+            bedrock = bool(os.environ.get("ANTHROPIC_BEDROCK_BASE_URL"))
+        self.bedrock = bedrock
+        self.latency_optimized = latency_optimized
+
         self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
-        if not self.api_key:
+        if not self.api_key and not self.bedrock:
             raise ValueError(
                 "ANTHROPIC_API_KEY environment variable not set and no api_key provided"
             )
 
-        self.model = model or self.DEFAULT_MODEL
+        self.model = model or (self.DEFAULT_BEDROCK_MODEL if bedrock else self.DEFAULT_MODEL)
         self.timeout = timeout
         self.max_retries = max_retries
         self.max_tokens = max_tokens
+        self.cache_ttl = cache_ttl
+        self.response_cache_size = response_cache_size
+        self._response_cache: OrderedDict[bytes, str] = OrderedDict()
+        # The provider is shared across threads (e.g. asyncio.to_thread callers)
+        self._response_cache_lock = threading.Lock()
+        self.max_concurrency = max_concurrency
+        self._sync_slots = threading.BoundedSemaphore(max_concurrency)
+
+        # Set by shutdown(); interrupts backoff, cooldown and batch-poll waits
+        self._shutdown = threading.Event()
 
         # Lazy import to avoid dependency issues in tests
         self._client: Optional[Any] = None
 
+        # Async state belongs to one event loop (the provider is a shared
+        # singleton that may outlive a loop); see _bind_loop()
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._async_shutdown: Optional[asyncio.Event] = None
+        self._async_client: Optional[Any] = None
+
     @property
     def client(self) -> Any:
-        """Lazy-load the Anthropic client."""
+        """
+        Lazy-load the Anthropic client.
+
+        Providers with the same credentials and timeout share one client
+        (and its connection pool).
+        """
         if self._client is None:
+            self._client = _client_for(
+                None if self.bedrock else self.api_key,
+                self.timeout,
+                self.bedrock,
+            )
+        return self._client
+
+    @property
+    def async_client(self) -> Any:
+        """
+        Lazy-load the shared async Anthropic client.
+
+        One pooled client is reused for every acomplete() call on the same
+        event loop, so connections (HTTP/2 when the h2 package is installed)
+        stay warm.
+        """
+        if self._async_client is None:
+            if anthropic is None:
+                raise ImportError(
+                    "anthropic package not installed. Run: pip install anthropic"
+                )
             try:
-                import anthropic
-                self._client = anthropic.Anthropic(
-                    api_key=self.api_key,
+                import h2  # noqa: F401
+                http2 = True
+            except ImportError:
+                http2 = False
+
+            import httpx
+            http_client = anthropic.DefaultAsyncHttpxClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=32,
+                    keepalive_expiry=60,
+                ),
+            )
+            if self.bedrock:
+                self._async_client = anthropic.AsyncAnthropicBedrock(
                     timeout=self.timeout,
+                    http_client=http_client,
                 )
-            except ImportError:
-                raise ImportError(
-                    "anthropic package not installed. Run: pip install anthropic"
+            else:
+                self._async_client = anthropic.AsyncAnthropic(
+                    api_key=self.api_key,
+                    timeout=self.timeout,
+                    http_client=http_client,
                 )
-        return self._client
+        return self._async_client
 
-    def complete(self, prompt: str) -> str:
+    def _bind_loop(self) -> None:
+        """
+        Tie the async semaphore, shutdown event and client to the running loop.
+
+        They are recreated when acomplete() runs on a different loop than
+        before (a second asyncio.run, a restarted server): asyncio
+        primitives and the client's connection pool cannot be used from
+        another loop.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is self._async_loop:
+            return
+        if self._async_loop is not None:
+            # The old client's pool belongs to the old (possibly closed) loop
+            self._async_client = None
+        self._async_loop = loop
+        self._async_slots = asyncio.Semaphore(self.max_concurrency)
+        self._async_shutdown = asyncio.Event()
+        if self._shutdown.is_set():
+            self._async_shutdown.set()
+
+    def shutdown(self) -> None:
+        """
+        Interrupt pending backoff and cooldown waits.
+
+        Callers blocked in a retry wait fail immediately with a
+        non-retryable LLMError instead of sleeping out the delay. Async
+        waiters are woken too; this is safe to call from any thread.
+        """
+        self._shutdown.set()
+        loop, event = self._async_loop, self._async_shutdown
+        if event is not None:
+            # asyncio.Event is not thread-safe: set it on its own loop
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # loop already closed, so nothing is waiting on it
+        with self._cooldown_cond:
+            self._cooldown_cond.notify_all()
+
+    def complete(self, prompt: str, system: Optional[str] = None) -> str:
         """
         Send prompt to Claude and return response.
 
         Args:
             prompt: The prompt to send to Claude.
+            system: Optional static system prompt, marked for prompt caching.
 
         Returns:
             The model's response text.
@@ -153,98 +342,411 @@ class ClaudeLLMProvider:
             LLMResponseError: If response is invalid.
             LLMError: For other failures.
         """
+        key = self._response_cache_key(prompt, system)
+        cached = self._cached_response(key)
+        if cached is not None:
+            return cached
+
         last_error: Optional[Exception] = None
 
         for attempt in range(self.max_retries + 1):
             try:
-                return self._make_request(prompt)
+                response = self._make_request(prompt, system)
+                self._cache_response(key, response)
+                return response
             except LLMError as e:
                 last_error = e
                 if not e.retryable or attempt >= self.max_retries:
                     raise
 
-                # Exponential backoff: 1s, 2s, 4s...
-                backoff = 2 ** attempt
-                logger.warning(
-                    f"Claude API call failed (attempt {attempt + 1}/{self.max_retries + 1}), "
-                    f"retrying in {backoff}s: {e}"
-                )
-                time.sleep(backoff)
+                self._sleep(self._retry_backoff(attempt, e))
 
         # Should not reach here, but just in case
         raise last_error or LLMError("Unknown error", provider="claude")
 
-    def _make_request(self, prompt: str) -> str:
-        """Make a single request to Claude API."""
-        import anthropic
+    def complete_stream(self, prompt: str, system: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream the response text as Claude generates it.
+
+        Failures before the first chunk are retried like complete(). Once
+        text has been yielded the error is re-raised as non-retryable, since
+        retrying would bill a second generation and repeat emitted text.
+
+        Args:
+            prompt: The prompt to send to Claude.
+            system: Optional static system prompt, marked for prompt caching.
+
+        Yields:
+            Response text chunks.
+
+        Raises:
+            Same errors as complete().
+        """
+        key = self._response_cache_key(prompt, system)
+        cached = self._cached_response(key)
+        if cached is not None:
+            yield cached
+            return
+
+        for attempt in range(self.max_retries + 1):
+            parts: list[str] = []
+            try:
+                for text in self._stream_request(prompt, system):
+                    parts.append(text)
+                    yield text
+                self._cache_response(key, "".join(parts))
+                return
+            except LLMError as e:
+                if parts:
+                    e.retryable = False
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+
+                self._sleep(self._retry_backoff(attempt, e))
+
+    async def acomplete(self, prompt: str, system: Optional[str] = None) -> str:
+        """
+        Async variant of complete() using the pooled async client.
+
+        Retries back off without blocking the event loop.
+        Arguments, return value and errors are the same as complete().
+        """
+        self._bind_loop()
+        key = self._response_cache_key(prompt, system)
+        cached = self._cached_response(key)
+        if cached is not None:
+            return cached
+
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._amake_request(prompt, system)
+                self._cache_response(key, response)
+                return response
+            except LLMError as e:
+                last_error = e
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+
+                await self._asleep(self._retry_backoff(attempt, e))
+
+        raise last_error or LLMError("Unknown error", provider="claude")
+
+    def complete_batch(
+        self,
+        prompts: list[str],
+        system: Optional[str] = None,
+        poll_interval: float = 1.0,
+        max_wait: float = 24 * 3600,
+    ) -> list[str]:
+        """
+        Complete many prompts through the Message Batches API.
+
+        For bulk, latency-tolerant work (evals, backfills): one batch is
+        submitted and polled with exponential backoff, at batch pricing.
+        Prompts already in the response cache are not resubmitted.
+
+        Args:
+            prompts: Prompts to complete.
+            system: Optional static system prompt shared by every request.
+            poll_interval: Initial seconds between status polls.
+            max_wait: Give up after this many seconds.
+
+        Returns:
+            Response texts, in the same order as prompts.
+
+        Raises:
+            LLMTimeoutError: If the batch does not finish within max_wait.
+            LLMResponseError: If any request in the batch did not succeed.
+            LLMError: For API failures.
+        """
+        keys = [self._response_cache_key(prompt, system) for prompt in prompts]
+        responses: list[Optional[str]] = [self._cached_response(key) for key in keys]
+        pending = [i for i, response in enumerate(responses) if response is None]
+        if not pending:
+            return responses  # type: ignore[return-value]
 
+        batches = self.client.messages.batches
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=0,  # Deterministic output
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt,
-                    }
-                ],
+            batch = batches.create(
+                requests=[
+                    {"custom_id": str(i), "params": self._request_params(prompts[i], system)}
+                    for i in pending
+                ]
             )
 
-            # Extract text from response
-            if not response.content:
-                raise LLMResponseError(
-                    "Empty response from Claude",
-                    provider="claude",
-                    raw_response=str(response),
-                )
+            deadline = time.monotonic() + max_wait
+            while batch.processing_status != "ended":
+                if time.monotonic() >= deadline:
+                    raise LLMTimeoutError(
+                        f"Claude batch {batch.id} not finished after {max_wait}s",
+                        provider="claude",
+                        timeout_seconds=max_wait,
+                    )
+                self._sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, self.BATCH_MAX_POLL_INTERVAL)
+                batch = batches.retrieve(batch.id)
+
+            for entry in batches.results(batch.id):
+                i = int(entry.custom_id)
+                if entry.result.type != "succeeded":
+                    raise LLMResponseError(
+                        f"Claude batch request {i} {entry.result.type}",
+                        provider="claude",
+                        raw_response=str(entry.result),
+                    )
+                responses[i] = self._extract_text(entry.result.message)
+                self._cache_response(keys[i], responses[i])
+        except _SDK_ERRORS as e:
+            error = self._translate_error(e)
+            raise error from self._error_cause(error, e)
+
+        return responses  # type: ignore[return-value]
+
+    def _retry_backoff(self, attempt: int, error: LLMError) -> float:
+        """Seconds to wait before retrying after a failed attempt."""
+        # Exponential backoff (1s, 2s, 4s...) plus up to 1s of jitter so
+        # concurrent callers hitting the same 429 do not retry in lockstep
+        backoff = min(self.MAX_BACKOFF, 2 ** attempt + random.uniform(0, 1))
+        if isinstance(error, LLMRateLimitError) and error.retry_after:
+            backoff = max(error.retry_after, backoff)
+        logger.warning(
+            f"Claude API call failed (attempt {attempt + 1}/{self.max_retries + 1}), "
+            f"retrying in {backoff:.2f}s: {error}"
+        )
+        return backoff
+
+    def _response_cache_key(self, prompt: str, system: Optional[str]) -> bytes:
+        """Digest of everything that determines the (temperature 0) response."""
+        return _prompt_digest(self.model, str(self.max_tokens), system or "", prompt)
+
+    def _cached_response(self, key: bytes) -> Optional[str]:
+        """Return a cached response for key, marking it most recently used."""
+        with self._response_cache_lock:
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                self._response_cache.move_to_end(key)
+        return cached
+
+    def _cache_response(self, key: bytes, response: str) -> None:
+        """Store a response, evicting the least recently used entry when full."""
+        if self.response_cache_size <= 0:
+            return
+        with self._response_cache_lock:
+            self._response_cache[key] = response
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > self.response_cache_size:
+                self._response_cache.popitem(last=False)
+
+    def _system_blocks(self, system: str) -> list[dict[str, Any]]:
+        """Wrap the system prompt in a text block carrying a cache breakpoint."""
+        cache_control: dict[str, str] = {"type": "ephemeral"}
+        if self.cache_ttl:
+            cache_control["ttl"] = self.cache_ttl
+        return [{"type": "text", "text": system, "cache_control": cache_control}]
+
+    @classmethod
+    def _cooldown_remaining(cls) -> float:
+        """Seconds left in the shared rate-limit cooldown (0 when clear)."""
+        return max(0.0, cls._cooldown_until - time.monotonic())
+
+    @classmethod
+    def _start_cooldown(cls, error: LLMError) -> None:
+        """Open (or extend) the shared cooldown after a rate-limit error."""
+        if not isinstance(error, LLMRateLimitError):
+            return
+        seconds = error.retry_after or cls.DEFAULT_RATE_LIMIT_COOLDOWN
+        with cls._cooldown_cond:
+            cls._cooldown_until = max(cls._cooldown_until, time.monotonic() + seconds)
+
+    def _wait_cooldown(self) -> None:
+        """Block until the shared cooldown has passed (or shutdown)."""
+        with self._cooldown_cond:
+            while (wait := self._cooldown_remaining()) > 0:
+                if self._shutdown.is_set():
+                    raise self._shutdown_error()
+                self._cooldown_cond.wait(wait)
+
+    def _sleep(self, seconds: float) -> None:
+        """Wait for seconds, raising at once if the provider is shut down."""
+        if self._shutdown.wait(seconds):
+            raise self._shutdown_error()
+
+    async def _asleep(self, seconds: float) -> None:
+        """Async _sleep(): wait for seconds unless shutdown() is called first."""
+        if self._shutdown.is_set():
+            raise self._shutdown_error()
+        try:
+            await asyncio.wait_for(self._async_shutdown.wait(), seconds)
+        except TimeoutError:
+            return
+        raise self._shutdown_error()
+
+    @staticmethod
+    def _shutdown_error() -> LLMError:
+        """Non-retryable error raised to callers interrupted by shutdown()."""
+        return LLMError("Claude provider is shutting down", provider="claude")
+
+    def _request_params(self, prompt: str, system: Optional[str]) -> dict[str, Any]:
+        """Build the request body for a prompt (also used as batch request params)."""
+        request: dict[str, Any] = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": 0,  # Deterministic output
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt,
+                }
+            ],
+        }
+        if system:
+            request["system"] = self._system_blocks(system)
+        return request
+
+    def _request_kwargs(self, prompt: str, system: Optional[str]) -> dict[str, Any]:
+        """Build the messages.create/stream arguments for a prompt."""
+        request = self._request_params(prompt, system)
+        if self.bedrock and self.latency_optimized:
+            # A transport header, not a body field: never valid in batch params
+            request["extra_headers"] = {self.BEDROCK_LATENCY_HEADER: "optimized"}
+        return request
+
+    def _make_request(self, prompt: str, system: Optional[str] = None) -> str:
+        """Make a single request to Claude API."""
+        self._wait_cooldown()
 
-            text_content = response.content[0]
-            if hasattr(text_content, 'text'):
-                return text_content.text
-            else:
-                raise LLMResponseError(
-                    "Unexpected response format from Claude",
-                    provider="claude",
-                    raw_response=str(response),
-                )
+        try:
+            with self._sync_slots:
+                response = self.client.messages.create(**self._request_kwargs(prompt, system))
+        except _SDK_ERRORS as e:
+            error = self._translate_error(e)
+            self._start_cooldown(error)
+            raise error from self._error_cause(error, e)
 
-        except anthropic.APITimeoutError as e:
-            raise LLMTimeoutError(
-                f"Claude API timed out after {self.timeout}s",
-                provider="claude",
-                timeout_seconds=self.timeout,
-            ) from e
-
-        except anthropic.RateLimitError as e:
-            retry_after = None
-            if hasattr(e, 'response') and e.response:
-                retry_after_header = e.response.headers.get('retry-after')
-                if retry_after_header:
-                    try:
-                        retry_after = float(retry_after_header)
-                    except ValueError:
-                        pass
-
-            raise LLMRateLimitError(
-                "Claude API rate limited",
-                provider="claude",
-                retry_after=retry_after,
-            ) from e
+        return self._extract_text(response)
 
-        except anthropic.APIConnectionError as e:
-            raise LLMError(
-                f"Failed to connect to Claude API: {e}",
+    def _stream_request(self, prompt: str, system: Optional[str] = None) -> Iterator[str]:
+        """Make a single streaming request to Claude API."""
+        self._wait_cooldown()
+
+        try:
+            with self._sync_slots:
+                with self.client.messages.stream(**self._request_kwargs(prompt, system)) as stream:
+                    yield from stream.text_stream
+        except _SDK_ERRORS as e:
+            error = self._translate_error(e)
+            self._start_cooldown(error)
+            raise error from self._error_cause(error, e)
+
+    async def _amake_request(self, prompt: str, system: Optional[str] = None) -> str:
+        """Make a single request to Claude API on the async client."""
+        while (wait := self._cooldown_remaining()) > 0:
+            await self._asleep(wait)
+
+        try:
+            async with self._async_slots:
+                response = await self.async_client.messages.create(
+                    **self._request_kwargs(prompt, system)
+                )
+        except _SDK_ERRORS as e:
+            error = self._translate_error(e)
+            self._start_cooldown(error)
+            raise error from self._error_cause(error, e)
+
+        return self._extract_text(response)
+
+    @staticmethod
+    def _error_cause(error: LLMError, e: Exception) -> Optional[Exception]:
+        """SDK exception to chain onto a translated error, if it adds anything."""
+        return None if isinstance(error, _SELF_DESCRIBING_ERRORS) else e
+
+    @staticmethod
+    def _extract_text(response: Any) -> str:
+        """Extract text from response."""
+        if not response.content:
+            raise LLMResponseError(
+                "Empty response from Claude",
                 provider="claude",
-                retryable=True,
-            ) from e
+                raw_response=str(response),
+            )
+
+        text_content = response.content[0]
+        if type(text_content) is _TEXT_BLOCK:
+            return text_content.text
 
-        except anthropic.APIStatusError as e:
-            raise LLMError(
-                f"Claude API error: {e}",
+        # Other block types (and test doubles) that still carry text
+        text = getattr(text_content, "text", None)
+        if text is not None:
+            return text
+        else:
+            raise LLMResponseError(
+                "Unexpected response format from Claude",
                 provider="claude",
-                retryable=e.status_code >= 500,
-            ) from e
+                raw_response=str(response),
+            )
+
+    def _translate_error(self, e: Exception) -> LLMError:
+        """Map an Anthropic SDK error onto the provider error types."""
+        # Most specific policy wins (RateLimitError before APIStatusError)
+        for cls in type(e).__mro__:
+            policy = _ERROR_POLICIES.get(cls)
+            if policy is not None:
+                return policy(self, e)
+        return LLMError(f"Claude API error: {e}", provider="claude")
+
+
+def _retry_after(e: Any) -> Optional[float]:
+    """Parse the retry-after header of a rate-limit response, if present."""
+    response = getattr(e, "response", None)
+    if not response:
+        return None
+    retry_after_header = response.headers.get("retry-after")
+    if not retry_after_header:
+        return None
+    try:
+        return float(retry_after_header)
+    except ValueError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _client_for(api_key: Optional[str], timeout: float, bedrock: bool = False) -> Any:
+    """Process-wide Anthropic client for one (api_key, timeout, bedrock) combination."""
+    if anthropic is None:
+        raise ImportError(
+            "anthropic package not installed. Run: pip install anthropic"
+        )
+    if bedrock:
+        return anthropic.AnthropicBedrock(timeout=timeout)
+    return anthropic.Anthropic(api_key=api_key, timeout=timeout)
+
+
+# Anthropic SDK exception type -> factory for the matching LLMError.
+# Retryability is decided here, in one table shared by every request path.
+_ERROR_POLICIES: dict[type, Callable[[ClaudeLLMProvider, Any], LLMError]] = {
+    anthropic.APITimeoutError: lambda provider, e: LLMTimeoutError(
+        f"Claude API timed out after {provider.timeout}s",
+        provider="claude",
+        timeout_seconds=provider.timeout,
+    ),
+    anthropic.RateLimitError: lambda provider, e: LLMRateLimitError(
+        "Claude API rate limited",
+        provider="claude",
+        retry_after=_retry_after(e),
+    ),
+    anthropic.APIConnectionError: lambda provider, e: LLMError(
+        f"Failed to connect to Claude API: {e}",
+        provider="claude",
+        retryable=True,
+    ),
+    anthropic.APIStatusError: lambda provider, e: LLMError(
+        f"Claude API error: {e}",
+        provider="claude",
+        retryable=e.status_code >= 500,
+    ),
+} if anthropic else {}
 
 
 # ============================================================================
@@ -252,11 +754,27 @@ class ClaudeLLMProvider:
 # ============================================================================
 
 
+# Returned once configured responses run out (encoded once, not per call)
+_DEFAULT_MOCK_RESPONSE = json.dumps({
+    "intent": "unknown",
+    "tool": "none",
+    "arguments": {},
+    "confidence": "low",
+    "reasoning": "Mock response",
+    "requires_clarification": True,
+    "clarification_prompt": "Please clarify",
+    "warnings": [],
+})
+
+
 class MockLLMProvider:
     """
     Mock LLM provider for testing.
 
     Can be configured to return specific responses or raise errors.
+    In deterministic mode the response is chosen by a hash of the prompt
+    rather than by call order, so the same prompt always gets the same
+    answer and repeated prompts are counted as cache hits in `stats`.
     """
 
     def __init__(
@@ -264,6 +782,7 @@ class MockLLMProvider:
         responses: Optional[list[str]] = None,
         error_on_call: Optional[int] = None,
         error_type: type[Exception] = LLMError,
+        deterministic: bool = False,
     ):
         """
         Initialize mock provider.
@@ -272,12 +791,16 @@ class MockLLMProvider:
             responses: List of responses to return in order.
             error_on_call: Call number (0-indexed) on which to raise error.
             error_type: Type of error to raise.
+            deterministic: Pick responses by prompt hash instead of call order.
         """
         self.responses = responses or []
         self.error_on_call = error_on_call
         self.error_type = error_type
+        self.deterministic = deterministic
         self.call_count = 0
         self.prompts_received: list[str] = []
+        self.stats = {"hits": 0, "misses": 0}
+        self._seen: set[int] = set()
 
     def complete(self, prompt: str) -> str:
         """Return mocked response."""
@@ -292,20 +815,22 @@ class MockLLMProvider:
             else:
                 raise self.error_type("Mock error", provider="mock")
 
-        if self.call_count < len(self.responses):
+        if self.deterministic:
+            seed = int.from_bytes(_prompt_digest(prompt)[:8], "big")
+            if seed in self._seen:
+                self.stats["hits"] += 1
+            else:
+                self._seen.add(seed)
+                self.stats["misses"] += 1
+            response = (
+                self.responses[seed % len(self.responses)]
+                if self.responses
+                else _DEFAULT_MOCK_RESPONSE
+            )
+        elif self.call_count < len(self.responses):
             response = self.responses[self.call_count]
         else:
-            # Default response
-            response = json.dumps({
-                "intent": "unknown",
-                "tool": "none",
-                "arguments": {},
-                "confidence": "low",
-                "reasoning": "Mock response",
-                "requires_clarification": True,
-                "clarification_prompt": "Please clarify",
-                "warnings": [],
-            })
+            response = _DEFAULT_MOCK_RESPONSE
 
         self.call_count += 1
         return response
@@ -361,11 +886,14 @@ def create_provider(
     return providers[provider_type](**kwargs)
 
 
+@functools.lru_cache(maxsize=1)
 def get_default_provider() -> Any:
     """
     Get the default provider based on environment.
 
     Returns ClaudeLLMProvider if ANTHROPIC_API_KEY is set, otherwise StubLLMProvider.
+    The decision (and the provider) is made once per process; call
+    get_default_provider.cache_clear() after changing the environment.
     """
     from llm_router.router import StubLLMProvider
 
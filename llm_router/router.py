@@ -8,12 +8,16 @@ It does NOT execute tools or modify state - it only provides recommendations.
 import json
 import logging
 import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Any, Callable, Optional, Protocol
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, NamedTuple, Optional, Protocol
 
 from pydantic import ValidationError
 
 from llm_router.schemas import (
+    _EMPTY_ARGS,
     INTENT_TOOL_MAPPING,
     Confidence,
     RouterDecision,
@@ -22,18 +26,242 @@ from llm_router.schemas import (
     ToolArguments,
     is_tool_valid_for_state,
 )
+from llm_router.semantic_cache import SemanticCache
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional (pip install whatsapp-agent[fast-match])
+    ahocorasick = None
 
 logger = logging.getLogger(__name__)
 
 
 class LLMProvider(Protocol):
-    """Protocol for LLM providers."""
+    """
+    Protocol for LLM providers.
+
+    Local providers that build the decision as a dict may also define
+    complete_structured(prompt) -> dict; LLMRouter then validates the dict
+    directly instead of round-tripping it through JSON text. Providers whose
+    dicts always match the schema can set `structured_output_trusted = True`
+    to skip pydantic validation as well.
+    """
 
     def complete(self, prompt: str) -> str:
         """Send prompt to LLM and return response."""
         ...
 
 
+# Tag namespace for future-payment phrases ("will pay"), scanned in the
+# same pass as the intent keywords
+_FUTURE_PAYMENT = "future_payment"
+
+# Literal intent keywords, matched on whole words after lowercasing and
+# collapsing whitespace. Each tuple is one pattern: its phrases are
+# alternatives and count once towards the intent's score.
+_INTENT_KEYWORDS: dict[Any, list[tuple[str, ...]]] = {
+    RouterIntent.LIST_INVOICES: [
+        ("what invoices",),
+        ("which invoices",),
+        ("invoices i have", "invoices do i have"),
+        ("my invoices",),
+        ("pending invoices",),
+        ("open invoices",),
+        ("active invoices",),
+    ],
+    RouterIntent.INVOICE_APPROVAL: [
+        ("approve",),
+        ("accept",),
+        ("ok with",),
+        ("looks good",),
+        ("proceed",),
+    ],
+    RouterIntent.INVOICE_REJECTION: [
+        ("reject",),
+        ("decline",),
+        ("refuse",),
+        ("not accept",),
+    ],
+    RouterIntent.PAYMENT_CONFIRMATION: [
+        ("paid",),
+        ("payment sent", "payment made", "payment completed", "payment done"),
+        ("transferred",),
+        ("sent money", "sent the money"),
+    ],
+    RouterIntent.INVOICE_DISPUTE: [
+        ("dispute",),
+        ("contest",),
+        ("incorrect",),
+        ("wrong amount",),
+        ("error",),
+    ],
+    RouterIntent.REQUEST_INVOICE_COPY: [
+        ("resend",),
+        ("send copy", "send me copy", "send a copy", "send me a copy"),
+        ("email invoice", "email me invoice", "email the invoice", "email me the invoice"),
+        ("need copy", "need a copy"),
+    ],
+    RouterIntent.INVOICE_QUESTION: [
+        ("what is",),
+        ("how much",),
+        ("status",),
+        ("detail", "details"),
+        ("when",),
+        ("due date",),
+    ],
+    _FUTURE_PAYMENT: [
+        ("will pay",),
+        ("going to pay",),
+        ("plan to pay",),
+        ("ill pay", "i'll pay"),
+        tuple(
+            f"pay {you}{when}"
+            for you in ("", "you ")
+            for when in ("tomorrow", "later", "soon", "next")
+        ),
+    ],
+}
+
+# Intents in tie-break order for _detect_intent
+_INTENT_ORDER = [intent for intent in _INTENT_KEYWORDS if intent is not _FUTURE_PAYMENT]
+
+
+def _is_word_char(char: str) -> bool:
+    """Whether char is a regex \\w character (for \\b word boundaries)."""
+    return char.isalnum() or char == "_"
+
+
+class _KeywordMatcher:
+    """
+    Finds every whole-word keyword in a text in one pass.
+
+    Uses a pyahocorasick automaton when installed, otherwise a single
+    regex alternation inside a lookahead (so overlapping keywords that
+    start at different positions are all found).
+    """
+
+    def __init__(self, keywords: dict[str, tuple[Any, int]]):
+        self.keywords = keywords
+        self._automaton: Optional[Any] = None
+        self._pattern: Optional[re.Pattern[str]] = None
+
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for phrase, tag in keywords.items():
+                self._automaton.add_word(phrase, (len(phrase), tag))
+            self._automaton.make_automaton()
+        else:
+            # Longest first, so a longer phrase wins at a shared start
+            alternation = "|".join(
+                re.escape(phrase) for phrase in sorted(keywords, key=len, reverse=True)
+            )
+            self._pattern = re.compile(rf"(?=\b({alternation})\b)")
+
+    def find(self, text: str) -> set[tuple[Any, int]]:
+        """Tags of the keywords occurring as whole words in (normalized) text."""
+        if self._automaton is None:
+            return {self.keywords[m.group(1)] for m in self._pattern.finditer(text)}
+
+        tags = set()
+        for end, (length, tag) in self._automaton.iter(text):
+            start = end - length + 1
+            if (start == 0 or not _is_word_char(text[start - 1])) and (
+                end + 1 == len(text) or not _is_word_char(text[end + 1])
+            ):
+                tags.add(tag)
+        return tags
+
+
+_KEYWORD_MATCHER = _KeywordMatcher({
+    phrase: (intent, index)
+    for intent, patterns in _INTENT_KEYWORDS.items()
+    for index, phrases in enumerate(patterns)
+    for phrase in phrases
+})
+
+
+# Primary tool the stub recommends for each intent
+_INTENT_TO_TOOL: Mapping[RouterIntent, RouterTool] = MappingProxyType({
+    RouterIntent.INVOICE_QUESTION: RouterTool.GET_INVOICE_STATUS,
+    RouterIntent.LIST_INVOICES: RouterTool.LIST_INVOICES,
+    RouterIntent.INVOICE_APPROVAL: RouterTool.APPROVE_INVOICE,
+    RouterIntent.INVOICE_REJECTION: RouterTool.REJECT_INVOICE,
+    RouterIntent.PAYMENT_CONFIRMATION: RouterTool.CONFIRM_PAYMENT,
+    RouterIntent.INVOICE_DISPUTE: RouterTool.CREATE_DISPUTE,
+    RouterIntent.REQUEST_INVOICE_COPY: RouterTool.RESEND_INVOICE,
+    RouterIntent.GENERAL_QUESTION: RouterTool.NONE,
+    RouterIntent.UNKNOWN: RouterTool.NONE,
+})
+
+# Tools that act on one invoice, so the stub asks for a missing invoice ID
+_TOOLS_NEEDING_INVOICE_ID = frozenset(RouterTool) - {RouterTool.NONE, RouterTool.LIST_INVOICES}
+
+# Intents that never need an invoice ID
+_NO_INVOICE_ID_INTENTS = frozenset({
+    RouterIntent.GENERAL_QUESTION,
+    RouterIntent.UNKNOWN,
+    RouterIntent.LIST_INVOICES,
+})
+
+# (verb, request) for asking why an invoice is rejected or disputed
+_REASON_PROMPTS: Mapping[RouterIntent, tuple[str, str]] = MappingProxyType({
+    RouterIntent.INVOICE_REJECTION: ("reject", "please provide a reason for the rejection."),
+    RouterIntent.INVOICE_DISPUTE: ("dispute", "please describe the issue."),
+})
+
+# Appended to the template's instructions by LLMRouter.route_batch
+_BATCH_PROMPT = """## Batched Requests
+
+The {count} requests below are independent. Route each one on its own,
+using only its own context, and respond with a JSON array of exactly
+{count} routing decisions in the same order (no other text).
+
+{requests}
+"""
+
+# Prompt sections the stub reads back from the router's prompt
+_USER_MESSAGE_MARKER = "## User Message"
+_RESPONSE_MARKER = "## Your Response"
+_STATE_PATTERN = re.compile(r"\*\*Current Invoice State\*\*:\s*(\w+)")
+
+# JSON inside a markdown code fence in an LLM response
+_CODE_BLOCK_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.S)
+
+# Responses longer than this are parsed as-is, without JSON extraction
+_MAX_EXTRACT_CHARS = 64 * 1024
+
+# {{name}} placeholders in prompt templates
+_PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+
+def _fuse_patterns(patterns: list[str]) -> re.Pattern[str]:
+    """
+    Compile lowercase regexes into one alternation (run on _MessageScan.text).
+
+    Each pattern becomes a capturing group inside a lookahead, so finditer
+    reports every position where some pattern matches and m.lastindex says
+    which one. Patterns must not use capturing groups of their own, and no
+    two may match at the same start position.
+    """
+    alternation = "|".join(f"({pattern})" for pattern in patterns)
+    return re.compile(f"(?=(?:{alternation}))")
+
+
+class _MessageScan(NamedTuple):
+    """A user message normalized and keyword-scanned once per completion."""
+
+    text: str  # lowercased, whitespace collapsed to single spaces
+    word_count: int
+    tags: set[tuple[Any, int]]  # (intent or _FUTURE_PAYMENT, pattern index)
+
+
+def _scan_message(message: str) -> _MessageScan:
+    """Normalize a message and find its keyword tags."""
+    words = message.lower().split()
+    text = " ".join(words)
+    return _MessageScan(text, len(words), _KEYWORD_MATCHER.find(text))
+
+
 class StubLLMProvider:
     """
     Stub LLM provider for testing and development.
@@ -42,74 +270,26 @@ class StubLLMProvider:
     Replace with actual LLM integration (Anthropic, OpenAI, etc.) in production.
     """
 
-    # Keyword patterns for intent detection
-    INTENT_PATTERNS: dict[RouterIntent, list[re.Pattern[str]]] = {
-        RouterIntent.LIST_INVOICES: [
-            re.compile(r"\bshow\s+(me\s+)?(all\s+)?(the\s+)?(my\s+)?(active\s+)?(open\s+)?(pending\s+)?invoices\b", re.I),
-            re.compile(r"\blist\s+(all\s+)?(my\s+)?(the\s+)?(active\s+)?invoices?\b", re.I),
-            re.compile(r"\ball\s+(my\s+)?(active\s+)?(open\s+)?invoices\b", re.I),
-            re.compile(r"\bwhat\s+invoices\b", re.I),
-            re.compile(r"\bwhich\s+invoices\b", re.I),
-            re.compile(r"\binvoices\s+(do\s+)?i\s+have\b", re.I),
-            re.compile(r"\bmy\s+invoices\b", re.I),
-            re.compile(r"\bpending\s+invoices\b", re.I),
-            re.compile(r"\bopen\s+invoices\b", re.I),
-            re.compile(r"\bactive\s+invoices\b", re.I),
-        ],
-        RouterIntent.INVOICE_APPROVAL: [
-            re.compile(r"\bapprove\b", re.I),
-            re.compile(r"\baccept\b", re.I),
-            re.compile(r"\bok\s+with\b", re.I),
-            re.compile(r"\blooks\s+good\b", re.I),
-            re.compile(r"\bproceed\b", re.I),
-        ],
-        RouterIntent.INVOICE_REJECTION: [
-            re.compile(r"\breject\b", re.I),
-            re.compile(r"\bdecline\b", re.I),
-            re.compile(r"\brefuse\b", re.I),
-            re.compile(r"\bnot\s+accept\b", re.I),
-        ],
-        RouterIntent.PAYMENT_CONFIRMATION: [
-            re.compile(r"\b(have\s+)?paid\b", re.I),
-            re.compile(r"\bpayment\s+(sent|made|completed|done)\b", re.I),
-            re.compile(r"\btransferred\b", re.I),
-            re.compile(r"\bsent\s+(the\s+)?money\b", re.I),
-        ],
-        RouterIntent.INVOICE_DISPUTE: [
-            re.compile(r"\bdispute\b", re.I),
-            re.compile(r"\bcontest\b", re.I),
-            re.compile(r"\bincorrect\b", re.I),
-            re.compile(r"\bwrong\s+amount\b", re.I),
-            re.compile(r"\berror\b", re.I),
-        ],
-        RouterIntent.REQUEST_INVOICE_COPY: [
-            re.compile(r"\bresend\b", re.I),
-            re.compile(r"\bsend\s+(me\s+)?(a\s+)?copy\b", re.I),
-            re.compile(r"\bemail\s+(me\s+)?(the\s+)?invoice\b", re.I),
-            re.compile(r"\bneed\s+(a\s+)?copy\b", re.I),
-        ],
-        RouterIntent.INVOICE_QUESTION: [
-            re.compile(r"\bwhat\s+is\b", re.I),
-            re.compile(r"\bhow\s+much\b", re.I),
-            re.compile(r"\bstatus\b", re.I),
-            re.compile(r"\bdetails?\b", re.I),
-            re.compile(r"\bwhen\b", re.I),
-            re.compile(r"\bdue\s+date\b", re.I),
-        ],
+    # complete_structured() only emits schema-valid enum values and
+    # normalized "INV-<n>" IDs, so the router may skip re-validating them
+    structured_output_trusted = True
+
+    # Residual regexes for intent phrases with many optional words, fused
+    # into one pattern per intent; every other pattern is a literal keyword
+    # in _INTENT_KEYWORDS. All of these mention "invoice", so they are
+    # skipped for messages that do not.
+    INTENT_REGEX: dict[RouterIntent, re.Pattern[str]] = {
+        RouterIntent.LIST_INVOICES: _fuse_patterns([
+            r"\bshow\s+(?:me\s+)?(?:all\s+)?(?:the\s+)?(?:my\s+)?(?:active\s+)?(?:open\s+)?(?:pending\s+)?invoices\b",
+            r"\blist\s+(?:all\s+)?(?:my\s+)?(?:the\s+)?(?:active\s+)?invoices?\b",
+            r"\ball\s+(?:my\s+)?(?:active\s+)?(?:open\s+)?invoices\b",
+        ]),
     }
 
-    # Pattern for future payment (NOT confirmation)
-    FUTURE_PAYMENT_PATTERNS = [
-        re.compile(r"\bwill\s+pay\b", re.I),
-        re.compile(r"\bgoing\s+to\s+pay\b", re.I),
-        re.compile(r"\bplan\s+to\s+pay\b", re.I),
-        re.compile(r"\bi'?ll\s+pay\b", re.I),
-        re.compile(r"\bpay\s+(you\s+)?(tomorrow|later|soon|next)\b", re.I),
-    ]
-
-    # Invoice ID extraction pattern
+    # Invoice ID extraction pattern; exactly one group captures the digits
+    # ("INV-001", "inv001", "#001", "12345", or short "INV-7")
     INVOICE_ID_PATTERN = re.compile(
-        r"(?:invoice\s+)?(?:#|INV-?)?(\d{3,})|INV-\d+",
+        r"INV-?(\d{3,})|INV-(\d+)|(\d{3,})",
         re.I,
     )
 
@@ -119,17 +299,24 @@ class StubLLMProvider:
 
         In production, this would call an actual LLM API.
         """
+        return json.dumps(self.complete_structured(prompt), indent=2)
+
+    def complete_structured(self, prompt: str) -> dict[str, Any]:
+        """Return the rule-based decision as a dict, without JSON encoding."""
         # Extract user message and state from prompt
         user_message = self._extract_user_message(prompt)
         current_state = self._extract_state(prompt)
 
+        # One normalization and keyword scan serves every check below
+        scan = _scan_message(user_message)
+
         # Detect intent
-        intent = self._detect_intent(user_message)
+        intent = self._detect_intent(user_message, scan)
 
         # Check for future payment (not a confirmation)
-        if intent == RouterIntent.PAYMENT_CONFIRMATION:
-            if self._is_future_payment(user_message):
-                intent = RouterIntent.GENERAL_QUESTION
+        future_payment = self._is_future_payment(user_message, scan)
+        if intent == RouterIntent.PAYMENT_CONFIRMATION and future_payment:
+            intent = RouterIntent.GENERAL_QUESTION
 
         # Extract invoice ID
         invoice_id = self._extract_invoice_id(user_message)
@@ -138,82 +325,91 @@ class StubLLMProvider:
         tool = self._intent_to_tool(intent)
 
         # Build decision
-        decision = self._build_decision(
+        return self._build_decision(
             intent=intent,
             tool=tool,
             invoice_id=invoice_id,
             current_state=current_state,
-            user_message=user_message,
+            future_payment=future_payment,
+            word_count=scan.word_count,
         )
 
-        return json.dumps(decision, indent=2)
-
     def _extract_user_message(self, prompt: str) -> str:
         """Extract user message from prompt."""
         # Look for the user message section
-        marker = "## User Message"
-        if marker in prompt:
-            parts = prompt.split(marker)
-            if len(parts) > 1:
-                # Get text after marker until "## Your Response"
-                msg_part = parts[1].split("## Your Response")[0]
-                return msg_part.strip()
-        return prompt
+        idx = prompt.find(_USER_MESSAGE_MARKER)
+        if idx == -1:
+            return prompt
+
+        # Get text after marker until "## Your Response" (or a repeated marker)
+        start = idx + len(_USER_MESSAGE_MARKER)
+        end = prompt.find(_USER_MESSAGE_MARKER, start)
+        if end == -1:
+            end = len(prompt)
+        response_idx = prompt.find(_RESPONSE_MARKER, start, end)
+        if response_idx != -1:
+            end = response_idx
+        return prompt[start:end].strip()
 
     def _extract_state(self, prompt: str) -> str:
         """Extract current state from prompt."""
-        match = re.search(r"\*\*Current Invoice State\*\*:\s*(\w+)", prompt)
+        match = _STATE_PATTERN.search(prompt)
         if match:
             return match.group(1)
         return "unknown"
 
-    def _detect_intent(self, message: str) -> RouterIntent:
-        """Detect intent from message using patterns."""
+    def _detect_intent(
+        self,
+        message: str,
+        scan: Optional[_MessageScan] = None,
+    ) -> RouterIntent:
+        """Detect intent from message (or its precomputed scan)."""
+        if scan is None:
+            scan = _scan_message(message)
         scores: dict[RouterIntent, int] = {}
 
-        for intent, patterns in self.INTENT_PATTERNS.items():
-            score = sum(1 for p in patterns if p.search(message))
-            if score > 0:
-                scores[intent] = score
+        # Score = number of distinct keyword patterns hit, per intent
+        for tag in scan.tags:
+            intent = tag[0]
+            if intent is not _FUTURE_PAYMENT:
+                scores[intent] = scores.get(intent, 0) + 1
+
+        if "invoice" in scan.text:
+            for intent, regex in self.INTENT_REGEX.items():
+                # One group per fused pattern: count the distinct ones that hit
+                score = len({m.lastindex for m in regex.finditer(scan.text)})
+                if score > 0:
+                    scores[intent] = scores.get(intent, 0) + score
 
         if not scores:
             # Check if it's a very short/vague message
-            if len(message.split()) <= 3:
+            if scan.word_count <= 3:
                 return RouterIntent.UNKNOWN
             return RouterIntent.GENERAL_QUESTION
 
-        # Return highest scoring intent
-        return max(scores, key=lambda k: scores[k])
+        # Return highest scoring intent (ties go to the first in _INTENT_ORDER)
+        return max(_INTENT_ORDER, key=lambda k: scores.get(k, 0))
 
-    def _is_future_payment(self, message: str) -> bool:
+    def _is_future_payment(
+        self,
+        message: str,
+        scan: Optional[_MessageScan] = None,
+    ) -> bool:
         """Check if message indicates future payment, not confirmation."""
-        return any(p.search(message) for p in self.FUTURE_PAYMENT_PATTERNS)
+        if scan is None:
+            scan = _scan_message(message)
+        return any(tag[0] is _FUTURE_PAYMENT for tag in scan.tags)
 
     def _extract_invoice_id(self, message: str) -> Optional[str]:
         """Extract invoice ID from message."""
         match = self.INVOICE_ID_PATTERN.search(message)
         if match:
-            full_match = match.group(0).upper()
-            if full_match.startswith("INV"):
-                return full_match.replace("INV", "INV-").replace("INV--", "INV-")
-            if match.group(1):
-                return f"INV-{match.group(1)}"
+            return f"INV-{match.group(match.lastindex)}"
         return None
 
     def _intent_to_tool(self, intent: RouterIntent) -> RouterTool:
         """Map intent to primary tool."""
-        tool_mapping = {
-            RouterIntent.INVOICE_QUESTION: RouterTool.GET_INVOICE_STATUS,
-            RouterIntent.LIST_INVOICES: RouterTool.LIST_INVOICES,
-            RouterIntent.INVOICE_APPROVAL: RouterTool.APPROVE_INVOICE,
-            RouterIntent.INVOICE_REJECTION: RouterTool.REJECT_INVOICE,
-            RouterIntent.PAYMENT_CONFIRMATION: RouterTool.CONFIRM_PAYMENT,
-            RouterIntent.INVOICE_DISPUTE: RouterTool.CREATE_DISPUTE,
-            RouterIntent.REQUEST_INVOICE_COPY: RouterTool.RESEND_INVOICE,
-            RouterIntent.GENERAL_QUESTION: RouterTool.NONE,
-            RouterIntent.UNKNOWN: RouterTool.NONE,
-        }
-        return tool_mapping.get(intent, RouterTool.NONE)
+        return _INTENT_TO_TOOL.get(intent, RouterTool.NONE)
 
     def _build_decision(
         self,
@@ -221,9 +417,15 @@ class StubLLMProvider:
         tool: RouterTool,
         invoice_id: Optional[str],
         current_state: str,
-        user_message: str,
+        future_payment: bool,
+        word_count: int,
     ) -> dict[str, Any]:
-        """Build the decision dictionary."""
+        """
+        Build the decision dictionary.
+
+        future_payment and word_count come from the message scan done once
+        in complete_structured(), so the message is not re-read here.
+        """
         decision: dict[str, Any] = {
             "intent": intent.value,
             "tool": tool.value,
@@ -240,8 +442,8 @@ class StubLLMProvider:
             decision["arguments"]["invoice_id"] = invoice_id
 
         # Check for missing invoice ID (not needed for list_invoices)
-        if tool not in [RouterTool.NONE, RouterTool.LIST_INVOICES] and not invoice_id:
-            if intent not in [RouterIntent.GENERAL_QUESTION, RouterIntent.UNKNOWN, RouterIntent.LIST_INVOICES]:
+        if tool in _TOOLS_NEEDING_INVOICE_ID and not invoice_id:
+            if intent not in _NO_INVOICE_ID_INTENTS:
                 decision["requires_clarification"] = True
                 decision["clarification_prompt"] = (
                     "Which invoice would you like me to help with? "
@@ -250,20 +452,14 @@ class StubLLMProvider:
                 decision["confidence"] = "medium"
 
         # Check for rejection/dispute without reason
-        if intent in [RouterIntent.INVOICE_REJECTION, RouterIntent.INVOICE_DISPUTE]:
+        if intent in _REASON_PROMPTS:
             # Simple check: if message is short, probably no reason
-            if len(user_message.split()) < 6:
+            if word_count < 6:
+                verb, request = _REASON_PROMPTS[intent]
                 decision["requires_clarification"] = True
-                if intent == RouterIntent.INVOICE_REJECTION:
-                    decision["clarification_prompt"] = (
-                        f"To reject invoice {invoice_id or 'this invoice'}, "
-                        "please provide a reason for the rejection."
-                    )
-                else:
-                    decision["clarification_prompt"] = (
-                        f"To dispute invoice {invoice_id or 'this invoice'}, "
-                        "please describe the issue."
-                    )
+                decision["clarification_prompt"] = (
+                    f"To {verb} invoice {invoice_id or 'this invoice'}, {request}"
+                )
                 decision["confidence"] = "medium"
 
         # Check state validity
@@ -285,15 +481,14 @@ class StubLLMProvider:
             decision["reasoning"] = "Message is ambiguous or unclear"
 
         # Handle future payment
-        if intent == RouterIntent.GENERAL_QUESTION and "pay" in user_message.lower():
-            if self._is_future_payment(user_message):
-                decision["warnings"].append(
-                    "This is not a payment confirmation - "
-                    "user indicates future intent to pay, not completed payment"
-                )
-                decision["reasoning"] = (
-                    "User indicates future payment intent, not a confirmation"
-                )
+        if intent == RouterIntent.GENERAL_QUESTION and future_payment:
+            decision["warnings"].append(
+                "This is not a payment confirmation - "
+                "user indicates future intent to pay, not completed payment"
+            )
+            decision["reasoning"] = (
+                "User indicates future payment intent, not a confirmation"
+            )
 
         # Set reasoning if not set
         if not decision["reasoning"]:
@@ -312,6 +507,7 @@ class LLMRouter:
     - Parse and validate responses
     - Enforce JSON schema
     - Fallback to unknown on ambiguity
+    - LRU cache of decisions for repeated messages without history
 
     This router does NOT:
     - Execute tools
@@ -319,10 +515,14 @@ class LLMRouter:
     - Make external API calls (except to LLM)
     """
 
+    DEFAULT_DECISION_CACHE_SIZE = 128
+
     def __init__(
         self,
         llm_provider: Optional[LLMProvider] = None,
         prompt_path: Optional[Path] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        decision_cache_size: int = DEFAULT_DECISION_CACHE_SIZE,
     ):
         """
         Initialize the router.
@@ -330,18 +530,55 @@ class LLMRouter:
         Args:
             llm_provider: LLM provider for completions. Uses stub if not provided.
             prompt_path: Path to prompt template. Uses default if not provided.
+            semantic_cache: Optional cache that reuses the LLM response for
+                paraphrases of an earlier message in the same state/context.
+            decision_cache_size: Max decisions kept for repeated messages
+                (0 disables the cache).
         """
+        self.decision_cache_size = decision_cache_size
+        self._decision_cache: OrderedDict[tuple[str, str, str], RouterDecision] = OrderedDict()
+        self._decision_cache_lock = threading.Lock()
         self.llm_provider = llm_provider or StubLLMProvider()
+        self.semantic_cache = semantic_cache
         self.prompt_path = prompt_path or Path(__file__).parent / "prompt.md"
         self._prompt_template: Optional[str] = None
+        self._prompt_parts: list[str] = []
+        self._prompt_mtime: Optional[int] = None
+
+    @property
+    def llm_provider(self) -> LLMProvider:
+        """LLM provider for completions."""
+        return self._llm_provider
+
+    @llm_provider.setter
+    def llm_provider(self, provider: LLMProvider) -> None:
+        """Swap the provider; decisions made by the old one are dropped."""
+        self._llm_provider = provider
+        self.clear_cache()
 
     @property
     def prompt_template(self) -> str:
-        """Load and cache prompt template."""
-        if self._prompt_template is None:
-            self._prompt_template = self.prompt_path.read_text(encoding="utf-8")
+        """Load and cache prompt template, reloading it when the file changes."""
+        self._template_parts()
         return self._prompt_template
 
+    def _template_parts(self) -> list[str]:
+        """
+        The template split on its {{placeholders}}: literal text at even
+        indices, placeholder names at odd ones.
+
+        The file is re-read (and cached decisions dropped) only when its
+        mtime changes, so edits are picked up without a restart.
+        """
+        mtime = self.prompt_path.stat().st_mtime_ns
+        if mtime != self._prompt_mtime:
+            self._prompt_template = self.prompt_path.read_text(encoding="utf-8")
+            self._prompt_parts = _PLACEHOLDER_PATTERN.split(self._prompt_template)
+            if self._prompt_mtime is not None:
+                self.clear_cache()
+            self._prompt_mtime = mtime
+        return self._prompt_parts
+
     def route(
         self,
         message: str,
@@ -365,35 +602,271 @@ class LLMRouter:
         """
         context = context or {}
 
-        logger.debug(f"Routing message: {message[:50]}... (state={state})")
-
-        # Build prompt
-        prompt = self._build_prompt(message, state, context)
-
-        # Call LLM
-        try:
-            llm_response = self.llm_provider.complete(prompt)
-        except Exception as e:
-            logger.error(f"LLM call failed: {e}")
-            return self._fallback_decision(message, str(e))
+        # Guarded so the message is not sliced and formatted when disabled
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Routing message: {message[:50]}... (state={state})")
+
+        decision_key = self._decision_key(message, state, context)
+        if decision_key is not None:
+            cached = self._cached_decision(decision_key)
+            if cached is not None:
+                return cached
+
+        # Everything in the prompt except the message must match exactly.
+        # Structured providers are local and never cached, so skip the lookup.
+        complete_structured = getattr(self.llm_provider, "complete_structured", None)
+        cache_scope = None
+        cache_vector = None
+        llm_response = None
+        structured: Optional[dict[str, Any]] = None
+        if self.semantic_cache is not None and complete_structured is None:
+            cache_scope = json.dumps(
+                [
+                    state,
+                    context.get("invoice_id"),
+                    context.get("conversation_history", []),
+                ],
+                default=str,
+            )
+            cache_vector = self.semantic_cache.embed(message)
+            llm_response = self.semantic_cache.get(cache_scope, message, cache_vector)
+
+        cache_hit = llm_response is not None
+        if not cache_hit:
+            # Build prompt
+            prompt, llm_kwargs = self._build_request(message, state, context)
+
+            # Call LLM
+            try:
+                if complete_structured is not None:
+                    structured = complete_structured(prompt, **llm_kwargs)
+                else:
+                    llm_response = self.llm_provider.complete(prompt, **llm_kwargs)
+            except Exception as e:
+                logger.error(f"LLM call failed: {e}")
+                return self._fallback_decision(message, str(e))
 
         # Parse response
         try:
-            decision = self._parse_response(llm_response)
+            if structured is not None:
+                decision = self._decision_from_data(
+                    structured,
+                    trusted=getattr(self.llm_provider, "structured_output_trusted", False),
+                )
+            else:
+                decision = self._parse_response(llm_response)
         except Exception as e:
             logger.warning(f"Failed to parse LLM response: {e}")
             return self._fallback_decision(message, f"Parse error: {e}")
 
+        # Only new responses that parse are worth reusing
+        if cache_scope is not None and not cache_hit:
+            self.semantic_cache.put(cache_scope, message, llm_response, cache_vector)
+
         # Validate decision
         decision = self._validate_decision(decision, state)
 
-        logger.info(
-            f"Routed to intent={decision.intent}, tool={decision.tool}, "
-            f"confidence={decision.confidence}"
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                f"Routed to intent={decision.intent}, tool={decision.tool}, "
+                f"confidence={decision.confidence}"
+            )
+
+        # Low-confidence and unknown decisions are cached too; LLM and parse
+        # failures (returned above) are not, since they may be transient
+        if decision_key is not None:
+            self._cache_decision(decision_key, decision)
+
+        return decision
+
+    def route_batch(
+        self,
+        requests: list[tuple[str, str, Optional[dict[str, Any]]]],
+    ) -> list[RouterDecision]:
+        """
+        Route several independent messages with one LLM round-trip.
+
+        Cached decisions are reused; the remaining messages go to the LLM in
+        one prompt that asks for a JSON array of decisions. Local providers
+        (complete_structured) are simply called per message. If the batched
+        response cannot be parsed, the affected messages are routed one by
+        one with route().
+
+        Args:
+            requests: (message, state, context) per message; see route().
+
+        Returns:
+            One RouterDecision per request, in order.
+        """
+        decisions: list[Optional[RouterDecision]] = [None] * len(requests)
+        misses: list[int] = []
+        for i, (message, state, context) in enumerate(requests):
+            key = self._decision_key(message, state, context or {})
+            cached = self._cached_decision(key) if key is not None else None
+            if cached is not None:
+                decisions[i] = cached
+            else:
+                misses.append(i)
+
+        if len(misses) == 1 or hasattr(self.llm_provider, "complete_structured"):
+            for i in misses:
+                decisions[i] = self.route(*requests[i])
+            return decisions  # type: ignore[return-value]
+        if not misses:
+            return decisions  # type: ignore[return-value]
+
+        prompt, llm_kwargs = self._build_batch_request([requests[i] for i in misses])
+        try:
+            llm_response = self.llm_provider.complete(prompt, **llm_kwargs)
+        except Exception as e:
+            logger.error(f"Batched LLM call failed: {e}")
+            for i in misses:
+                decisions[i] = self._fallback_decision(requests[i][0], str(e))
+            return decisions  # type: ignore[return-value]
+
+        try:
+            items = self._parse_batch_response(llm_response, len(misses))
+        except ValueError as e:
+            logger.warning(f"Failed to parse batched LLM response, routing singly: {e}")
+            items = [None] * len(misses)
+
+        for i, data in zip(misses, items):
+            message, state, context = requests[i]
+            try:
+                decision = self._decision_from_data(data) if data is not None else None
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Invalid decision in batched response: {e}")
+                decision = None
+            if decision is None:
+                decisions[i] = self.route(message, state, context)
+                continue
+
+            decision = self._validate_decision(decision, state)
+            key = self._decision_key(message, state, context or {})
+            if key is not None:
+                self._cache_decision(key, decision)
+            decisions[i] = decision
+
+        return decisions  # type: ignore[return-value]
+
+    def clear_cache(self) -> None:
+        """Drop all cached decisions (e.g. after changing the prompt template)."""
+        with self._decision_cache_lock:
+            self._decision_cache.clear()
+
+    def _decision_key(
+        self,
+        message: str,
+        state: str,
+        context: dict[str, Any],
+    ) -> Optional[tuple[str, str, str]]:
+        """Decision cache key for a request, or None if it must not be cached."""
+        # With conversation history the prompt differs per turn, so only
+        # history-free messages ("ok", "approve", "paid") are cached
+        if self.decision_cache_size <= 0 or context.get("conversation_history"):
+            return None
+        return (
+            " ".join(message.lower().split()),
+            state,
+            str(context.get("invoice_id", "")),
         )
 
+    def _cached_decision(self, key: tuple[str, str, str]) -> Optional[RouterDecision]:
+        """Return a cached decision, marking it most recently used."""
+        with self._decision_cache_lock:
+            decision = self._decision_cache.get(key)
+            if decision is None:
+                return None
+            self._decision_cache.move_to_end(key)
         return decision
 
+    def _cache_decision(self, key: tuple[str, str, str], decision: RouterDecision) -> None:
+        """Store a decision, evicting the least recently used when full."""
+        # Decisions are frozen, so callers can share the cached instance
+        with self._decision_cache_lock:
+            self._decision_cache[key] = decision
+            self._decision_cache.move_to_end(key)
+            if len(self._decision_cache) > self.decision_cache_size:
+                self._decision_cache.popitem(last=False)
+
+    def _build_request(
+        self,
+        message: str,
+        state: str,
+        context: dict[str, Any],
+    ) -> tuple[str, dict[str, Any]]:
+        """
+        Build the prompt and extra provider arguments for one routing call.
+
+        Providers that support prompt caching receive the static head of the
+        template (instructions, tools, guard rails and examples, everything
+        before the first placeholder) as a separate `system` argument, so the
+        cached prefix is identical on every call.
+        """
+        prompt = self._build_prompt(message, state, context)
+        if not getattr(self.llm_provider, "supports_prompt_caching", False):
+            return prompt, {}
+
+        parts = self._template_parts()
+        split_at = len(parts[0])
+        if len(parts) == 1 or split_at == 0:
+            return prompt, {}
+        return prompt[split_at:], {"system": prompt[:split_at].rstrip()}
+
+    def _build_batch_request(
+        self,
+        requests: list[tuple[str, str, Optional[dict[str, Any]]]],
+    ) -> tuple[str, dict[str, Any]]:
+        """
+        Build one prompt routing several messages, plus provider arguments.
+
+        The template's instructions (its static head, up to the context
+        section) are reused; each message gets its own numbered context
+        block, and the model is asked for a JSON array of decisions.
+        """
+        head = self._template_parts()[0]
+        context_heading = head.rfind("\n## ")
+        if context_heading != -1:
+            head = head[:context_heading]
+
+        blocks = []
+        for number, (message, state, context) in enumerate(requests, start=1):
+            context = context or {}
+            history = self._format_conversation_history(
+                context.get("conversation_history", [])
+            )
+            blocks.append(
+                f"### Request {number}\n\n"
+                f"- **Current Invoice State**: {state}\n"
+                f"- **Invoice ID** (if known): {context.get('invoice_id', 'Not specified')}\n"
+                f"- **Conversation History**: {history}\n"
+                f"- **User Message**: {message}"
+            )
+        batch = _BATCH_PROMPT.format(count=len(requests), requests="\n\n".join(blocks))
+
+        if getattr(self.llm_provider, "supports_prompt_caching", False):
+            return batch, {"system": head.rstrip()}
+        return f"{head.rstrip()}\n\n{batch}", {}
+
+    def _parse_batch_response(self, response: str, count: int) -> list[Any]:
+        """Decode a batched response into `count` decision dicts (not yet validated)."""
+        try:
+            data = json.loads(response)
+        except json.JSONDecodeError:
+            code_block_match = _CODE_BLOCK_PATTERN.search(response[:_MAX_EXTRACT_CHARS])
+            if code_block_match:
+                json_str = code_block_match.group(1)
+            else:
+                json_str = response[response.find("["):response.rfind("]") + 1]
+            try:
+                data = json.loads(json_str)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON: {e}") from e
+
+        if not isinstance(data, list) or len(data) != count:
+            raise ValueError(f"Expected a JSON array of {count} decisions")
+        return [item if isinstance(item, dict) else None for item in data]
+
     def _build_prompt(
         self,
         message: str,
@@ -401,22 +874,23 @@ class LLMRouter:
         context: dict[str, Any],
     ) -> str:
         """Build the prompt from template."""
-        prompt = self.prompt_template
-
-        # Replace placeholders
         replacements = {
-            "{{user_message}}": message,
-            "{{current_state}}": state,
-            "{{invoice_id}}": context.get("invoice_id", "Not specified"),
-            "{{conversation_history}}": self._format_conversation_history(
+            "user_message": message,
+            "current_state": state,
+            "invoice_id": context.get("invoice_id", "Not specified"),
+            "conversation_history": self._format_conversation_history(
                 context.get("conversation_history", [])
             ),
         }
 
-        for placeholder, value in replacements.items():
-            prompt = prompt.replace(placeholder, str(value))
-
-        return prompt
+        # Join the pre-split template; substituted text (e.g. a user message
+        # containing "{{current_state}}") is not rescanned. Unknown
+        # placeholders are left as they are.
+        parts = list(self._template_parts())
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            parts[i] = str(replacements[name]) if name in replacements else f"{{{{{name}}}}}"
+        return "".join(parts)
 
     def _format_conversation_history(
         self,
@@ -436,37 +910,63 @@ class LLMRouter:
 
     def _parse_response(self, response: str) -> RouterDecision:
         """Parse LLM response into RouterDecision."""
-        # Try to extract JSON from response
-        json_str = self._extract_json(response)
-
-        # Parse JSON
         try:
-            data = json.loads(json_str)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON: {e}") from e
+            # Most responses are bare JSON: one linear parse, no regex
+            data = json.loads(response)
+        except json.JSONDecodeError:
+            # Try to extract JSON from surrounding prose / code fences
+            json_str = self._extract_json(response)
+            try:
+                data = json.loads(json_str)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON: {e}") from e
+
+        return self._decision_from_data(data)
+
+    def _decision_from_data(
+        self,
+        data: dict[str, Any],
+        trusted: bool = False,
+    ) -> RouterDecision:
+        """
+        Validate a decoded response against the RouterDecision schema.
 
-        # Validate against schema
+        Trusted (pre-validated) data is assembled with model_construct,
+        skipping validation; LLM output is always fully validated.
+        """
+        if trusted:
+            fields = dict(data)
+            arguments = data.get("arguments")
+            fields["arguments"] = (
+                ToolArguments.model_construct(**arguments) if arguments else _EMPTY_ARGS
+            )
+            fields["warnings"] = tuple(data.get("warnings", ()))
+            return RouterDecision.model_construct(**fields)
+
+        if data.get("arguments") == {}:
+            # Use the shared empty ToolArguments instead of validating a new one
+            data = {key: value for key, value in data.items() if key != "arguments"}
         try:
-            decision = RouterDecision(**data)
+            return RouterDecision(**data)
         except ValidationError as e:
             raise ValueError(f"Schema validation failed: {e}") from e
 
-        return decision
-
     def _extract_json(self, response: str) -> str:
         """Extract JSON from response, handling markdown code blocks."""
+        # Far beyond any max_tokens response; don't feed it to the regex
+        if len(response) > _MAX_EXTRACT_CHARS:
+            return response.strip()
+
         # Try to find JSON in code block
-        code_block_match = re.search(
-            r"```(?:json)?\s*([\s\S]*?)```",
-            response,
-        )
+        code_block_match = _CODE_BLOCK_PATTERN.search(response)
         if code_block_match:
             return code_block_match.group(1).strip()
 
-        # Try to find raw JSON object
-        json_match = re.search(r"\{[\s\S]*\}", response)
-        if json_match:
-            return json_match.group(0)
+        # Try to find raw JSON object: first "{" through last "}"
+        start = response.find("{")
+        end = response.rfind("}")
+        if start != -1 and end > start:
+            return response[start:end + 1]
 
         # Return as-is and let JSON parser handle it
         return response.strip()
@@ -480,8 +980,8 @@ class LLMRouter:
         warnings = list(decision.warnings)
 
         # Check intent-tool consistency
-        valid_tools = INTENT_TOOL_MAPPING.get(decision.intent, [])
-        if decision.tool not in valid_tools and valid_tools:
+        valid_tools = INTENT_TOOL_MAPPING.get(decision.intent)
+        if valid_tools and decision.tool not in valid_tools:
             warnings.append(
                 f"Tool '{decision.tool}' is not typically used with intent '{decision.intent}'"
             )
@@ -492,18 +992,9 @@ class LLMRouter:
                 f"Tool '{decision.tool}' cannot be executed from state '{state}'"
             )
 
-        # Update decision with any new warnings
-        if warnings != decision.warnings:
-            decision = RouterDecision(
-                intent=decision.intent,
-                tool=decision.tool,
-                arguments=decision.arguments,
-                confidence=decision.confidence,
-                reasoning=decision.reasoning,
-                requires_clarification=decision.requires_clarification,
-                clarification_prompt=decision.clarification_prompt,
-                warnings=warnings,
-            )
+        # Update decision with any new warnings (fields are already valid)
+        if len(warnings) != len(decision.warnings):
+            decision = decision.model_copy(update={"warnings": tuple(warnings)})
 
         return decision
 
@@ -516,7 +1007,7 @@ class LLMRouter:
         return RouterDecision(
             intent=RouterIntent.UNKNOWN,
             tool=RouterTool.NONE,
-            arguments=ToolArguments(),
+            arguments=_EMPTY_ARGS,
             confidence=Confidence.LOW,
             reasoning=f"Routing failed: {error}",
             requires_clarification=True,
@@ -524,5 +1015,5 @@ class LLMRouter:
                 "I'm having trouble understanding your request. "
                 "Could you please rephrase or provide more details?"
             ),
-            warnings=[f"Routing error: {error}"],
+            warnings=(f"Routing error: {error}",),
         )
@@ -3,7 +3,7 @@
 from enum import Enum
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class RouterIntent(str, Enum):
@@ -46,6 +46,8 @@ class Confidence(str, Enum):
 class ToolArguments(BaseModel):
     """Arguments to pass to a tool."""
 
+    model_config = ConfigDict(frozen=True)
+
     invoice_id: Optional[str] = Field(None, description="Invoice identifier")
     reason: Optional[str] = Field(None, description="Reason for action (rejection, dispute)")
     resolution: Optional[str] = Field(None, description="Resolution details for disputes")
@@ -71,14 +73,22 @@ class ToolArguments(BaseModel):
         return v
 
 
+# Shared by every decision without arguments (the common case); the model
+# is frozen, so one all-None instance is safe to reuse
+_EMPTY_ARGS = ToolArguments()
+
+
 class RouterDecision(BaseModel):
     """
     Structured decision from the LLM Router.
 
     This object represents the router's analysis of a user message.
     It does NOT execute any actions - it only provides a recommendation.
+    Decisions are immutable; derive changed ones with model_copy(update=...).
     """
 
+    model_config = ConfigDict(frozen=True, use_enum_values=True)
+
     intent: RouterIntent = Field(
         ...,
         description="The classified intent of the user message",
@@ -88,7 +98,7 @@ class RouterDecision(BaseModel):
         description="The recommended tool to handle this intent",
     )
     arguments: ToolArguments = Field(
-        default_factory=ToolArguments,
+        default_factory=lambda: _EMPTY_ARGS,
         description="Arguments to pass to the tool",
     )
     confidence: Confidence = Field(
@@ -107,14 +117,11 @@ class RouterDecision(BaseModel):
         None,
         description="Question to ask user if clarification is needed",
     )
-    warnings: list[str] = Field(
-        default_factory=list,
+    warnings: tuple[str, ...] = Field(
+        default=(),
         description="Any warnings about potential issues with this request",
     )
 
-    class Config:
-        use_enum_values = True
-
     def is_actionable(self) -> bool:
         """Check if this decision can be acted upon."""
         return (
@@ -133,35 +140,39 @@ class RouterDecision(BaseModel):
 
 
 # Mapping of intents to their valid tools
-INTENT_TOOL_MAPPING: dict[RouterIntent, list[RouterTool]] = {
-    RouterIntent.INVOICE_QUESTION: [RouterTool.GET_INVOICE_STATUS],
-    RouterIntent.INVOICE_APPROVAL: [RouterTool.APPROVE_INVOICE],
-    RouterIntent.INVOICE_REJECTION: [RouterTool.REJECT_INVOICE],
-    RouterIntent.PAYMENT_CONFIRMATION: [RouterTool.CONFIRM_PAYMENT],
-    RouterIntent.INVOICE_DISPUTE: [RouterTool.CREATE_DISPUTE],
-    RouterIntent.REQUEST_INVOICE_COPY: [RouterTool.RESEND_INVOICE],
-    RouterIntent.LIST_INVOICES: [RouterTool.LIST_INVOICES],
-    RouterIntent.GENERAL_QUESTION: [RouterTool.NONE, RouterTool.GET_INVOICE_STATUS],
-    RouterIntent.UNKNOWN: [RouterTool.NONE],
+INTENT_TOOL_MAPPING: dict[RouterIntent, frozenset[RouterTool]] = {
+    RouterIntent.INVOICE_QUESTION: frozenset({RouterTool.GET_INVOICE_STATUS}),
+    RouterIntent.INVOICE_APPROVAL: frozenset({RouterTool.APPROVE_INVOICE}),
+    RouterIntent.INVOICE_REJECTION: frozenset({RouterTool.REJECT_INVOICE}),
+    RouterIntent.PAYMENT_CONFIRMATION: frozenset({RouterTool.CONFIRM_PAYMENT}),
+    RouterIntent.INVOICE_DISPUTE: frozenset({RouterTool.CREATE_DISPUTE}),
+    RouterIntent.REQUEST_INVOICE_COPY: frozenset({RouterTool.RESEND_INVOICE}),
+    RouterIntent.LIST_INVOICES: frozenset({RouterTool.LIST_INVOICES}),
+    RouterIntent.GENERAL_QUESTION: frozenset({RouterTool.NONE, RouterTool.GET_INVOICE_STATUS}),
+    RouterIntent.UNKNOWN: frozenset({RouterTool.NONE}),
 }
 
 
 # States from which each tool can be called
-TOOL_VALID_STATES: dict[RouterTool, list[str]] = {
-    RouterTool.GET_INVOICE_STATUS: ["*"],  # Any state
-    RouterTool.LIST_INVOICES: ["*"],  # Any state (no invoice context needed)
-    RouterTool.APPROVE_INVOICE: ["awaiting_approval"],
-    RouterTool.REJECT_INVOICE: ["awaiting_approval"],
-    RouterTool.CONFIRM_PAYMENT: ["payment_pending"],
-    RouterTool.RESEND_INVOICE: ["invoice_sent", "awaiting_approval", "approved", "payment_pending"],
-    RouterTool.CREATE_DISPUTE: ["approved", "payment_pending", "paid"],
-    RouterTool.RESOLVE_DISPUTE: ["disputed"],
-    RouterTool.CLOSE_INVOICE: ["paid", "rejected"],
-    RouterTool.NONE: ["*"],
+TOOL_VALID_STATES: dict[RouterTool, frozenset[str]] = {
+    RouterTool.GET_INVOICE_STATUS: frozenset({"*"}),  # Any state
+    RouterTool.LIST_INVOICES: frozenset({"*"}),  # Any state (no invoice context needed)
+    RouterTool.APPROVE_INVOICE: frozenset({"awaiting_approval"}),
+    RouterTool.REJECT_INVOICE: frozenset({"awaiting_approval"}),
+    RouterTool.CONFIRM_PAYMENT: frozenset({"payment_pending"}),
+    RouterTool.RESEND_INVOICE: frozenset({"invoice_sent", "awaiting_approval", "approved", "payment_pending"}),
+    RouterTool.CREATE_DISPUTE: frozenset({"approved", "payment_pending", "paid"}),
+    RouterTool.RESOLVE_DISPUTE: frozenset({"disputed"}),
+    RouterTool.CLOSE_INVOICE: frozenset({"paid", "rejected"}),
+    RouterTool.NONE: frozenset({"*"}),
 }
 
+# Tools callable from any state ("*")
+_WILDCARD_TOOLS = frozenset(
+    tool for tool, states in TOOL_VALID_STATES.items() if "*" in states
+)
+
 
 def is_tool_valid_for_state(tool: RouterTool, state: str) -> bool:
     """Check if a tool can be called from the given state."""
-    valid_states = TOOL_VALID_STATES.get(tool, [])
-    return "*" in valid_states or state in valid_states
+    return tool in _WILDCARD_TOOLS or state in TOOL_VALID_STATES.get(tool, ())
@@ -0,0 +1,246 @@
+"""
+Semantic response cache for short user utterances.
+
+Paraphrases of the same request ("pay INV-1 now" / "I want to pay INV-1")
+miss an exact-match cache. SemanticCache embeds the utterance and returns
+a stored response when a previous utterance in the same scope is close
+enough in cosine similarity.
+
+Optional dependencies:
+- sentence-transformers: default embedder (all-MiniLM-L6-v2)
+- hnswlib: approximate nearest-neighbour index; without it entries are
+  scanned linearly, which is fine for small caches
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[str], Sequence[float]]
+
+# Tokens that must match exactly between a query and a cached utterance:
+# anything containing a digit (invoice IDs, amounts) and acronyms such as
+# currency codes, so "approve INV-1001" never serves a cached answer for
+# "approve INV-1002", nor "pay in USD" for "pay in EUR"
+_ENTITY_PATTERN = re.compile(r"\b\w*\d[\w-]*|\b[A-Z]{2,}\b")
+
+# Negations and action words also have to match exactly: "approve INV-12"
+# and "don't approve INV-12" embed close together but mean the opposite
+_KEYWORD_PATTERN = re.compile(
+    r"\b(?:not|no|never|nor|without|cannot|\w+n[\'\u2019]t"
+    r"|dont|doesnt|didnt|isnt|arent|wasnt|werent|hasnt|havent|hadnt|cant|wont"
+    r"|wouldnt|shouldnt|couldnt"
+    r"|approv\w*|accept\w*|proceed\w*|reject\w*|declin\w*|refus\w*"
+    r"|pa(?:y|id)\w*|transfer\w*|disput\w*|contest\w*|incorrect|wrong|error\w*"
+    r"|resend\w*|cop(?:y|ies)|cancel\w*)\b",
+    re.IGNORECASE,
+)
+
+# Same-scope nearest neighbours checked per lookup before entity filtering
+_CANDIDATES = 8
+
+
+def _entities(text: str) -> frozenset[str]:
+    """Exact-match tokens of an utterance (case-insensitive)."""
+    return frozenset(
+        token.lower()
+        for pattern in (_ENTITY_PATTERN, _KEYWORD_PATTERN)
+        for token in pattern.findall(text)
+    )
+
+
+def _normalize(vector: Sequence[float]) -> list[float]:
+    """Scale a vector to unit length so a dot product is cosine similarity."""
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache keyed by (scope, utterance).
+
+    The scope is matched exactly (e.g. invoice state and conversation so
+    far), the utterance semantically: a hit needs cosine similarity of at
+    least `threshold` and identical entity tokens. The cache stops adding
+    entries once `max_entries` is reached.
+    """
+
+    DEFAULT_MODEL = "all-MiniLM-L6-v2"
+
+    def __init__(
+        self,
+        threshold: float = 0.93,
+        max_entries: int = 10000,
+        embedder: Optional[Embedder] = None,
+        model_name: str = DEFAULT_MODEL,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit.
+            max_entries: Maximum number of cached utterances.
+            embedder: Function mapping text to a vector. Defaults to a
+                sentence-transformers model, loaded on first use.
+            model_name: sentence-transformers model for the default embedder.
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.model_name = model_name
+        self._embedder = embedder
+        self._lock = threading.Lock()
+
+        # Parallel entry storage; list position is the hnswlib label
+        self._scopes: list[str] = []
+        self._entities: list[frozenset[str]] = []
+        self._texts: list[str] = []
+        self._responses: list[str] = []
+        self._vectors: list[list[float]] = []
+        self._index: Optional[Any] = None
+
+    def __len__(self) -> int:
+        return len(self._responses)
+
+    @property
+    def embedder(self) -> Embedder:
+        """Lazy-load the default sentence-transformers embedder."""
+        if self._embedder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise ImportError(
+                    "sentence-transformers package not installed. "
+                    "Run: pip install sentence-transformers"
+                )
+            model = SentenceTransformer(self.model_name)
+            self._embedder = lambda text: model.encode(text).tolist()
+        return self._embedder
+
+    def embed(self, text: str) -> list[float]:
+        """Unit-length embedding of an utterance, reusable across get() and put()."""
+        return _normalize(self.embedder(text))
+
+    def get(
+        self,
+        scope: str,
+        text: str,
+        vector: Optional[list[float]] = None,
+    ) -> Optional[str]:
+        """
+        Return the cached response for a similar utterance in scope, if any.
+
+        Args:
+            scope: Exact-match scope of the utterance.
+            text: The utterance.
+            vector: embed(text), if already computed.
+        """
+        if not self._responses:
+            return None
+        # Embedding runs outside the lock so lookups do not queue behind inference
+        if vector is None:
+            vector = self.embed(text)
+        entities = _entities(text)
+
+        with self._lock:
+            for label, similarity in self._nearest(scope, vector):
+                if similarity < self.threshold:
+                    break
+                if self._scopes[label] == scope and self._entities[label] == entities:
+                    logger.debug(
+                        f"Semantic cache hit ({similarity:.3f}): "
+                        f"{text[:50]!r} ~ {self._texts[label][:50]!r}"
+                    )
+                    return self._responses[label]
+        return None
+
+    def put(
+        self,
+        scope: str,
+        text: str,
+        response: str,
+        vector: Optional[list[float]] = None,
+    ) -> None:
+        """Cache a response for an utterance in scope (vector: embed(text), if known)."""
+        if len(self._responses) >= self.max_entries:
+            return
+        if vector is None:
+            vector = self.embed(text)
+        with self._lock:
+            if len(self._responses) >= self.max_entries:
+                return
+            self._add(scope, text, response, vector)
+
+    def save(self, path: Path) -> None:
+        """Persist all entries (with their vectors) as JSON."""
+        with self._lock:
+            entries = [
+                {"scope": scope, "text": text, "response": response, "vector": vector}
+                for scope, text, response, vector in zip(
+                    self._scopes, self._texts, self._responses, self._vectors
+                )
+            ]
+        Path(path).write_text(json.dumps(entries), encoding="utf-8")
+
+    def load(self, path: Path) -> None:
+        """Add entries previously written by save()."""
+        entries = json.loads(Path(path).read_text(encoding="utf-8"))
+        with self._lock:
+            for entry in entries[: self.max_entries - len(self._responses)]:
+                self._add(entry["scope"], entry["text"], entry["response"], entry["vector"])
+
+    def _add(self, scope: str, text: str, response: str, vector: list[float]) -> None:
+        """Append an entry and index its vector (lock held)."""
+        label = len(self._responses)
+        self._scopes.append(scope)
+        self._entities.append(_entities(text))
+        self._texts.append(text)
+        self._responses.append(response)
+        self._vectors.append(vector)
+
+        index = self._get_index(len(vector))
+        if index is not None:
+            index.add_items([vector], [label])
+
+    def _get_index(self, dim: int) -> Optional[Any]:
+        """Create the hnswlib index on first use, or None without hnswlib."""
+        if self._index is None:
+            try:
+                import hnswlib
+            except ImportError:
+                return None
+            self._index = hnswlib.Index(space="cosine", dim=dim)
+            self._index.init_index(max_elements=self.max_entries)
+        return self._index
+
+    def _nearest(self, scope: str, vector: list[float]) -> list[tuple[int, float]]:
+        """(label, cosine similarity) of the closest entries, most similar first."""
+        if self._index is not None:
+            # The index spans every scope: widen k until enough same-scope
+            # candidates are found, the index is exhausted, or the results
+            # fall below the threshold
+            size = len(self._responses)
+            k = _CANDIDATES
+            while True:
+                k = min(k, size)
+                labels, distances = self._index.knn_query([vector], k=k)
+                hits = [
+                    (int(label), 1.0 - float(d)) for label, d in zip(labels[0], distances[0])
+                ]
+                in_scope = [hit for hit in hits if self._scopes[hit[0]] == scope]
+                if len(in_scope) >= _CANDIDATES or k == size or hits[-1][1] < self.threshold:
+                    return in_scope[:_CANDIDATES]
+                k *= 2
+
+        scored = [
+            (label, sum(a * b for a, b in zip(vector, other)))
+            for label, other in enumerate(self._vectors)
+            if self._scopes[label] == scope
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:_CANDIDATES]
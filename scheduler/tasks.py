@@ -1,6 +1,10 @@
 """Background task scheduler for invoice automation."""
 
 import asyncio
+import functools
+import heapq
+import inspect
+import itertools
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
@@ -11,6 +15,55 @@ from uuid import uuid4
 
 logger = logging.getLogger(__name__)
 
+# Longest worker wait when no task is pending (schedule() wakes it earlier)
+_IDLE_WAIT_SECONDS = 3600.0
+
+# Scheduled times are naive UTC; heap keys are seconds since this epoch
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _timestamp(when: datetime) -> float:
+    """Seconds since the epoch for a naive UTC datetime."""
+    return (when - _EPOCH).total_seconds()
+
+
+def _reminder_spec(
+    invoice_id: str,
+    customer_phone: str,
+    days_until_due: int,
+    run_at: Optional[datetime] = None,
+) -> dict[str, Any]:
+    """schedule() arguments for a payment reminder."""
+    return {
+        "task_type": "reminder",
+        "payload": {
+            "invoice_id": invoice_id,
+            "customer_phone": customer_phone,
+            "days_until_due": days_until_due,
+        },
+        "run_at": run_at,
+        "priority": TaskPriority.HIGH if days_until_due <= 0 else TaskPriority.NORMAL,
+        "name": f"reminder_{invoice_id}",
+    }
+
+
+def _accepts_keyword(func: Callable[..., Any], name: str) -> bool:
+    """Whether func can be called with the keyword argument `name`."""
+    try:
+        parameters = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(
+        p.name == name or p.kind is inspect.Parameter.VAR_KEYWORD
+        for p in parameters
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_due_date(value: str) -> datetime:
+    """Parse an ISO due date (cached: the same dates recur on every run)."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
 
 class TaskStatus(str, Enum):
     """Task execution status."""
@@ -31,7 +84,7 @@ class TaskPriority(int, Enum):
     CRITICAL = 3
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskResult:
     """Result of a task execution."""
 
@@ -42,7 +95,18 @@ class TaskResult:
     executed_at: datetime = field(default_factory=datetime.utcnow)
 
 
-@dataclass
+def _result_summary(result: Optional[TaskResult]) -> Optional[dict[str, Any]]:
+    """The parts of a task result included in ScheduledTask.to_dict()."""
+    if result is None:
+        return None
+    return {
+        "success": result.success,
+        "message": result.message,
+        "executed_at": result.executed_at.isoformat(),
+    }
+
+
+@dataclass(slots=True)
 class ScheduledTask:
     """Represents a scheduled task."""
 
@@ -73,16 +137,49 @@ class ScheduledTask:
             "priority": self.priority.name,
             "status": self.status.value,
             "payload": self.payload,
-            "result": {
-                "success": self.result.success,
-                "message": self.result.message,
-                "executed_at": self.result.executed_at.isoformat(),
-            } if self.result else None,
+            "result": _result_summary(self.result),
             "retry_count": self.retry_count,
             "created_at": self.created_at.isoformat(),
         }
 
 
+# Reminder messages by due-date position; days is always non-negative
+_REMINDER_TEMPLATES = {
+    "future": (
+        "Reminder: Invoice {invoice_id} is due in {days} days. "
+        "Amount: ${amount}. "
+        "Please ensure payment is made on time."
+    ),
+    "today": (
+        "Reminder: Invoice {invoice_id} is due today. "
+        "Amount: ${amount}. "
+        "Please make payment as soon as possible."
+    ),
+    "overdue": (
+        "Notice: Invoice {invoice_id} was due {days} days ago. "
+        "Amount: ${amount}. "
+        "Please contact us regarding payment."
+    ),
+}
+
+# Follow-up messages by attempt number; later attempts use the final one
+_FOLLOWUP_TEMPLATES = {
+    1: (
+        "Hi! Just following up on invoice {invoice_id}. "
+        "Have you had a chance to review it? "
+        "Let us know if you have any questions."
+    ),
+    2: (
+        "Hello, this is a second follow-up for invoice {invoice_id}. "
+        "Please let us know your payment timeline or if there are any issues."
+    ),
+}
+_FINAL_FOLLOWUP_TEMPLATE = (
+    "Important: Invoice {invoice_id} requires your attention. "
+    "Please contact us immediately regarding payment status."
+)
+
+
 class BaseTask(ABC):
     """Base class for all scheduled tasks."""
 
@@ -151,24 +248,12 @@ class ReminderTask(BaseTask):
             )
 
         # Compose reminder message
-        if days_until_due > 0:
-            message = (
-                f"Reminder: Invoice {invoice_id} is due in {days_until_due} days. "
-                f"Amount: ${invoice.get('amount', 'N/A')}. "
-                "Please ensure payment is made on time."
-            )
-        elif days_until_due == 0:
-            message = (
-                f"Reminder: Invoice {invoice_id} is due today. "
-                f"Amount: ${invoice.get('amount', 'N/A')}. "
-                "Please make payment as soon as possible."
-            )
-        else:
-            message = (
-                f"Notice: Invoice {invoice_id} was due {abs(days_until_due)} days ago. "
-                f"Amount: ${invoice.get('amount', 'N/A')}. "
-                "Please contact us regarding payment."
-            )
+        key = "future" if days_until_due > 0 else "today" if days_until_due == 0 else "overdue"
+        message = _REMINDER_TEMPLATES[key].format_map({
+            "invoice_id": invoice_id,
+            "days": abs(days_until_due),
+            "amount": invoice.get("amount", "N/A"),
+        })
 
         try:
             await self.send_message(customer_phone, message)
@@ -202,6 +287,7 @@ class OverdueCheckTask(BaseTask):
         self,
         list_invoices: Callable[..., list[dict[str, Any]]],
         schedule_reminder: Callable[[str, str, int], None],
+        schedule_reminders: Optional[Callable[[list[tuple[str, str, int]]], Any]] = None,
     ):
         """
         Initialize overdue check task.
@@ -209,38 +295,53 @@ class OverdueCheckTask(BaseTask):
         Args:
             list_invoices: Function to list invoices.
             schedule_reminder: Function to schedule a reminder.
+            schedule_reminders: Optional function scheduling a list of
+                (invoice_id, phone, days) reminders at once; used instead
+                of schedule_reminder when given.
         """
         self.list_invoices = list_invoices
         self.schedule_reminder = schedule_reminder
+        self.schedule_reminders = schedule_reminders
+        self._filters_due_date = _accepts_keyword(list_invoices, "due_before")
 
     async def execute(self, payload: dict[str, Any]) -> TaskResult:
         """Check for overdue invoices."""
         try:
-            # Get all pending payment invoices
-            invoices = self.list_invoices(state="payment_pending")
+            now = datetime.utcnow()
+
+            # Get pending payment invoices, letting the store drop those not
+            # yet due when it can
+            if self._filters_due_date:
+                invoices = self.list_invoices(state="payment_pending", due_before=now)
+            else:
+                invoices = self.list_invoices(state="payment_pending")
 
             overdue_count = 0
-            notified_count = 0
+            reminders = []
 
             for invoice in invoices:
                 due_date_str = invoice.get("due_date")
                 if not due_date_str:
                     continue
 
-                due_date = datetime.fromisoformat(due_date_str.replace("Z", "+00:00"))
-                days_overdue = (datetime.utcnow() - due_date).days
+                due_date = _parse_due_date(due_date_str)
+                days_overdue = (now - due_date).days
 
                 if days_overdue > 0:
                     overdue_count += 1
                     customer_phone = invoice.get("customer_phone")
 
                     if customer_phone:
-                        self.schedule_reminder(
-                            invoice["invoice_id"],
-                            customer_phone,
-                            -days_overdue,  # Negative indicates overdue
-                        )
-                        notified_count += 1
+                        # Negative days indicate overdue
+                        reminders.append((invoice["invoice_id"], customer_phone, -days_overdue))
+
+            if self.schedule_reminders is not None:
+                if reminders:
+                    self.schedule_reminders(reminders)
+            else:
+                for reminder in reminders:
+                    self.schedule_reminder(*reminder)
+            notified_count = len(reminders)
 
             return TaskResult(
                 success=True,
@@ -305,22 +406,8 @@ class PaymentFollowUpTask(BaseTask):
             )
 
         # Compose follow-up message based on attempt number
-        if followup_number == 1:
-            message = (
-                f"Hi! Just following up on invoice {invoice_id}. "
-                "Have you had a chance to review it? "
-                "Let us know if you have any questions."
-            )
-        elif followup_number == 2:
-            message = (
-                f"Hello, this is a second follow-up for invoice {invoice_id}. "
-                "Please let us know your payment timeline or if there are any issues."
-            )
-        else:
-            message = (
-                f"Important: Invoice {invoice_id} requires your attention. "
-                "Please contact us immediately regarding payment status."
-            )
+        template = _FOLLOWUP_TEMPLATES.get(followup_number, _FINAL_FOLLOWUP_TEMPLATE)
+        message = template.format_map({"invoice_id": invoice_id})
 
         try:
             await self.send_message(customer_phone, message)
@@ -351,9 +438,30 @@ class PaymentFollowUpTask(BaseTask):
 class InvoiceScheduler:
     """Main scheduler for invoice-related background tasks."""
 
-    def __init__(self):
-        """Initialize the scheduler."""
+    DEFAULT_MAX_CONCURRENT_TASKS = 10
+
+    def __init__(self, max_concurrent_tasks: int = DEFAULT_MAX_CONCURRENT_TASKS):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrent_tasks: Most due tasks executed at the same time.
+                Handlers are I/O-bound (message sends, store calls), so
+                independent tasks run concurrently up to this limit.
+        """
         self._tasks: dict[str, ScheduledTask] = {}
+        # The same tasks bucketed by status, maintained by _set_status()
+        self._by_status: dict[TaskStatus, dict[str, ScheduledTask]] = {
+            status: {} for status in TaskStatus
+        }
+        # Min-heap of (scheduled_at timestamp, -priority, seq, task_id) for
+        # pending tasks; cancelled or rescheduled entries are skipped when
+        # popped. The unique seq means tuples never compare past it.
+        self._pending_heap: list[tuple[float, int, int, str]] = []
+        self._seq = itertools.count()
+        # Set by schedule() so the worker re-checks the earliest deadline
+        self._wakeup = asyncio.Event()
+        self._concurrency = asyncio.Semaphore(max_concurrent_tasks)
         self._handlers: dict[str, BaseTask] = {}
         self._running = False
         self._task_queue: asyncio.Queue[ScheduledTask] = asyncio.Queue()
@@ -385,19 +493,37 @@ class InvoiceScheduler:
         Returns:
             The scheduled task.
         """
-        task = ScheduledTask(
-            name=name or f"{task_type}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}",
-            task_type=task_type,
-            scheduled_at=run_at or datetime.utcnow(),
-            priority=priority,
-            payload=payload,
-        )
-
-        self._tasks[task.id] = task
+        task = self._add_task(task_type, payload, run_at, priority, name)
+        self._push(task)
+        self._wakeup.set()
         logger.info(f"Scheduled task {task.id} of type {task_type} for {task.scheduled_at}")
 
         return task
 
+    def schedule_bulk(self, specs: list[dict[str, Any]]) -> list[ScheduledTask]:
+        """
+        Schedule several tasks at once.
+
+        The heap is rebuilt once and the worker woken once, instead of
+        once per task.
+
+        Args:
+            specs: Keyword arguments for schedule(), one dict per task.
+
+        Returns:
+            The scheduled tasks, in order.
+        """
+        tasks = [self._add_task(**spec) for spec in specs]
+        if not tasks:
+            return tasks
+
+        self._pending_heap.extend(self._heap_entry(task) for task in tasks)
+        heapq.heapify(self._pending_heap)
+        self._wakeup.set()
+        logger.info(f"Scheduled {len(tasks)} tasks")
+
+        return tasks
+
     def schedule_reminder(
         self,
         invoice_id: str,
@@ -406,17 +532,14 @@ class InvoiceScheduler:
         run_at: Optional[datetime] = None,
     ) -> ScheduledTask:
         """Convenience method to schedule a payment reminder."""
-        return self.schedule(
-            task_type="reminder",
-            payload={
-                "invoice_id": invoice_id,
-                "customer_phone": customer_phone,
-                "days_until_due": days_until_due,
-            },
-            run_at=run_at,
-            priority=TaskPriority.HIGH if days_until_due <= 0 else TaskPriority.NORMAL,
-            name=f"reminder_{invoice_id}",
-        )
+        return self.schedule(**_reminder_spec(invoice_id, customer_phone, days_until_due, run_at))
+
+    def schedule_reminders(
+        self,
+        reminders: list[tuple[str, str, int]],
+    ) -> list[ScheduledTask]:
+        """Schedule (invoice_id, customer_phone, days_until_due) reminders in bulk."""
+        return self.schedule_bulk([_reminder_spec(*reminder) for reminder in reminders])
 
     def schedule_recurring(
         self,
@@ -458,7 +581,7 @@ class InvoiceScheduler:
         """Cancel a scheduled task."""
         task = self._tasks.get(task_id)
         if task and task.status == TaskStatus.PENDING:
-            task.status = TaskStatus.CANCELLED
+            self._set_status(task, TaskStatus.CANCELLED)
             logger.info(f"Cancelled task {task_id}")
             return True
         return False
@@ -469,17 +592,70 @@ class InvoiceScheduler:
 
     def list_pending(self) -> list[ScheduledTask]:
         """List all pending tasks."""
-        return [
-            task for task in self._tasks.values()
-            if task.status == TaskStatus.PENDING
-        ]
+        return list(self._by_status[TaskStatus.PENDING].values())
+
+    def _set_status(self, task: ScheduledTask, status: TaskStatus) -> None:
+        """Change a task's status, moving it to the matching bucket."""
+        self._by_status[task.status].pop(task.id, None)
+        task.status = status
+        self._by_status[status][task.id] = task
+
+    def _add_task(
+        self,
+        task_type: str,
+        payload: dict[str, Any],
+        run_at: Optional[datetime] = None,
+        priority: TaskPriority = TaskPriority.NORMAL,
+        name: Optional[str] = None,
+    ) -> ScheduledTask:
+        """Create and register a pending task (not yet on the heap)."""
+        task = ScheduledTask(
+            name=name or f"{task_type}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}",
+            task_type=task_type,
+            scheduled_at=run_at or datetime.utcnow(),
+            priority=priority,
+            payload=payload,
+        )
+        self._tasks[task.id] = task
+        self._by_status[task.status][task.id] = task
+        return task
+
+    def _heap_entry(self, task: ScheduledTask) -> tuple[float, int, int, str]:
+        """Due-time heap entry for a pending task."""
+        return (_timestamp(task.scheduled_at), -task.priority.value, next(self._seq), task.id)
+
+    def _push(self, task: ScheduledTask) -> None:
+        """Add a pending task to the due-time heap."""
+        heapq.heappush(self._pending_heap, self._heap_entry(task))
+
+    def _pop_due(self, now: datetime) -> list[ScheduledTask]:
+        """
+        Remove the pending tasks due at `now` from the heap.
+
+        Returns:
+            The due tasks, highest priority first, then by scheduled time.
+        """
+        now_ts = _timestamp(now)
+        due = []
+        while self._pending_heap and self._pending_heap[0][0] <= now_ts:
+            when, neg_priority, seq, task_id = heapq.heappop(self._pending_heap)
+            task = self._tasks.get(task_id)
+            # Skip cancelled/finished tasks and entries superseded by a retry
+            if (
+                task is not None
+                and task.status == TaskStatus.PENDING
+                and _timestamp(task.scheduled_at) == when
+            ):
+                due.append((neg_priority, when, seq, task))
+        due.sort()
+        return [entry[3] for entry in due]
 
     async def _execute_task(self, task: ScheduledTask) -> None:
         """Execute a single task."""
         handler = self._handlers.get(task.task_type)
         if not handler:
             logger.error(f"No handler for task type: {task.task_type}")
-            task.status = TaskStatus.FAILED
+            self._set_status(task, TaskStatus.FAILED)
             task.result = TaskResult(
                 success=False,
                 message=f"No handler for task type: {task.task_type}",
@@ -487,7 +663,7 @@ class InvoiceScheduler:
             )
             return
 
-        task.status = TaskStatus.RUNNING
+        self._set_status(task, TaskStatus.RUNNING)
         logger.info(f"Executing task {task.id} ({task.name})")
 
         try:
@@ -495,18 +671,19 @@ class InvoiceScheduler:
             task.result = result
 
             if result.success:
-                task.status = TaskStatus.COMPLETED
+                self._set_status(task, TaskStatus.COMPLETED)
                 logger.info(f"Task {task.id} completed: {result.message}")
             else:
                 if handler.should_retry(result) and task.can_retry:
                     task.retry_count += 1
-                    task.status = TaskStatus.PENDING
+                    self._set_status(task, TaskStatus.PENDING)
                     task.scheduled_at = datetime.utcnow() + timedelta(minutes=5)
+                    self._push(task)
                     logger.warning(
                         f"Task {task.id} failed, retry {task.retry_count}/{task.max_retries}"
                     )
                 else:
-                    task.status = TaskStatus.FAILED
+                    self._set_status(task, TaskStatus.FAILED)
                     logger.error(f"Task {task.id} failed: {result.message}")
 
         except Exception as e:
@@ -516,28 +693,41 @@ class InvoiceScheduler:
                 message=str(e),
                 error="EXCEPTION",
             )
-            task.status = TaskStatus.FAILED
+            self._set_status(task, TaskStatus.FAILED)
+
+    async def _run_with_limit(self, task: ScheduledTask) -> None:
+        """Execute a task once a concurrency slot is free."""
+        async with self._concurrency:
+            await self._execute_task(task)
 
     async def _worker(self) -> None:
         """Background worker that processes tasks."""
         logger.info("Scheduler worker started")
 
         while self._running:
-            # Get pending tasks that are due
-            now = datetime.utcnow()
-            due_tasks = [
-                task for task in self._tasks.values()
-                if task.status == TaskStatus.PENDING and task.scheduled_at <= now
-            ]
-
-            # Sort by priority (higher first) then by scheduled time
-            due_tasks.sort(key=lambda t: (-t.priority.value, t.scheduled_at))
-
-            for task in due_tasks:
-                await self._execute_task(task)
+            # Cleared before popping, so a schedule() during execution
+            # still cuts the next wait short
+            self._wakeup.clear()
+
+            # Run the due tasks (only the heap's due prefix) concurrently;
+            # slots are taken in order, highest priority first
+            due_tasks = self._pop_due(datetime.utcnow())
+            if due_tasks:
+                await asyncio.gather(
+                    *(self._run_with_limit(task) for task in due_tasks),
+                    return_exceptions=True,
+                )
 
-            # Sleep briefly before checking again
-            await asyncio.sleep(1)
+            # Sleep until the next task is due or a new one is scheduled
+            delay = (
+                max(0.0, self._pending_heap[0][0] - _timestamp(datetime.utcnow()))
+                if self._pending_heap
+                else _IDLE_WAIT_SECONDS
+            )
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except TimeoutError:
+                pass
 
         logger.info("Scheduler worker stopped")
 
@@ -563,9 +753,11 @@ class InvoiceScheduler:
 
     def get_stats(self) -> dict[str, Any]:
         """Get scheduler statistics."""
-        status_counts = {}
-        for task in self._tasks.values():
-            status_counts[task.status.value] = status_counts.get(task.status.value, 0) + 1
+        status_counts = {
+            status.value: len(tasks)
+            for status, tasks in self._by_status.items()
+            if tasks
+        }
 
         return {
             "total_tasks": len(self._tasks),
@@ -611,6 +803,7 @@ async def setup_invoice_scheduler(
         OverdueCheckTask(
             list_invoices,
             lambda inv_id, phone, days: scheduler.schedule_reminder(inv_id, phone, days),
+            scheduler.schedule_reminders,
         ),
     )
 
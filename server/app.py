@@ -147,6 +147,11 @@ async def lifespan(app: FastAPI):
 
     # Cleanup
     logger.info("Shutting down...")
+    shutdown_provider = getattr(app_state.llm_provider, "shutdown", None)
+    if shutdown_provider is not None:
+        shutdown_provider()
+    # A shut-down provider must not be handed to the next app instance
+    get_default_provider.cache_clear()
     app_state.audit_log.close()
 
 
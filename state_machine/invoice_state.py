@@ -189,6 +189,9 @@ class InvoiceFSM:
         self.invoice_id = invoice_id
         self._on_transition = on_transition
         self._history: list[dict[str, Any]] = []
+        # Index of the newest history entry a store has persisted; the
+        # initial entry is never written as a transition
+        self._last_persisted_history_idx = 0
 
         # Validate initial state
         if initial_state not in InvoiceState.all_states():
@@ -1,11 +1,25 @@
 """Tests for database storage."""
 
 import pytest
+from contextlib import contextmanager
 from decimal import Decimal
 from datetime import datetime, timedelta
-
-from database import init_db, reset_engine, DatabaseInvoiceStore
-from database.session import get_engine
+from types import SimpleNamespace
+
+from sqlalchemy import MetaData
+from sqlalchemy.exc import InvalidRequestError
+
+from database import (
+    AuditLogBuffer,
+    DatabaseInvoiceStore,
+    InvoiceHistoryModel,
+    InvoiceModel,
+    flush_audit_rows,
+    init_db,
+    reset_engine,
+)
+from database.audit import AUDIT_COLUMNS
+from database.session import get_engine, session_scope
 from state_machine.invoice_state import InvoiceState
 
 
@@ -47,6 +61,12 @@ class TestDatabaseInvoiceStore:
         with pytest.raises(ValueError, match="already exists"):
             db_store.create_invoice(invoice_id="INV-002")
 
+    def test_create_invoice_persists_metadata(self, db_store):
+        """Test metadata passed at creation is stored."""
+        db_store.create_invoice(invoice_id="INV-META", metadata={"po": "PO-7"})
+
+        assert db_store.get_invoice("INV-META")["metadata"] == {"po": "PO-7"}
+
     def test_get_fsm(self, db_store):
         """Test retrieving FSM from database."""
         db_store.create_invoice(invoice_id="INV-003")
@@ -57,6 +77,18 @@ class TestDatabaseInvoiceStore:
         assert fsm.invoice_id == "INV-003"
         assert fsm.current_state == InvoiceState.NEW
 
+    def test_lazy_relationship_load_raises(self, db_store):
+        """Test invoice relationships must be eager-loaded explicitly."""
+        customer = db_store.get_or_create_customer(phone="+1234567899")
+        db_store.create_invoice(invoice_id="INV-LAZY", customer_id=customer["id"])
+
+        with session_scope() as session:
+            invoice = session.get(InvoiceModel, "INV-LAZY")
+            with pytest.raises(InvalidRequestError):
+                invoice.history
+            with pytest.raises(InvalidRequestError):
+                invoice.customer
+
     def test_get_nonexistent_fsm(self, db_store):
         """Test retrieving non-existent invoice returns None."""
         fsm = db_store.get_fsm("INV-NONEXISTENT")
@@ -106,6 +138,19 @@ class TestDatabaseInvoiceStore:
         assert "INV-008" in new_ids
         assert "INV-007" in sent_ids
 
+    def test_list_invoices_filter_by_due_date(self, db_store):
+        """Test listing invoices due before a given time."""
+        now = datetime.utcnow()
+        db_store.create_invoice(invoice_id="INV-DUE-1", due_date=now - timedelta(days=2))
+        db_store.create_invoice(invoice_id="INV-DUE-2", due_date=now + timedelta(days=2))
+        db_store.create_invoice(invoice_id="INV-DUE-3")
+
+        invoice_ids = [inv["invoice_id"] for inv in db_store.list_invoices(due_before=now)]
+
+        assert "INV-DUE-1" in invoice_ids
+        assert "INV-DUE-2" not in invoice_ids
+        assert "INV-DUE-3" not in invoice_ids
+
     def test_get_invoice_details(self, db_store):
         """Test getting invoice details."""
         db_store.create_invoice(
@@ -143,6 +188,27 @@ class TestDatabaseInvoiceStore:
         assert invoice["amount"] == "150.00"
         assert invoice["description"] == "Updated description"
 
+    def test_cached_invoice_invalidated_on_writes(self, db_store):
+        """Test cached reads are refreshed after update_invoice and save_fsm."""
+        fsm = db_store.create_invoice(
+            invoice_id="INV-CACHE",
+            amount=Decimal("100.00"),
+        )
+
+        # Warm both caches, then mutate the returned copies
+        db_store.get_invoice("INV-CACHE")["amount"] = "0"
+        db_store.get_fsm("INV-CACHE")._history.clear()
+        assert db_store.get_invoice("INV-CACHE")["amount"] == "100.00"
+        assert len(db_store.get_fsm("INV-CACHE").history) == 1
+
+        db_store.update_invoice(invoice_id="INV-CACHE", amount=Decimal("175.00"))
+        assert db_store.get_invoice("INV-CACHE")["amount"] == "175.00"
+
+        fsm.trigger("send_invoice")
+        db_store.save_fsm(fsm)
+        assert db_store.get_invoice("INV-CACHE")["state"] == InvoiceState.INVOICE_SENT
+        assert db_store.get_fsm("INV-CACHE").current_state == InvoiceState.INVOICE_SENT
+
     def test_update_nonexistent_invoice(self, db_store):
         """Test updating non-existent invoice returns False."""
         result = db_store.update_invoice(
@@ -255,6 +321,21 @@ class TestConversationOperations:
         assert history[1]["content"] == "First response"
         assert history[2]["content"] == "Second message"
 
+    def test_save_conversations_bulk(self, db_store):
+        """Test saving many conversation messages at once."""
+        customer = db_store.get_or_create_customer(phone="+1234567895")
+
+        db_store.save_conversations_bulk([
+            {"customer_id": customer["id"], "role": "user", "content": f"Message {i}"}
+            for i in range(50)
+        ])
+        db_store.save_conversations_bulk([])
+
+        history = db_store.get_conversation_history(customer["id"], limit=100)
+
+        assert len(history) == 50
+        assert {msg["content"] for msg in history} == {f"Message {i}" for i in range(50)}
+
 
 class TestAuditOperations:
     """Test audit log operations."""
@@ -286,6 +367,17 @@ class TestAuditOperations:
         actions = [log["action"] for log in logs]
         assert all(a == "invoice_created" for a in actions)
 
+    def test_log_audits_bulk(self, db_store):
+        """Test logging many audit entries at once gives each its own entry_id."""
+        db_store.log_audits_bulk([
+            {"action": "reminder_sent", "invoice_id": f"INV-B{i}"} for i in range(3)
+        ])
+
+        logs = db_store.get_audit_log(action="reminder_sent")
+
+        assert len(logs) == 3
+        assert len({log["entry_id"] for log in logs}) == 3
+
 
 class TestStatistics:
     """Test statistics operations."""
@@ -336,3 +428,182 @@ class TestHistoryPersistence:
         assert "send_invoice" in triggers
         assert "request_approval" in triggers
         assert "approve" in triggers
+
+    def test_resaving_fsm_does_not_duplicate_history(self, db_store):
+        """Test saving the same transition twice records it once."""
+        fsm = db_store.create_invoice(invoice_id="INV-HIST-002")
+
+        fsm.trigger("send_invoice")
+        db_store.save_fsm(fsm)
+        db_store.save_fsm(fsm)
+
+        loaded_fsm = db_store.get_fsm("INV-HIST-002")
+        triggers = [h["trigger"] for h in loaded_fsm.history]
+        assert triggers.count("send_invoice") == 1
+
+    def test_save_fsm_persists_all_unsaved_transitions(self, db_store):
+        """Test transitions made between saves are all written in one save."""
+        fsm = db_store.create_invoice(invoice_id="INV-HIST-003")
+
+        fsm.trigger("send_invoice")
+        fsm.trigger("request_approval")
+        fsm.trigger("approve")
+        db_store.save_fsm(fsm)
+
+        loaded_fsm = db_store.get_fsm("INV-HIST-003")
+        triggers = [h["trigger"] for h in loaded_fsm.history]
+        assert triggers == ["created", "send_invoice", "request_approval", "approve"]
+
+    def test_repeated_transitions_are_all_persisted(self, db_store):
+        """Test a transition taken twice is stored twice."""
+        fsm = db_store.create_invoice(invoice_id="INV-HIST-004")
+
+        for trigger in (
+            "send_invoice",
+            "request_approval",
+            "approve",
+            "dispute",
+            "resolve_dispute",
+            "approve",
+            "dispute",
+        ):
+            fsm.trigger(trigger)
+            db_store.save_fsm(fsm)
+
+        loaded_fsm = db_store.get_fsm("INV-HIST-004")
+        triggers = [h["trigger"] for h in loaded_fsm.history]
+        assert triggers.count("approve") == 2
+        assert triggers.count("dispute") == 2
+
+    def test_save_fsm_on_table_without_dedup_constraint(self):
+        """Test history tables created before uq_history_dedup still accept saves."""
+        reset_engine()
+        engine = init_db("sqlite:///:memory:")
+        history = InvoiceHistoryModel.__table__
+        metadata = MetaData()
+        InvoiceModel.__table__.to_metadata(metadata)
+        legacy = history.to_metadata(metadata)
+        legacy.constraints = {c for c in legacy.constraints if c.name != "uq_history_dedup"}
+        with engine.begin() as conn:
+            history.drop(conn)
+            legacy.create(conn)
+
+        try:
+            store = DatabaseInvoiceStore()
+            fsm = store.create_invoice(invoice_id="INV-HIST-005")
+            fsm.trigger("send_invoice")
+            store.save_fsm(fsm)
+            store.save_fsm(fsm)
+
+            triggers = [h["trigger"] for h in store.get_fsm("INV-HIST-005").history]
+            assert triggers == ["created", "send_invoice"]
+        finally:
+            reset_engine()
+
+
+class TestSharedSession:
+    """Test running store operations in one caller-owned transaction."""
+
+    def test_operations_commit_together(self, db_store):
+        """Test a request-scoped session commits all writes at once."""
+        with session_scope() as session:
+            store = DatabaseInvoiceStore(session=session)
+            fsm = store.create_invoice(invoice_id="INV-TX-001")
+            fsm.trigger("send_invoice")
+            store.save_fsm(fsm)
+            store.log_audit(action="invoice_sent", invoice_id="INV-TX-001")
+
+            assert store.get_fsm("INV-TX-001").current_state == InvoiceState.INVOICE_SENT
+
+        assert db_store.get_invoice("INV-TX-001")["state"] == InvoiceState.INVOICE_SENT
+        assert len(db_store.get_audit_log(invoice_id="INV-TX-001")) == 1
+
+    def test_operations_roll_back_together(self, db_store):
+        """Test an error discards every write made in the request."""
+        with pytest.raises(RuntimeError):
+            with session_scope() as session:
+                store = DatabaseInvoiceStore(session=session)
+                store.create_invoice(invoice_id="INV-TX-002")
+                raise RuntimeError("handler failed")
+
+        assert db_store.get_invoice("INV-TX-002") is None
+
+
+class TestAuditLogBuffer:
+    """Test buffered audit ingestion."""
+
+    def test_buffer_flushes_in_batches(self, db_store):
+        """Test entries are held until the buffer fills or is flushed."""
+        buffer = AuditLogBuffer(max_rows=3, flush_interval=60)
+
+        buffer.add(action="reminder_sent", invoice_id="INV-BUF")
+        buffer.add(action="reminder_sent", invoice_id="INV-BUF", details={"n": 2})
+        assert db_store.get_audit_log(invoice_id="INV-BUF") == []
+
+        buffer.add(action="reminder_sent", invoice_id="INV-BUF")
+        assert len(buffer) == 0
+        assert len(db_store.get_audit_log(invoice_id="INV-BUF")) == 3
+
+        buffer.add(action="payment_confirmed", invoice_id="INV-BUF")
+        assert buffer.flush() == 1
+        logs = db_store.get_audit_log(invoice_id="INV-BUF", action="payment_confirmed")
+        assert len(logs) == 1
+
+    class FakeCopyCursor:
+        """DB-API cursor exposing both psycopg2 and psycopg (3) COPY APIs."""
+
+        def __init__(self) -> None:
+            self.sql: list[str] = []
+            self.rows: list[list] = []
+            self.csv = ""
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info) -> None:
+            pass
+
+        @contextmanager
+        def copy(self, sql):
+            self.sql.append(sql)
+            yield SimpleNamespace(write_row=self.rows.append)
+
+        def copy_expert(self, sql, file):
+            self.sql.append(sql)
+            self.csv = file.read()
+
+    def _copy_engine(self, driver: str):
+        cursor = self.FakeCopyCursor()
+        conn = SimpleNamespace(
+            cursor=lambda: cursor,
+            commit=lambda: None,
+            rollback=lambda: None,
+            close=lambda: None,
+        )
+        engine = SimpleNamespace(
+            dialect=SimpleNamespace(name="postgresql", driver=driver),
+            raw_connection=lambda: conn,
+        )
+        return engine, cursor
+
+    def test_psycopg_copy_writes_rows(self):
+        """Test psycopg (3) engines stream rows through cursor.copy()."""
+        engine, cursor = self._copy_engine("psycopg")
+
+        flush_audit_rows([{"action": "reminder_sent", "details": {"n": 1}}], engine)
+
+        assert cursor.sql[0].endswith("FROM STDIN")
+        (row,) = cursor.rows
+        assert row[AUDIT_COLUMNS.index("action")] == "reminder_sent"
+        assert row[AUDIT_COLUMNS.index("details")] == '{"n": 1}'
+        assert row[AUDIT_COLUMNS.index("invoice_id")] is None
+
+    def test_psycopg2_copy_writes_csv(self):
+        """Test psycopg2 engines stream CSV through copy_expert()."""
+        engine, cursor = self._copy_engine("psycopg2")
+
+        flush_audit_rows([{"action": "reminder_sent"}], engine)
+
+        assert "FORMAT csv" in cursor.sql[0]
+        assert "reminder_sent" in cursor.csv
+        assert "\\N" in cursor.csv
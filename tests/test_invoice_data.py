@@ -4,6 +4,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 
 import pytest
+from pydantic import ValidationError
 
 from database.invoice_data import (
     InvoiceAddress,
@@ -69,6 +70,76 @@ class TestLineItem:
         assert "subtotal" in data
         assert "total" in data
 
+    def test_amounts_rounded_to_cents(self):
+        """Test line amounts are rounded half up to whole cents."""
+        item = LineItem(
+            description="Hosting",
+            quantity=Decimal("1"),
+            unit_price=Decimal("499.00"),
+            tax_rate=Decimal("8.5"),
+        )
+
+        assert item.subtotal_cents == 49900
+        assert item.tax_cents == 4242
+        assert item.tax_amount == Decimal("42.42")
+        assert item.total == Decimal("541.42")
+
+    def test_line_item_ids(self):
+        """Test generated ids are unique and explicit ids are kept."""
+        first = LineItem(description="A", unit_price=Decimal("1"))
+        second = LineItem(description="B", unit_price=Decimal("1"))
+        legacy = LineItem(
+            id="0f8fad5b-d9cb-469f-a165-70867728950e",
+            description="C",
+            unit_price=Decimal("1"),
+        )
+
+        assert first.id != second.id
+        assert first.id.startswith("li-")
+        assert legacy.id == "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+    def test_line_item_is_immutable(self):
+        """Test line items are frozen so cached amounts stay valid."""
+        item = LineItem(
+            description="Service",
+            quantity=Decimal("2"),
+            unit_price=Decimal("75.00"),
+        )
+
+        assert item.subtotal == Decimal("150.00")
+        with pytest.raises(ValidationError):
+            item.quantity = Decimal("3")
+        assert item.subtotal == Decimal("150.00")
+
+    def test_copy_with_update_recomputes_amounts(self):
+        """Test model_copy(update=...) does not keep the original's amounts."""
+        item = LineItem(
+            description="Service",
+            quantity=Decimal("2"),
+            unit_price=Decimal("10.00"),
+            tax_rate=Decimal("10"),
+        )
+        assert item.total == Decimal("22.00")
+
+        copy = item.model_copy(update={"quantity": Decimal("5")})
+
+        assert copy.id == item.id
+        assert copy.quantity == Decimal("5")
+        assert copy.subtotal == Decimal("50.00")
+        assert copy.tax_amount == Decimal("5.00")
+        assert copy.total == Decimal("55.00")
+        assert (copy.subtotal_cents, copy.tax_cents) == (5000, 500)
+        assert item.total == Decimal("22.00")
+        assert (item.subtotal_cents, item.tax_cents) == (2000, 200)
+
+    def test_validated_copy_recomputes_cents(self):
+        """Test re-validating an item derives its cents from the new fields."""
+        item = LineItem(description="Service", quantity=Decimal("2"), unit_price=Decimal("10.00"))
+
+        revalidated = LineItem.model_validate(item.model_dump() | {"unit_price": Decimal("0.10")})
+
+        assert revalidated.subtotal_cents == 20
+
 
 class TestInvoiceAddress:
     """Test InvoiceAddress model."""
@@ -137,6 +208,25 @@ class TestPaymentTerms:
 
         assert "2% 10, Net 30" in terms.description
 
+    def test_default_terms_shared_and_immutable(self):
+        """Test invoices share one frozen default PaymentTerms."""
+        first = InvoiceData(invoice_id="INV-001")
+        second = InvoiceData(invoice_id="INV-002")
+
+        assert first.payment_terms is second.payment_terms
+        with pytest.raises(ValidationError):
+            first.payment_terms.due_days = 60
+
+    def test_to_dict_reflects_copies(self):
+        """Test to_dict of an updated copy shows the new values."""
+        terms = PaymentTerms(due_days=45)
+        assert terms.to_dict()["due_days"] == 45
+
+        data = terms.model_copy(update={"due_days": 7}).to_dict()
+
+        assert data["due_days"] == 7
+        assert terms.to_dict()["due_days"] == 45
+
 
 class TestInvoiceData:
     """Test InvoiceData model."""
@@ -200,6 +290,44 @@ class TestInvoiceData:
         assert len(invoice.line_items) == 0
         assert invoice.subtotal == Decimal("0")
 
+    def test_remove_middle_line_item(self):
+        """Test removing one item keeps the others in order and updates totals."""
+        invoice = InvoiceData(invoice_id="INV-001")
+        first = invoice.add_line_item(description="A", unit_price=Decimal("10.00"))
+        middle = invoice.add_line_item(description="B", unit_price=Decimal("20.00"))
+        last = invoice.add_line_item(description="C", unit_price=Decimal("30.00"))
+
+        assert invoice.remove_line_item(middle.id) is True
+        assert invoice.remove_line_item("missing") is False
+        assert invoice.line_items == [first, last]
+        assert invoice.subtotal == Decimal("40.00")
+
+    def test_totals_for_many_line_items(self):
+        """Test totals over many line items match the per-item amounts."""
+        items = [
+            LineItem(description=f"Item {i}", unit_price=Decimal("1.25"), tax_rate=Decimal("8.875"))
+            for i in range(128)
+        ]
+        invoice = InvoiceData(invoice_id="INV-001", line_items=items)
+
+        assert invoice.subtotal == sum(item.subtotal for item in items)
+        assert invoice.tax_total == sum(item.tax_amount for item in items)
+
+    def test_add_line_item_after_direct_list_change(self):
+        """Test totals stay correct when line_items was replaced directly."""
+        invoice = InvoiceData(invoice_id="INV-001")
+        invoice.add_line_item(description="A", unit_price=Decimal("10.00"))
+        invoice.line_items = [
+            LineItem(description="B", unit_price=Decimal("20.00")),
+            LineItem(description="C", unit_price=Decimal("30.00"), tax_rate=Decimal("10")),
+        ]
+
+        invoice.add_line_item(description="D", unit_price=Decimal("40.00"))
+
+        assert invoice.subtotal == Decimal("90.00")
+        assert invoice.tax_total == Decimal("3.00")
+        assert invoice.total == Decimal("93.00")
+
     def test_balance_due(self):
         """Test balance due calculation."""
         invoice = InvoiceData(invoice_id="INV-001")
@@ -321,6 +449,43 @@ class TestInvoiceData:
         assert len(data["line_items"]) == 1
         assert data["total"] == "100.00"
 
+    def test_to_dict_overdue_fields(self):
+        """Test to_dict reports balance and overdue status consistently."""
+        invoice = InvoiceData(
+            invoice_id="INV-001",
+            due_date=datetime.utcnow() - timedelta(days=3),
+        )
+        invoice.add_line_item(
+            description="Service",
+            quantity=Decimal("1"),
+            unit_price=Decimal("100.00"),
+        )
+        invoice.amount_paid = Decimal("40.00")
+
+        data = invoice.to_dict()
+
+        assert data["balance_due"] == "60.00"
+        assert data["is_paid"] is False
+        assert data["is_overdue"] is True
+        assert data["days_overdue"] == 3
+
+    def test_serialize_batch(self):
+        """Test batch serialization matches per-invoice to_dict overdue fields."""
+        overdue = InvoiceData(
+            invoice_id="INV-001",
+            due_date=datetime.utcnow() - timedelta(days=5, hours=1),
+            total=Decimal("10.00"),
+        )
+        current = InvoiceData(invoice_id="INV-002", total=Decimal("10.00"))
+
+        batch = InvoiceData.serialize_batch([overdue, current])
+
+        assert [d["invoice_id"] for d in batch] == ["INV-001", "INV-002"]
+        assert batch[0]["is_overdue"] is True
+        assert batch[0]["days_overdue"] == 5
+        assert batch[1]["is_overdue"] is False
+        assert batch[1]["days_overdue"] == 0
+
 
 class TestInvoicePDFGenerator:
     """Test InvoicePDFGenerator."""
@@ -346,6 +511,25 @@ class TestInvoicePDFGenerator:
         assert b"Web Development" in pdf_bytes
         assert b"Hosting" in pdf_bytes
 
+    def test_generate_reuses_styles_across_invoices(self):
+        """Test the cached reportlab styles can render several PDFs."""
+        pytest.importorskip("reportlab")
+        generator = InvoicePDFGenerator()
+
+        first = generator.generate(create_sample_invoice())
+        second = generator.generate(create_sample_invoice())
+
+        assert first.startswith(b"%PDF")
+        assert second.startswith(b"%PDF")
+
+    def test_generate_falls_back_without_reportlab(self):
+        """Test generate uses the text format when reportlab is unavailable."""
+        invoice = create_sample_invoice()
+        generator = InvoicePDFGenerator()
+        generator._rl = None
+
+        assert generator.generate(invoice) == generator._generate_simple(invoice)
+
 
 class TestCreateSampleInvoice:
     """Test the sample invoice helper."""
@@ -1,9 +1,16 @@
 """Integration tests for LLM providers."""
 
+import asyncio
 import json
 import pytest
+import threading
+import time
+
+from contextlib import contextmanager
+from types import SimpleNamespace
 
 from llm_router import (
+    ClaudeLLMProvider,
     LLMRouter,
     MockLLMProvider,
     RouterIntent,
@@ -11,6 +18,8 @@ from llm_router import (
     Confidence,
     LLMError,
     LLMTimeoutError,
+    LLMRateLimitError,
+    get_default_provider,
 )
 
 
@@ -151,6 +160,19 @@ class TestMockProviderIntegration:
         assert mock.call_count == 2
         assert "Approve it" in mock.prompts_received[1]
 
+    def test_deterministic_mock_keys_responses_by_prompt(self) -> None:
+        """Test deterministic mode answers by prompt hash and counts repeats."""
+        responses = [f'{{"n": {i}}}' for i in range(5)]
+        mock = MockLLMProvider(responses=responses, deterministic=True)
+        other = MockLLMProvider(responses=responses, deterministic=True)
+
+        first = mock.complete("prompt a")
+        mock.complete("prompt b")
+        assert mock.complete("prompt a") == first
+        assert other.complete("prompt a") == first
+        assert mock.stats == {"hits": 1, "misses": 2}
+        assert mock.call_count == 3
+
     def test_multiple_routing_decisions_isolated(self) -> None:
         """Test multiple routing calls are isolated."""
         mock = MockLLMProvider()
@@ -255,3 +277,369 @@ class TestDeterministicOutput:
         assert decision1.tool == decision2.tool
         assert decision1.arguments.invoice_id == decision2.arguments.invoice_id
         assert decision1.confidence == decision2.confidence
+
+
+class TestClaudePromptCaching:
+    """Test the system prompt is sent as a cacheable block."""
+
+    class FakeMessages:
+        def __init__(self) -> None:
+            self.calls: list[dict] = []
+
+        def create(self, **kwargs):
+            self.calls.append(kwargs)
+            return SimpleNamespace(content=[SimpleNamespace(text="ok")])
+
+    def _provider(self, **kwargs) -> ClaudeLLMProvider:
+        provider = ClaudeLLMProvider(api_key="test-key", **kwargs)
+        provider._client = SimpleNamespace(messages=self.FakeMessages())
+        return provider
+
+    def test_system_prompt_marked_for_caching(self) -> None:
+        """Test system prompt carries an ephemeral cache_control marker."""
+        provider = self._provider()
+
+        assert provider.complete("hello", system="static rules") == "ok"
+
+        call = provider.client.messages.calls[0]
+        assert call["system"] == [{
+            "type": "text",
+            "text": "static rules",
+            "cache_control": {"type": "ephemeral"},
+        }]
+        assert call["messages"] == [{"role": "user", "content": "hello"}]
+
+    def test_cache_ttl_and_no_system(self) -> None:
+        """Test cache_ttl is forwarded and plain prompts send no system block."""
+        provider = self._provider(cache_ttl="1h")
+
+        provider.complete("hello", system="static rules")
+        provider.complete("hello")
+
+        cached, plain = provider.client.messages.calls
+        assert cached["system"][0]["cache_control"] == {"type": "ephemeral", "ttl": "1h"}
+        assert "system" not in plain
+
+    def test_router_sends_static_prompt_as_system(self) -> None:
+        """Test the router's static instructions go in the cached system block."""
+        provider = self._provider()
+        router = LLMRouter(llm_provider=provider)
+
+        router.route("I want to pay INV-1", state="approved")
+
+        call = provider.client.messages.calls[0]
+        assert "## Guard Rails" in call["system"][0]["text"]
+        assert "{{" not in call["system"][0]["text"]
+        user_prompt = call["messages"][0]["content"]
+        assert user_prompt.startswith("approved")
+        assert "I want to pay INV-1" in user_prompt
+
+    def test_bedrock_requests_latency_optimized_inference(self) -> None:
+        """Test Bedrock needs no API key and sends the latency-optimized header."""
+        provider = ClaudeLLMProvider(
+            api_key=None, bedrock=True, model="anthropic.claude", latency_optimized=True
+        )
+        provider._client = SimpleNamespace(messages=self.FakeMessages())
+        provider.complete("hello")
+
+        call = provider.client.messages.calls[0]
+        assert call["extra_headers"] == {provider.BEDROCK_LATENCY_HEADER: "optimized"}
+        assert "extra_headers" not in self._provider()._request_kwargs("hello", None)
+
+    def test_bedrock_latency_optimized_off_by_default(self) -> None:
+        """Test Bedrock requests use standard inference unless asked otherwise."""
+        provider = ClaudeLLMProvider(api_key=None, bedrock=True)
+
+        assert not provider.latency_optimized
+        assert "extra_headers" not in provider._request_kwargs("hello", None)
+
+    def test_bedrock_defaults_to_bedrock_model_id(self, monkeypatch) -> None:
+        """Test Bedrock (explicit or detected) uses a Bedrock inference profile by default."""
+        monkeypatch.setenv("ANTHROPIC_BEDROCK_BASE_URL", "https://bedrock.example")
+
+        detected = ClaudeLLMProvider(api_key=None)
+
+        assert detected.bedrock
+        assert detected.model == ClaudeLLMProvider.DEFAULT_BEDROCK_MODEL
+        assert detected.model.startswith("us.anthropic.")
+        assert ClaudeLLMProvider(api_key="k", bedrock=False).model == ClaudeLLMProvider.DEFAULT_MODEL
+
+    def test_default_provider_and_client_shared(self, monkeypatch) -> None:
+        """Test the default provider and its SDK client are built once per key."""
+        pytest.importorskip("anthropic")
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        get_default_provider.cache_clear()
+
+        provider = get_default_provider()
+        assert get_default_provider() is provider
+        assert isinstance(provider, ClaudeLLMProvider)
+        assert provider.client is ClaudeLLMProvider(api_key="test-key").client
+        assert provider.client is not ClaudeLLMProvider(api_key="other-key").client
+
+        monkeypatch.delenv("ANTHROPIC_API_KEY")
+        assert get_default_provider() is provider
+        get_default_provider.cache_clear()
+        assert not isinstance(get_default_provider(), ClaudeLLMProvider)
+        get_default_provider.cache_clear()
+
+    def test_complete_stream_no_retry_after_first_chunk(self) -> None:
+        """Test streamed chunks pass through and mid-stream errors are final."""
+        provider = self._provider(max_retries=2)
+        streams: list[list] = [["Hel", "lo"], ["par", LLMError("drop", provider="claude", retryable=True)]]
+
+        @contextmanager
+        def stream(**kwargs):
+            def text_stream():
+                for item in streams.pop(0):
+                    if isinstance(item, Exception):
+                        raise item
+                    yield item
+            yield SimpleNamespace(text_stream=text_stream())
+
+        provider.client.messages.stream = stream
+
+        assert list(provider.complete_stream("hi")) == ["Hel", "lo"]
+        assert list(provider.complete_stream("hi")) == ["Hello"]  # cached
+
+        chunks: list[str] = []
+        with pytest.raises(LLMError) as exc_info:
+            for chunk in provider.complete_stream("again"):
+                chunks.append(chunk)
+        assert chunks == ["par"]
+        assert not exc_info.value.retryable
+        assert streams == []
+
+    def test_sdk_errors_classified_by_policy_table(self) -> None:
+        """Test SDK exceptions map to the right LLMError and retryability."""
+        import anthropic
+        import httpx
+
+        provider = self._provider()
+        request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+
+        def status_error(cls, code, headers=None):
+            response = httpx.Response(code, headers=headers, request=request)
+            return cls("error", response=response, body=None)
+
+        timeout = provider._translate_error(anthropic.APITimeoutError(request=request))
+        limited = provider._translate_error(
+            status_error(anthropic.RateLimitError, 429, {"retry-after": "3"})
+        )
+        server = provider._translate_error(status_error(anthropic.InternalServerError, 500))
+        client = provider._translate_error(status_error(anthropic.BadRequestError, 400))
+
+        assert isinstance(timeout, LLMTimeoutError) and timeout.retryable
+        assert isinstance(limited, LLMRateLimitError) and limited.retry_after == 3.0
+        assert server.retryable
+        assert not client.retryable
+
+        # Timeouts and 429s are raised without the SDK exception chained
+        server_sdk_error = status_error(anthropic.InternalServerError, 500)
+        assert provider._error_cause(timeout, server_sdk_error) is None
+        assert provider._error_cause(limited, server_sdk_error) is None
+        assert provider._error_cause(server, server_sdk_error) is server_sdk_error
+
+    def test_extract_text_from_sdk_and_duck_typed_blocks(self) -> None:
+        """Test SDK TextBlocks, text-carrying doubles and non-text blocks."""
+        anthropic = pytest.importorskip("anthropic")
+
+        block = anthropic.types.TextBlock(type="text", text="ok")
+        assert ClaudeLLMProvider._extract_text(SimpleNamespace(content=[block])) == "ok"
+        double = SimpleNamespace(text="ok")
+        assert ClaudeLLMProvider._extract_text(SimpleNamespace(content=[double])) == "ok"
+        with pytest.raises(LLMError, match="Unexpected response format"):
+            ClaudeLLMProvider._extract_text(SimpleNamespace(content=[SimpleNamespace()]))
+
+    def test_identical_prompts_served_from_response_cache(self) -> None:
+        """Test repeated prompts hit the API once; the cache can be disabled."""
+        provider = self._provider()
+        assert provider.complete("hello", system="rules") == "ok"
+        assert provider.complete("hello", system="rules") == "ok"
+        provider.complete("hello", system="other rules")
+        assert len(provider.client.messages.calls) == 2
+
+        uncached = self._provider(response_cache_size=0)
+        uncached.complete("hello")
+        uncached.complete("hello")
+        assert len(uncached.client.messages.calls) == 2
+
+    def test_response_cache_is_thread_safe(self) -> None:
+        """Test concurrent cache reads and evicting writes stay consistent."""
+        provider = self._provider(response_cache_size=8)
+        keys = [bytes([i]) for i in range(32)]
+        errors = []
+
+        def worker() -> None:
+            try:
+                for _ in range(500):
+                    for key in keys:
+                        provider._cache_response(key, "r")
+                        provider._cached_response(key)
+            except Exception as e:  # pragma: no cover - only on a race
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(provider._response_cache) == 8
+
+    def test_retry_backoff_jitter_and_retry_after(self) -> None:
+        """Test backoff is jittered, capped and never shorter than retry-after."""
+        provider = self._provider()
+        timeout = LLMTimeoutError("t", provider="claude", timeout_seconds=1)
+
+        assert 2 <= provider._retry_backoff(1, timeout) <= 3
+        assert provider._retry_backoff(10, timeout) == provider.MAX_BACKOFF
+
+        limited = LLMRateLimitError("r", provider="claude", retry_after=12.0)
+        assert provider._retry_backoff(0, limited) == 12.0
+
+    def test_rate_limit_cooldown_shared_across_instances(self, monkeypatch) -> None:
+        """Test a 429 on one provider delays the next request on another."""
+        monkeypatch.setattr(ClaudeLLMProvider, "_cooldown_until", 0.0)
+
+        ClaudeLLMProvider._start_cooldown(
+            LLMRateLimitError("r", provider="claude", retry_after=0.2)
+        )
+        start = time.monotonic()
+        self._provider().complete("hello")
+
+        assert time.monotonic() - start >= 0.15
+
+    def test_shutdown_interrupts_backoff_and_cooldown(self, monkeypatch) -> None:
+        """Test shutdown() wakes a caller waiting out a long cooldown."""
+        monkeypatch.setattr(ClaudeLLMProvider, "_cooldown_until", 0.0)
+        ClaudeLLMProvider._start_cooldown(
+            LLMRateLimitError("r", provider="claude", retry_after=60.0)
+        )
+        provider = self._provider()
+        threading.Timer(0.05, provider.shutdown).start()
+
+        start = time.monotonic()
+        with pytest.raises(LLMError, match="shutting down") as exc:
+            provider.complete("hello")
+        assert time.monotonic() - start < 5
+        assert not exc.value.retryable
+        assert provider.client.messages.calls == []
+
+        with pytest.raises(LLMError, match="shutting down"):
+            provider._sleep(60.0)
+
+    @pytest.mark.asyncio
+    async def test_acomplete_uses_async_client(self) -> None:
+        """Test acomplete sends the same request on the async client."""
+        messages = self.FakeMessages()
+
+        async def create(**kwargs):
+            return messages.create(**kwargs)
+
+        provider = ClaudeLLMProvider(api_key="test-key")
+        provider._async_client = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+        assert await provider.acomplete("hello", system="static rules") == "ok"
+        assert messages.calls[0]["system"][0]["text"] == "static rules"
+        assert messages.calls[0]["messages"] == [{"role": "user", "content": "hello"}]
+
+    def test_complete_batch_preserves_order(self, monkeypatch) -> None:
+        """Test batch results are returned in prompt order and cached."""
+        monkeypatch.setattr(ClaudeLLMProvider, "_sleep", lambda self, seconds: None)
+
+        class FakeBatches:
+            def __init__(self) -> None:
+                self.requests: list[dict] = []
+                self.polls = 0
+
+            def create(self, requests):
+                self.requests = requests
+                return SimpleNamespace(id="b1", processing_status="in_progress")
+
+            def retrieve(self, batch_id):
+                self.polls += 1
+                return SimpleNamespace(id=batch_id, processing_status="ended")
+
+            def results(self, batch_id):
+                for request in reversed(self.requests):
+                    text = request["params"]["messages"][0]["content"].upper()
+                    yield SimpleNamespace(
+                        custom_id=request["custom_id"],
+                        result=SimpleNamespace(
+                            type="succeeded",
+                            message=SimpleNamespace(content=[SimpleNamespace(text=text)]),
+                        ),
+                    )
+
+        provider = self._provider()
+        batches = FakeBatches()
+        provider.client.messages.batches = batches
+
+        assert provider.complete_batch(["a", "b", "c"]) == ["A", "B", "C"]
+        assert batches.polls == 1
+
+        bedrock = ClaudeLLMProvider(api_key=None, bedrock=True, latency_optimized=True)
+        bedrock._client = SimpleNamespace(messages=SimpleNamespace(batches=FakeBatches()))
+        bedrock.complete_batch(["d"])
+        assert "extra_headers" not in bedrock.client.messages.batches.requests[0]["params"]
+        assert provider.complete("b") == "B"
+        assert provider.client.messages.calls == []
+
+    @pytest.mark.asyncio
+    async def test_acomplete_bounded_by_max_concurrency(self) -> None:
+        """Test no more than max_concurrency async requests run at once."""
+        in_flight = peak = 0
+
+        async def create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return SimpleNamespace(content=[SimpleNamespace(text="ok")])
+
+        provider = ClaudeLLMProvider(api_key="test-key", max_concurrency=2)
+        provider._async_client = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+        await asyncio.gather(*(provider.acomplete(f"p{i}") for i in range(6)))
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_shutdown_from_another_thread_wakes_async_waiters(self) -> None:
+        """Test shutdown() called off the loop interrupts an async backoff wait."""
+        provider = ClaudeLLMProvider(api_key="test-key")
+        provider._bind_loop()
+        waiter = asyncio.create_task(provider._asleep(60.0))
+        await asyncio.sleep(0)
+
+        await asyncio.to_thread(provider.shutdown)
+
+        with pytest.raises(LLMError, match="shutting down"):
+            await asyncio.wait_for(waiter, 5)
+
+    def test_acomplete_rebinds_to_each_event_loop(self) -> None:
+        """Test the async semaphore and client are recreated for a new event loop."""
+        async def create(**kwargs):
+            await asyncio.sleep(0)
+            return SimpleNamespace(content=[SimpleNamespace(text=kwargs["messages"][0]["content"])])
+
+        fake_client = SimpleNamespace(messages=SimpleNamespace(create=create))
+        provider = ClaudeLLMProvider(api_key="test-key", max_concurrency=1)
+        provider._async_client = fake_client
+
+        async def burst(tag: str) -> list[str]:
+            return await asyncio.gather(*(provider.acomplete(f"{tag}{i}") for i in range(3)))
+
+        assert asyncio.run(burst("a")) == ["a0", "a1", "a2"]
+        first_slots = provider._async_slots
+
+        async def second_run() -> list[str]:
+            provider._bind_loop()
+            assert provider._async_client is None
+            provider._async_client = fake_client
+            return await burst("b")
+
+        # Contention on the first loop's semaphore would raise here
+        assert asyncio.run(second_run()) == ["b0", "b1", "b2"]
+        assert provider._async_slots is not first_slots
@@ -2,9 +2,12 @@
 
 import json
 import pytest
+from pydantic import ValidationError
 
 from llm_router import (
     LLMRouter,
+    MockLLMProvider,
+    SemanticCache,
     RouterDecision,
     RouterIntent,
     RouterTool,
@@ -187,6 +190,31 @@ class TestHallucinationPrevention:
         assert decision.tool != RouterTool.CONFIRM_PAYMENT or decision.requires_clarification
 
 
+class TestStubIntentDetection:
+    """Tests for StubLLMProvider keyword scoring."""
+
+    def test_keywords_match_whole_words_across_whitespace(self) -> None:
+        """Test phrases match across line breaks but not inside other words."""
+        stub = StubLLMProvider()
+
+        assert stub._detect_intent("Payment\n  sent for INV-1") == RouterIntent.PAYMENT_CONFIRMATION
+        assert stub._detect_intent("Show me\tall my invoices") == RouterIntent.LIST_INVOICES
+        assert stub._detect_intent("unapproved") == RouterIntent.UNKNOWN
+        assert stub._is_future_payment("I'll PAY you later")
+        assert not stub._is_future_payment("I paid yesterday")
+
+    def test_router_uses_structured_completion(self, monkeypatch) -> None:
+        """Test the router takes the stub's dict without a JSON round-trip."""
+        stub = StubLLMProvider()
+        monkeypatch.setattr(stub, "complete", lambda prompt: pytest.fail("JSON path used"))
+        router = LLMRouter(llm_provider=stub)
+
+        decision = router.route("Approve INV-001", state="awaiting_approval")
+
+        assert decision.intent == RouterIntent.INVOICE_APPROVAL
+        assert json.loads(StubLLMProvider().complete("paid INV-001"))["intent"] == "payment_confirmation"
+
+
 class TestToolMismatch:
     """Test handling of tool-state mismatches."""
 
@@ -259,6 +287,13 @@ class TestInvalidJSONRecovery:
         assert decision.intent == RouterIntent.UNKNOWN
         assert decision.requires_clarification
 
+    def test_extract_json_from_prose_and_oversized_input(self, router: LLMRouter) -> None:
+        """Test unfenced JSON is found and huge garbage is not regex-scanned."""
+        payload = '{"intent": "unknown", "tool": "none"}'
+
+        assert router._extract_json(f"Sure! {payload} Hope that helps.") == payload
+        assert router._extract_json("```" * 100_000) == "```" * 100_000
+
     def test_recover_from_wrong_schema(self, router: LLMRouter) -> None:
         """Test recovery when JSON doesn't match schema."""
         class WrongSchemaProvider:
@@ -368,6 +403,14 @@ class TestRouterDecisionMethods:
         assert exec_dict["tool"] == "approve_invoice"
         assert exec_dict["arguments"]["invoice_id"] == "INV-001"
 
+    def test_empty_arguments_are_shared(self, router: LLMRouter) -> None:
+        """Test argument-less decisions reuse one ToolArguments instance."""
+        default = RouterDecision(intent=RouterIntent.UNKNOWN, tool=RouterTool.NONE)
+        listed = router.route("show my invoices", state="new")
+
+        assert listed.arguments is default.arguments
+        assert listed.to_execution_dict()["arguments"] == {}
+
 
 class TestStateToolValidation:
     """Test state-tool validation functions."""
@@ -428,6 +471,28 @@ class TestEdgeCases:
         assert decision.intent == RouterIntent.UNKNOWN
         assert decision.requires_clarification
 
+    def test_placeholder_in_message_not_substituted(self, router: LLMRouter) -> None:
+        """Test template placeholders typed by the user are left verbatim."""
+        prompt = router._build_prompt("state is {{current_state}}", "new", {})
+
+        assert "state is {{current_state}}" in prompt
+        assert "{{user_message}}" not in prompt
+
+    def test_prompt_template_reloaded_when_file_changes(self, tmp_path) -> None:
+        """Test an edited template file is picked up and drops cached decisions."""
+        import os
+
+        path = tmp_path / "prompt.md"
+        path.write_text("v1 {{user_message}} {{unknown}}", encoding="utf-8")
+        router = LLMRouter(prompt_path=path)
+        assert router._build_prompt("hi", "new", {}) == "v1 hi {{unknown}}"
+        router.route("paid INV-001", state="payment_pending")
+
+        path.write_text("v2 {{user_message}}", encoding="utf-8")
+        os.utime(path, ns=(0, 0))
+        assert router._build_prompt("hi", "new", {}) == "v2 hi"
+        assert not router._decision_cache
+
     def test_very_long_message(self, router: LLMRouter) -> None:
         """Test handling of very long message."""
         long_message = "I want to approve invoice INV-001. " * 100
@@ -473,3 +538,194 @@ class TestEdgeCases:
         # Router should work with context
         assert decision is not None
         assert isinstance(decision, RouterDecision)
+
+
+class TestDecisionCache:
+    """Test the LRU cache of routing decisions."""
+
+    def test_repeated_message_skips_llm(self) -> None:
+        """Test normalized repeats hit; state, history and size limits apply."""
+        provider = MockLLMProvider()
+        router = LLMRouter(llm_provider=provider, decision_cache_size=2)
+
+        first = router.route("Approve INV-001", state="awaiting_approval")
+        with pytest.raises(ValidationError):
+            first.reasoning = "caller mutation"
+        second = router.route("  approve   inv-001 ", state="awaiting_approval")
+        assert provider.call_count == 1
+        assert second is first
+
+        router.route("Approve INV-001", state="new")
+        router.route(
+            "Approve INV-001",
+            state="awaiting_approval",
+            context={"conversation_history": [{"role": "user", "content": "hi"}]},
+        )
+        assert provider.call_count == 3
+
+        router.route("paid", state="new")  # evicts the awaiting_approval entry
+        router.route("Approve INV-001", state="awaiting_approval")
+        assert provider.call_count == 5
+
+        router.clear_cache()
+        router.route("paid", state="new")
+        assert provider.call_count == 6
+
+
+class TestRouteBatch:
+    """Test routing several messages in one LLM round-trip."""
+
+    def _decision(self, intent: str, tool: str, invoice_id: str) -> dict:
+        return {
+            "intent": intent,
+            "tool": tool,
+            "arguments": {"invoice_id": invoice_id},
+            "confidence": "high",
+            "reasoning": "Mock response",
+            "requires_clarification": False,
+            "warnings": [],
+        }
+
+    def test_misses_share_one_llm_call(self) -> None:
+        """Test cached messages are reused and the rest cost one call, in order."""
+        provider = MockLLMProvider()
+        provider.set_response(RouterIntent.LIST_INVOICES, RouterTool.LIST_INVOICES)
+        provider.responses.append(json.dumps([
+            self._decision("invoice_approval", "approve_invoice", "INV-001"),
+            self._decision("invoice_rejection", "reject_invoice", "INV-002"),
+        ]))
+        router = LLMRouter(llm_provider=provider)
+        router.route("show my invoices", state="new")
+
+        decisions = router.route_batch([
+            ("approve INV-001", "awaiting_approval", None),
+            ("show my invoices", "new", None),
+            ("reject INV-002", "awaiting_approval", None),
+        ])
+
+        assert provider.call_count == 2
+        assert "exactly\n2 routing decisions" in provider.prompts_received[1]
+        assert [d.intent for d in decisions] == [
+            RouterIntent.INVOICE_APPROVAL,
+            RouterIntent.LIST_INVOICES,
+            RouterIntent.INVOICE_REJECTION,
+        ]
+        router.route("reject INV-002", state="awaiting_approval")
+        assert provider.call_count == 2
+
+    def test_unparseable_batch_routes_singly(self) -> None:
+        """Test a response that is not an array of N decisions falls back to route()."""
+        provider = MockLLMProvider()
+        for _ in range(3):
+            provider.set_response(RouterIntent.LIST_INVOICES, RouterTool.LIST_INVOICES)
+        router = LLMRouter(llm_provider=provider)
+
+        decisions = router.route_batch([
+            ("show my invoices", "new", None),
+            ("list invoices", "new", None),
+        ])
+
+        assert provider.call_count == 3
+        assert [d.intent for d in decisions] == [RouterIntent.LIST_INVOICES] * 2
+
+
+class TestSemanticCache:
+    """Test reuse of routing responses for paraphrased messages."""
+
+    VOCAB = ["pay", "paid", "want", "invoice", "now", "dispute", "please"]
+
+    def _embed(self, text: str) -> list[float]:
+        """Toy bag-of-words embedding over a tiny vocabulary."""
+        words = text.lower().split()
+        return [float(words.count(word)) for word in self.VOCAB] + [0.1]
+
+    def _router(self) -> tuple[LLMRouter, MockLLMProvider]:
+        provider = MockLLMProvider()
+        cache = SemanticCache(threshold=0.8, embedder=self._embed)
+        return LLMRouter(llm_provider=provider, semantic_cache=cache), provider
+
+    def test_paraphrase_in_same_scope_hits(self) -> None:
+        """Test a near-duplicate message skips the LLM call."""
+        router, provider = self._router()
+
+        first = router.route("I want to pay invoice INV-7", state="approved")
+        second = router.route("want to pay invoice INV-7 now", state="approved")
+
+        assert provider.call_count == 1
+        assert second.intent == first.intent
+
+    def test_different_entity_or_state_misses(self) -> None:
+        """Test invoice IDs and state must match exactly for a hit."""
+        router, provider = self._router()
+
+        router.route("I want to pay invoice INV-7", state="approved")
+        router.route("I want to pay invoice INV-8", state="approved")
+        router.route("I want to pay invoice INV-7", state="payment_pending")
+
+        assert provider.call_count == 3
+
+    def test_negation_or_action_word_misses(self) -> None:
+        """Test negations and action words must match exactly for a hit."""
+        router, provider = self._router()
+
+        router.route("please pay invoice INV-7", state="approved")
+        router.route("please don't pay invoice INV-7", state="approved")
+        router.route("please dispute invoice INV-7", state="approved")
+
+        assert provider.call_count == 3
+
+    def test_message_embedded_once_per_miss(self) -> None:
+        """Test a miss reuses the lookup embedding when storing the response."""
+        calls = []
+
+        def embed(text: str) -> list[float]:
+            calls.append(text)
+            return self._embed(text)
+
+        cache = SemanticCache(threshold=0.8, embedder=embed)
+        router = LLMRouter(llm_provider=MockLLMProvider(), semantic_cache=cache)
+
+        router.route("I want to pay invoice INV-7", state="approved")
+
+        assert calls == ["I want to pay invoice INV-7"]
+        assert len(cache) == 1
+
+    def test_structured_provider_skips_cache(self) -> None:
+        """Test providers with complete_structured never consult the cache."""
+        cache = SemanticCache(embedder=lambda text: pytest.fail("embedded"))
+        router = LLMRouter(llm_provider=StubLLMProvider(), semantic_cache=cache)
+
+        router.route("I want to pay invoice INV-7", state="approved")
+
+        assert len(cache) == 0
+
+    def test_index_search_widens_past_other_scopes(self) -> None:
+        """Test a same-scope match outside the global top k is still found."""
+
+        class BruteForceIndex:
+            """Exact stand-in for an hnswlib cosine index."""
+
+            def __init__(self) -> None:
+                self.vectors: list[list[float]] = []
+
+            def add_items(self, vectors, labels) -> None:
+                self.vectors.extend(vectors)
+
+            def knn_query(self, vectors, k):
+                (query,) = vectors
+                ranked = sorted(
+                    range(len(self.vectors)),
+                    key=lambda i: -sum(a * b for a, b in zip(query, self.vectors[i])),
+                )[:k]
+                distances = [
+                    1.0 - sum(a * b for a, b in zip(query, self.vectors[i])) for i in ranked
+                ]
+                return [ranked], [distances]
+
+        cache = SemanticCache(threshold=0.8, embedder=self._embed)
+        cache._index = BruteForceIndex()
+        for n in range(20):
+            cache.put(f"other-{n}", "pay invoice now", "elsewhere")
+        cache.put("approved", "please pay invoice now", "here")
+
+        assert cache.get("approved", "pay invoice now") == "here"
@@ -60,6 +60,19 @@ class TestScheduledTask:
         assert data["task_type"] == "reminder"
         assert data["status"] == "pending"
         assert data["payload"]["invoice_id"] == "INV-001"
+        assert data["result"] is None
+
+    def test_to_dict_with_result(self):
+        """Test the result summary in the dictionary."""
+        task = ScheduledTask(name="test_task", task_type="reminder")
+        task.result = TaskResult(success=True, message="Done", data={"skipped": True})
+
+        data = task.to_dict()
+
+        assert data["result"]["success"] is True
+        assert data["result"]["message"] == "Done"
+        assert "data" not in data["result"]
+        assert not hasattr(task, "__dict__")
 
 
 class TestReminderTask:
@@ -321,6 +334,16 @@ class TestInvoiceScheduler:
         assert stats["running"] is False
         assert "pending" in stats["by_status"]
 
+    def test_get_stats_tracks_status_changes(self, scheduler):
+        """Test status counts follow cancellations."""
+        scheduler.schedule(task_type="reminder", payload={})
+        task = scheduler.schedule(task_type="reminder", payload={})
+        scheduler.cancel(task.id)
+
+        stats = scheduler.get_stats()
+
+        assert stats["by_status"] == {"pending": 1, "cancelled": 1}
+
     @pytest.mark.asyncio
     async def test_start_stop(self, scheduler):
         """Test starting and stopping the scheduler."""
@@ -352,6 +375,79 @@ class TestInvoiceScheduler:
         assert task.status == TaskStatus.COMPLETED
         handler.execute.assert_called_once_with({"key": "value"})
 
+    @pytest.mark.asyncio
+    async def test_worker_runs_only_due_pending_tasks(self, scheduler):
+        """Test the worker runs due tasks by priority, skipping cancelled and future ones."""
+        executed = []
+
+        async def execute(payload):
+            executed.append(payload["n"])
+            return TaskResult(success=True, message="Done")
+
+        handler = AsyncMock()
+        handler.execute.side_effect = execute
+        scheduler.register_handler("test", handler)
+
+        scheduler.schedule(task_type="test", payload={"n": 1})
+        scheduler.schedule(task_type="test", payload={"n": 2}, priority=TaskPriority.CRITICAL)
+        cancelled = scheduler.schedule(task_type="test", payload={"n": 3})
+        future = scheduler.schedule(
+            task_type="test",
+            payload={"n": 4},
+            run_at=datetime.utcnow() + timedelta(hours=1),
+        )
+        scheduler.cancel(cancelled.id)
+
+        await scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+
+        assert executed == [2, 1]
+        assert future.status == TaskStatus.PENDING
+        assert len(scheduler._pending_heap) == 1
+
+    @pytest.mark.asyncio
+    async def test_worker_wakes_for_newly_scheduled_task(self, scheduler):
+        """Test a task scheduled on an idle scheduler runs without polling delay."""
+        handler = AsyncMock()
+        handler.execute.return_value = TaskResult(success=True, message="Done")
+        scheduler.register_handler("test", handler)
+
+        await scheduler.start()
+        await asyncio.sleep(0.01)
+        task = scheduler.schedule(task_type="test", payload={})
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+
+        assert task.status == TaskStatus.COMPLETED
+
+    @pytest.mark.asyncio
+    async def test_worker_runs_due_tasks_concurrently(self):
+        """Test due tasks run concurrently, bounded by max_concurrent_tasks."""
+        scheduler = InvoiceScheduler(max_concurrent_tasks=2)
+        running = 0
+        peak = 0
+
+        async def execute(payload):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return TaskResult(success=True, message="Done")
+
+        handler = AsyncMock()
+        handler.execute.side_effect = execute
+        scheduler.register_handler("test", handler)
+        tasks = [scheduler.schedule(task_type="test", payload={}) for _ in range(4)]
+
+        await scheduler.start()
+        await asyncio.sleep(0.1)
+        await scheduler.stop()
+
+        assert peak == 2
+        assert all(task.status == TaskStatus.COMPLETED for task in tasks)
+
 
 class TestOverdueCheckTask:
     """Test OverdueCheckTask."""
@@ -398,3 +494,43 @@ class TestOverdueCheckTask:
         assert result.success is True
         assert result.data["overdue_count"] == 0
         overdue_task.schedule_reminder.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_passes_due_date_filter_when_supported(self):
+        """Test the due-date filter is pushed to list_invoices only if it accepts it."""
+        calls = []
+
+        def list_with_filter(state=None, due_before=None):
+            calls.append(due_before)
+            return []
+
+        def list_without_filter(state=None):
+            calls.append(state)
+            return []
+
+        await OverdueCheckTask(list_with_filter, MagicMock()).execute({})
+        await OverdueCheckTask(list_without_filter, MagicMock()).execute({})
+
+        assert isinstance(calls[0], datetime)
+        assert calls[1] == "payment_pending"
+
+    @pytest.mark.asyncio
+    async def test_schedules_reminders_in_bulk(self):
+        """Test overdue reminders go to the scheduler in one bulk call."""
+        scheduler = InvoiceScheduler()
+        schedule_reminder = MagicMock()
+        days_ago = (datetime.utcnow() - timedelta(days=3)).isoformat()
+        list_invoices = MagicMock(return_value=[
+            {"invoice_id": f"INV-00{i}", "due_date": days_ago, "customer_phone": "+1234567890"}
+            for i in range(3)
+        ])
+        task = OverdueCheckTask(list_invoices, schedule_reminder, scheduler.schedule_reminders)
+
+        result = await task.execute({})
+
+        assert result.data["notified_count"] == 3
+        schedule_reminder.assert_not_called()
+        pending = scheduler.list_pending()
+        assert [t.name for t in pending] == ["reminder_INV-000", "reminder_INV-001", "reminder_INV-002"]
+        assert all(t.priority == TaskPriority.HIGH for t in pending)
+        assert len(scheduler._pending_heap) == 3
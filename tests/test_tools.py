@@ -22,6 +22,22 @@ def store() -> InMemoryInvoiceStore:
     return InMemoryInvoiceStore()
 
 
+class TestInMemoryInvoiceStore:
+    """Tests for InMemoryInvoiceStore."""
+
+    def test_version_bumped_by_saves(self, store: InMemoryInvoiceStore) -> None:
+        """Test creating and transitioning invoices change the store version."""
+        fsm = store.create_invoice("INV-001")
+        created = store.version
+
+        fsm.trigger("send_invoice")
+        store.save_fsm(fsm)
+        store.get_fsm("INV-001")
+
+        assert created > 0
+        assert store.version == created + 1
+
+
 class TestGetInvoiceStatusTool:
     """Tests for GetInvoiceStatusTool."""
 
@@ -11,6 +11,9 @@ Tests the complete flow:
 These tests mock the WhatsApp API but use real ConversationalAgent logic.
 """
 
+import io
+import sys
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi.testclient import TestClient
@@ -125,6 +128,20 @@ class TestWhatsAppAdapter:
         history = adapter._get_history(phone)
         assert len(history) == 4  # 2 pairs
 
+    def test_history_trimmed_to_max_history(self, adapter):
+        """Test that only the most recent max_history messages are kept."""
+        phone = "1234567890"
+        adapter.max_history = 4
+
+        for i in range(5):
+            adapter.handle_incoming(phone, f"Message {i}")
+
+        history = adapter._get_history(phone)
+        assert len(history) == 4
+        assert history[0]["role"] == "user"
+        assert history[0]["content"] == "Message 3"
+        assert "timestamp" in history[0]
+
     def test_clear_context(self, adapter):
         """Test clearing conversation context."""
         phone = "1234567890"
@@ -135,6 +152,56 @@ class TestWhatsAppAdapter:
         adapter.clear_context(phone)
         assert len(adapter._get_history(phone)) == 0
 
+    def test_handle_incoming_stream_records_history(self, adapter):
+        """Test streamed response is yielded in chunks and saved to history."""
+        phone = "1234567890"
+        adapter.agent.llm_provider.complete_stream = lambda prompt: iter(
+            ["Hello ", "there", ", how can I help?"]
+        )
+
+        chunks = list(adapter.handle_incoming_stream(phone, "Hello"))
+
+        assert chunks == ["Hello ", "there", ", how can I help?"]
+        history = adapter._get_history(phone)
+        assert len(history) == 2
+        assert history[-1]["content"] == "Hello there, how can I help?"
+
+    def test_handle_incoming_stream_executes_tool_calls(self, adapter, orchestrator):
+        """Test tool calls in a streamed response are executed, not streamed raw."""
+        orchestrator.create_invoice("INV-001")
+        adapter.agent.llm_provider.complete_stream = lambda prompt: iter(
+            ["Let me check. [TO", 'OL: get_invoice_status]{"invoice_id": ', '"INV-001"}[/TOOL]']
+        )
+
+        response = "".join(adapter.handle_incoming_stream("1234567890", "Status of INV-001?"))
+
+        assert "[TOOL" not in response
+        assert response.startswith("Let me check.")
+        assert "Invoice INV-001 is currently: new" in response
+
+    def test_handle_incoming_stream_without_streaming_provider(self, adapter):
+        """Test providers without complete_stream yield one full chunk."""
+        chunks = list(adapter.handle_incoming_stream("1234567890", "Hello"))
+
+        assert len(chunks) == 1
+        assert chunks[0] == adapter._get_history("1234567890")[-1]["content"]
+
+    def test_static_prompt_sent_as_system_for_caching_providers(self, adapter):
+        """Test caching providers get the static prompt head as `system`."""
+        calls = []
+        provider = adapter.agent.llm_provider
+        provider.supports_prompt_caching = True
+        provider.complete = lambda prompt, system=None: calls.append((prompt, system)) or "Hi"
+
+        adapter.handle_incoming("1234567890", "Hello")
+        adapter.handle_incoming("1234567890", "Hello again")
+
+        (first_prompt, first_system), (second_prompt, second_system) = calls
+        assert first_system == second_system
+        assert "{{" not in first_system
+        assert first_prompt.startswith("Customer ID: 1234567890")
+        assert "Hello again" in second_prompt
+
 
 # ============================================================================
 # Server Webhook Tests
@@ -383,3 +450,26 @@ class TestFSMValidation:
         assert response is not None
         # Response should indicate state issue
         # (exact wording depends on agent prompt)
+
+
+# ============================================================================
+# Simulator Tests
+# ============================================================================
+
+
+class TestSimulatorReplay:
+    """Test scripted (non-tty) simulator replay."""
+
+    def test_replay_into_plain_stream(self, monkeypatch):
+        """Test replay works when stdout is not a TextIOWrapper."""
+        # Imported here: the simulator loads .env into the environment on import
+        from channels.whatsapp import simulator
+
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+        out = io.StringIO()
+        monkeypatch.setattr(sys, "stdin", io.StringIO("/create INV-001\nexit\n"))
+        monkeypatch.setattr(sys, "stdout", out)
+
+        simulator.main([])
+
+        assert "Current State: new" in out.getvalue()
@@ -49,6 +49,9 @@ class InMemoryInvoiceStore:
 
     def __init__(self) -> None:
         self._invoices: dict[str, InvoiceFSM] = {}
+        # Bumped on every save, so callers can tell cheaply whether any
+        # invoice state may have changed
+        self.version = 0
 
     def get_fsm(self, invoice_id: str) -> Optional[InvoiceFSM]:
         """Get state machine for invoice."""
@@ -57,6 +60,7 @@ class InMemoryInvoiceStore:
     def save_fsm(self, fsm: InvoiceFSM) -> None:
         """Save state machine."""
         self._invoices[fsm.invoice_id] = fsm
+        self.version += 1
 
     def create_invoice(self, invoice_id: str) -> InvoiceFSM:
         """Create a new invoice FSM."""